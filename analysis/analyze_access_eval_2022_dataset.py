@@ -2,16 +2,21 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import json
 import logging
 import sys
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
 from shutil import rmtree
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import plotting_2022_blacklight
-from core_2022 import (
-    load_access_eval_2022_dataset,
-)
+import constants_2022
+import instrumentation
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 ###############################################################################
 
@@ -21,9 +26,34 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
+# The plotting functions for the plots and tables used in the paper, and for
+# every plot and table
+PAPER_PLOTS = [
+    "plot_content_based_summary_stats",
+    "write_group_comparisons",
+]
+ALL_PLOTS = [
+    "plot_homepage_stats",
+    "plot_catalog_stats",
+    "plot_summary_stats",
+    "plot_state_based_summary_stats",
+    "plot_automation_based_summary_stats",
+    "plot_interface_based_summary_stats",
+    "plot_ID_based_summary_stats",
+    "plot_content_based_summary_stats",
+    "write_group_comparisons",
+]
+
 ###############################################################################
 
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 class Args(argparse.Namespace):
     def __init__(self) -> None:
         self.__parse()
@@ -44,33 +74,159 @@ class Args(argparse.Namespace):
                 "Should all plots be generated (including ones not in the final paper)."
             ),
         )
+        p.add_argument(
+            "--jobs",
+            dest="jobs",
+            type=_positive_int,
+            default=1,
+            help=(
+                "The number of processes to render plots with. Each process "
+                "keeps its chart renderer warm across the plots it renders. "
+                "Default: 1 (render every plot in this process)"
+            ),
+        )
+        p.add_argument(
+            "--vendor-names",
+            dest="vendor_names",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_VENDOR_NAMES,
+            help=(
+                "The vendor name mapping table the dataset was generated with. "
+                "Vendor names are replaced with their canonical spelling from "
+                "it when the dataset is loaded. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_VENDOR_NAMES}"
+            ),
+        )
+        p.add_argument(
+            "--profile",
+            dest="profile",
+            type=Path,
+            default=None,
+            help=(
+                "A directory to store a cProfile profile (`.pstats`) and a "
+                "JSON file of per-stage timings and counters for this run in."
+            ),
+        )
         p.parse_args(namespace=self)
 
 
 ###############################################################################
 
 
+# The dataset, set once per worker process by `_init_worker`
+_WORKER_DATA: Optional["pd.DataFrame"] = None
+
+
+def _init_worker(data: "pd.DataFrame") -> None:
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _run_plot(plot_name: str) -> float:
+    # Run one plotting function on the worker's dataset, safe to run in a
+    # worker process. Altair is only loaded by the processes that plot.
+    import plotting_2022_blacklight
+
+    start = time.perf_counter()
+    getattr(plotting_2022_blacklight, plot_name)(_WORKER_DATA)
+    duration = time.perf_counter() - start
+    log.info(f"{plot_name} finished in {duration:.2f}s")
+    return duration
+
+
+def generate_plots(
+    data: "pd.DataFrame",
+    plot_names: List[str],
+    jobs: int = 1,
+) -> Dict[str, float]:
+    """
+    Run plotting functions, optionally spread over a process pool.
+
+    The dataset is sent to each worker once. Workers live for the whole run,
+    so each one starts its chart renderer once and reuses it for every plot
+    it is given.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        The dataset to plot.
+    plot_names: List[str]
+        The names of the `plotting_2022_blacklight` functions to run.
+    jobs: int
+        The number of worker processes to use.
+        Default: 1 (run every plot in the current process)
+
+    Returns
+    -------
+    durations: Dict[str, float]
+        The seconds each plotting function took, by name.
+    """
+    durations: Dict[str, float] = {}
+    if jobs == 1:
+        _init_worker(data)
+        for plot_name in plot_names:
+            durations[plot_name] = _run_plot(plot_name)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(data,),
+        ) as executor:
+            futures = {
+                executor.submit(_run_plot, plot_name): plot_name
+                for plot_name in plot_names
+            }
+            for future in as_completed(futures):
+                durations[futures[future]] = future.result()
+
+    for plot_name, duration in durations.items():
+        instrumentation.record(f"plot:{plot_name}", duration)
+    return durations
+
+
+###############################################################################
+
+
 def main() -> None:
     try:
         args = Args()
 
-        # Load data
-        data = load_access_eval_2022_dataset()
-
-        # Clear prior plots
-        if plotting_2022_blacklight.PLOTTING_DIR.exists():
-            rmtree(plotting_2022_blacklight.PLOTTING_DIR)
-
-        # Generate plots
-        log.info("Generating plots used in paper...")
-        # plotting_2022_blacklight.plot_homepage_stats(data)
-        # plotting_2022_blacklight.plot_catalog_stats(data)
-        # plotting_2022_blacklight.plot_summary_stats(data)
-        # plotting_2022_blacklight.plot_state_based_summary_stats(data)
-        # plotting_2022_blacklight.plot_automation_based_summary_stats(data)
-        # plotting_2022_blacklight.plot_interface_based_summary_stats(data)
-        # plotting_2022_blacklight.plot_ID_based_summary_stats(data)
-        plotting_2022_blacklight.plot_content_based_summary_stats(data)
+        # Only load pandas once there is work to do, so `--help` and bad
+        # arguments return straight away. Altair is only loaded by the
+        # processes that plot (see `_run_plot`).
+        from core_2022 import load_access_eval_2022_dataset
+
+        profiling = nullcontext()
+        if args.profile is not None:
+            profiling = instrumentation.profile(
+                args.profile, "analyze-access-eval-2022-dataset"
+            )
+
+        with profiling:
+            # Load data
+            data = load_access_eval_2022_dataset(vendor_names=args.vendor_names)
+            instrumentation.count("dataset_rows", len(data))
+
+            # Clear prior plots
+            if constants_2022.PLOTTING_DIR.exists():
+                rmtree(constants_2022.PLOTTING_DIR)
+
+            # Generate plots
+            if args.all_plots:
+                log.info("Generating all plots...")
+                plot_names = ALL_PLOTS
+            else:
+                log.info("Generating plots used in paper...")
+                plot_names = PAPER_PLOTS
+
+            start = time.perf_counter()
+            durations = generate_plots(data, plot_names, jobs=args.jobs)
+            log.info(
+                f"Generated {len(durations)} plots in "
+                f"{time.perf_counter() - start:.2f}s "
+                f"({sum(durations.values()):.2f}s of plotting) "
+                f"with {args.jobs} jobs."
+            )
 
     except Exception as e:
         log.error("=============================================")
@@ -0,0 +1,945 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+import shutil
+import time
+import traceback
+import zipfile
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from constants_2022 import DatasetFields
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+###############################################################################
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(levelname)4s: %(module)s:%(lineno)4s %(asctime)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+# The real blacklight inspection the synthetic ones are modelled on
+TEMPLATE_INSPECTION = (
+    Path(__file__).parent.parent
+    / "__tests__"
+    / "test-data"
+    / "veteransunited-1.0.3"
+    / "inspection.json"
+)
+
+# Bump when the generated data changes so existing benchmark data is rebuilt
+SYNTHETIC_DATA_VERSION = "1"
+
+# The number of made up third party hosts added to the template's hosts
+SYNTHETIC_HOST_POOL_SIZE = 2000
+
+# The pipelines that can be benchmarked
+TARGETS = ["core_2022", "disconnect", "pipeline_2022", "pipeline_2022_cached"]
+
+# The pipelines whose caches are filled by an untimed run before measuring
+WARM_TARGETS = ["pipeline_2022_cached"]
+
+# The directory next to the synthetic data that pipeline runs write into
+PIPELINE_SCRATCH_DIRNAME = "pipeline_2022"
+
+# The modules and CLIs whose import and startup times are recorded
+STARTUP_MODULES = [
+    "core_2022",
+    "disconnect",
+    "pipeline_2022",
+    "plotting_2022_blacklight",
+]
+STARTUP_SCRIPTS = [
+    "generate_access_eval_2022_dataset.py",
+    "analyze_access_eval_2022_dataset.py",
+    "scan_2022.py",
+    "benchmark_2022.py",
+]
+
+# The most wall seconds a CLI's `--help` should take, well above a bare
+# interpreter start but below the time it takes to import pandas. Wall times
+# vary too much between machines to enforce this in the tests, so
+# `compare_startup` reports it instead.
+HELP_BUDGET_SECONDS = 0.3
+
+###############################################################################
+
+
+class Args(argparse.Namespace):
+    def __init__(self) -> None:
+        self.__parse()
+
+    def __parse(self) -> None:
+        p = argparse.ArgumentParser(
+            prog="benchmark-2022",
+            description=(
+                "Generate synthetic blacklight results and time the 2022 "
+                "analysis pipelines on them, end to end and per stage."
+            ),
+        )
+        p.add_argument(
+            "--sites",
+            dest="sites",
+            type=int,
+            default=1000,
+            help="The number of synthetic libraries to generate. Default: 1000",
+        )
+        p.add_argument(
+            "--hosts",
+            dest="hosts",
+            type=int,
+            nargs=2,
+            default=(0, 60),
+            metavar=("MIN", "MAX"),
+            help="The range of third party hosts per site. Default: 0 60",
+        )
+        p.add_argument(
+            "--trackers",
+            dest="trackers",
+            type=int,
+            nargs=2,
+            default=(0, 400),
+            metavar=("MIN", "MAX"),
+            help=(
+                "The range of third party tracker requests per site, which "
+                "sets the report size. Default: 0 400"
+            ),
+        )
+        p.add_argument(
+            "--layout",
+            dest="layout",
+            choices=["zip", "dir"],
+            default="zip",
+            help=(
+                "Store the synthetic results as a zip archive or as a "
+                "directory tree. Default: zip"
+            ),
+        )
+        p.add_argument(
+            "--seed",
+            dest="seed",
+            type=int,
+            default=0,
+            help="The random seed for the synthetic data. Default: 0",
+        )
+        p.add_argument(
+            "--data-dir",
+            dest="data_dir",
+            type=Path,
+            default=Path("benchmark-data"),
+            help=(
+                "The directory to generate the synthetic data in. Data from "
+                "an earlier run with the same settings is reused. "
+                "Default: benchmark-data"
+            ),
+        )
+        p.add_argument(
+            "--targets",
+            dest="targets",
+            nargs="+",
+            choices=TARGETS,
+            default=TARGETS,
+            help=(
+                "The pipelines to benchmark. pipeline_2022 runs the whole "
+                "generate step from empty caches, pipeline_2022_cached with "
+                "warm caches. Default: every pipeline"
+            ),
+        )
+        p.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            help="The number of processes to use for site processing. Default: 1",
+        )
+        p.add_argument(
+            "--repeat",
+            dest="repeat",
+            type=int,
+            default=1,
+            help="The number of times to run each pipeline. Default: 1",
+        )
+        p.add_argument(
+            "--output",
+            dest="output",
+            type=Path,
+            default=None,
+            help=(
+                "The JSON file to record the results to. "
+                "Default: benchmarks/<commit>-<time>.json"
+            ),
+        )
+        p.add_argument(
+            "--compare",
+            dest="compare",
+            type=Path,
+            default=None,
+            help="An earlier results file to report throughput and RSS changes against.",
+        )
+        p.parse_args(namespace=self)
+
+
+###############################################################################
+
+
+def _load_template() -> Dict[str, Any]:
+    with open(TEMPLATE_INSPECTION, "r") as open_f:
+        return json.load(open_f)
+
+
+def _host_pool(template: Dict[str, Any]) -> List[str]:
+    # The template's real third party hosts (so the Disconnect, owner, vendor
+    # and filter list lookups all find matches) padded out with made up ones
+    hosts = list(template["hosts"]["requests"]["third_party"])
+    hosts.extend(
+        f"cdn{i % 7}.tracker{i}.{('com', 'net', 'io', 'co.uk')[i % 4]}"
+        for i in range(SYNTHETIC_HOST_POOL_SIZE)
+    )
+    return hosts
+
+
+def _synthetic_inspection(
+    template: Dict[str, Any],
+    host_pool: List[str],
+    site: str,
+    n_hosts: int,
+    n_trackers: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    inspection = {
+        key: value
+        for key, value in template.items()
+        if key not in ("hosts", "reports")
+    }
+    inspection["uri_ins"] = f"http://{site}"
+    inspection["uri_dest"] = f"https://{site}/"
+    inspection["host"] = site
+
+    hosts = rng.sample(host_pool, min(n_hosts, len(host_pool)))
+    inspection["hosts"] = {
+        "requests": {"first_party": [site, f"www.{site}"], "third_party": hosts}
+    }
+
+    # Tracker requests keep the shape and size of the template's, but are
+    # sent to this site's hosts
+    reports = dict(template["reports"])
+    tracker_templates = template["reports"]["third_party_trackers"]
+    trackers = []
+    for _ in range(n_trackers if hosts else 0):
+        tracker = dict(rng.choice(tracker_templates))
+        parts = urlsplit(tracker["url"])
+        tracker["url"] = parts._replace(netloc=rng.choice(hosts)).geturl()
+        trackers.append(tracker)
+    reports["third_party_trackers"] = trackers
+
+    cookie_templates = template["reports"]["cookies"]
+    reports["cookies"] = [
+        dict(rng.choice(cookie_templates), domain=rng.choice(hosts))
+        for _ in range(rng.randint(0, len(hosts)))
+    ]
+
+    # Only some sites record keys or sessions
+    if rng.random() < 0.8:
+        reports["key_logging"] = {}
+    if rng.random() < 0.8:
+        reports["session_recorders"] = {}
+
+    inspection["reports"] = reports
+    return inspection
+
+
+def generate_synthetic_data(
+    data_dir: Path,
+    sites: int,
+    hosts: Tuple[int, int] = (0, 60),
+    trackers: Tuple[int, int] = (0, 400),
+    layout: str = "zip",
+    seed: int = 0,
+) -> Tuple[Path, Path]:
+    """
+    Generate a synthetic library CSV and blacklight results for it.
+
+    Every library gets a homepage and a catalog site, each with an
+    `inspection.json` built from the `veteransunited-1.0.3` test inspection.
+    The third party hosts are sampled from the template's hosts plus made up
+    ones, and the tracker requests and cookies are copies of the template's
+    entries sent to those hosts. One in twenty urls has no results, the same
+    as a site that failed to scan.
+
+    Data generated earlier in `data_dir` with the same settings is reused.
+
+    Parameters
+    ----------
+    data_dir: Path
+        The directory to store the data in.
+    sites: int
+        The number of libraries to generate.
+    hosts: Tuple[int, int]
+        The inclusive range of third party hosts per site.
+        Default: (0, 60)
+    trackers: Tuple[int, int]
+        The inclusive range of third party tracker requests per site.
+        Default: (0, 400)
+    layout: str
+        "zip" for a results archive, or "dir" for a directory tree.
+        Default: "zip"
+    seed: int
+        The random seed.
+        Default: 0
+
+    Returns
+    -------
+    library_data: Path
+        The path to the library CSV.
+    results: Path
+        The path to the results archive or directory.
+    """
+    data_dir = Path(data_dir)
+    settings = {
+        "version": SYNTHETIC_DATA_VERSION,
+        "sites": sites,
+        "hosts": list(hosts),
+        "trackers": list(trackers),
+        "layout": layout,
+        "seed": seed,
+    }
+    settings_path = data_dir / "settings.json"
+    library_data = data_dir / "library_data.csv"
+    results = data_dir / ("results.zip" if layout == "zip" else "results")
+
+    if settings_path.exists():
+        with open(settings_path, "r") as open_f:
+            if json.load(open_f) == settings:
+                log.info(f"Reusing synthetic data in {data_dir}")
+                return library_data, results
+
+    log.info(f"Generating {sites} synthetic libraries in {data_dir}")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    settings_path.unlink(missing_ok=True)
+
+    rng = random.Random(seed)
+    template = _load_template()
+    host_pool = _host_pool(template)
+
+    rows = []
+    archive = None
+    if layout == "zip":
+        archive = zipfile.ZipFile(results, "w", zipfile.ZIP_DEFLATED)
+    try:
+        for i in range(sites):
+            homepage = f"library{i}.org"
+            catalog = f"catalog{i}.library{i}.org"
+            rows.append(
+                {
+                    "Library": f"Synthetic Library {i}",
+                    DatasetFields.homepage_url: f"https://{homepage}/",
+                    DatasetFields.catalog_url: f"https://{catalog}/",
+                }
+            )
+            for site in (homepage, catalog):
+                if rng.random() < 0.05:
+                    continue
+                inspection = json.dumps(
+                    _synthetic_inspection(
+                        template,
+                        host_pool,
+                        site,
+                        rng.randint(*hosts),
+                        rng.randint(*trackers),
+                        rng,
+                    )
+                )
+                member = f"{site}/{SINGLE_PAGE_AXE_RESULTS_FILENAME}"
+                if archive is not None:
+                    archive.writestr(member, inspection)
+                else:
+                    (results / site).mkdir(parents=True, exist_ok=True)
+                    (results / member).write_text(inspection)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    import pandas as pd
+
+    pd.DataFrame(rows).to_csv(library_data, index=False)
+    with open(settings_path, "w") as open_f:
+        json.dump(settings, open_f)
+
+    return library_data, results
+
+
+###############################################################################
+
+
+class _StageTimer:
+    # Record the wall time of each named stage, in order
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    def time(self, name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[name] = time.perf_counter() - start
+        return result
+
+
+def _core_2022_stages(
+    library_data: Path, results: Path, workers: int
+) -> Dict[str, float]:
+    # The steps of `core_2022.combine_library_data_with_axe_results`
+    import pandas as pd
+
+    import core_2022
+    from blocklists import load_blocklists
+    from utils_2022 import find_site_results, merge_site_metrics, process_sites
+
+    timer = _StageTimer()
+    data = timer.time("read_library_data", pd.read_csv, library_data)
+    blocklists = timer.time(
+        "load_lookups", load_blocklists, core_2022.BLOCKLIST_NAMES
+    )
+    sites = timer.time(
+        "find_sites", find_site_results, data[DatasetFields.catalog_url], results
+    )
+    site_metrics = timer.time(
+        "process_sites",
+        process_sites,
+        core_2022._process_site,
+        sites,
+        workers=workers,
+        initializer=core_2022._init_worker,
+        initargs=(blocklists,),
+    )
+    timer.time(
+        "merge",
+        merge_site_metrics,
+        data,
+        DatasetFields.catalog_url,
+        site_metrics,
+        dtype="UInt32",
+    )
+    return timer.stages
+
+
+def _disconnect_stages(
+    library_data: Path, results: Path, workers: int
+) -> Dict[str, float]:
+    # The steps of `disconnect.combine_library_data_with_axe_results`
+    import pandas as pd
+
+    import disconnect
+    from domain_owners import OwnerIndex
+    from utils_2022 import find_site_results, merge_site_metrics, process_sites
+
+    timer = _StageTimer()
+    data = timer.time("read_library_data", pd.read_csv, library_data)
+    indexes = timer.time(
+        "load_lookups",
+        lambda: (disconnect.DisconnectIndex.from_file(), OwnerIndex.from_file()),
+    )
+    sites = timer.time(
+        "find_sites", find_site_results, data[DatasetFields.homepage_url], results
+    )
+    site_metrics = timer.time(
+        "process_sites",
+        process_sites,
+        disconnect._process_site,
+        sites,
+        workers=workers,
+        initializer=disconnect._init_worker,
+        initargs=indexes,
+    )
+    timer.time(
+        "merge",
+        merge_site_metrics,
+        data,
+        DatasetFields.homepage_url,
+        site_metrics,
+    )
+    return timer.stages
+
+
+def _pipeline_2022_stages(
+    library_data: Path, results: Path, workers: int, cached: bool = False
+) -> Dict[str, float]:
+    # The steps of `generate_access_eval_2022_dataset.main`, with the result,
+    # blocklist and output files kept next to the synthetic data. Without
+    # `cached` the caches are emptied first, as in a first run.
+    import pandas as pd
+
+    from core_2022 import store_access_eval_2022_dataset
+    from pipeline_2022 import combine_library_data_with_all_results
+    from vendor_names import update_vendor_name_map
+
+    scratch_dir = Path(results).parent / PIPELINE_SCRATCH_DIRNAME
+    if not cached:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    scratch_dir.mkdir(parents=True, exist_ok=True)
+
+    timer = _StageTimer()
+    data = timer.time("read_library_data", pd.read_csv, library_data)
+    data = timer.time(
+        "combine",
+        combine_library_data_with_all_results,
+        data,
+        results,
+        workers=workers,
+        cache=scratch_dir / "results-cache.sqlite",
+        blocklist_cache=scratch_dir / "blocklist-cache",
+        host_matrix=scratch_dir / "hosts.npz",
+    )
+    timer.time(
+        "update_vendor_names",
+        update_vendor_name_map,
+        data,
+        scratch_dir / "vendor_names.csv",
+    )
+    timer.time(
+        "store_dataset",
+        store_access_eval_2022_dataset,
+        data,
+        scratch_dir / "dataset.csv",
+    )
+    return timer.stages
+
+
+def _run_pipeline_2022(
+    library_data: Path, results: Path, workers: int, cached: bool = False
+) -> None:
+    _pipeline_2022_stages(library_data, results, workers, cached=cached)
+
+
+def _target_functions(target: str) -> Tuple[Callable, Callable, List[str]]:
+    # The end to end function, the per stage function and the url columns of
+    # a pipeline, imported only when it is run so `--help` stays fast
+    if target == "core_2022":
+        import core_2022
+
+        return (
+            core_2022.combine_library_data_with_axe_results,
+            _core_2022_stages,
+            [DatasetFields.catalog_url],
+        )
+    if target == "disconnect":
+        import disconnect
+
+        return (
+            disconnect.combine_library_data_with_axe_results,
+            _disconnect_stages,
+            [DatasetFields.homepage_url],
+        )
+    if target in ("pipeline_2022", "pipeline_2022_cached"):
+        cached = target in WARM_TARGETS
+        return (
+            partial(_run_pipeline_2022, cached=cached),
+            partial(_pipeline_2022_stages, cached=cached),
+            [DatasetFields.homepage_url, DatasetFields.catalog_url],
+        )
+    raise ValueError(f"Unknown benchmark target: {target}")
+
+
+def _peak_rss_mb() -> float:
+    # The peak resident set size of this process and its (waited for) workers
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _run_target(
+    target: str,
+    stages: bool,
+    library_data: Path,
+    results: Path,
+    workers: int,
+    queue: Any,
+) -> None:
+    # Run one pipeline in a fresh process so its peak RSS is its own
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        combine, stage_func, _ = _target_functions(target)
+        start = time.perf_counter()
+        if stages:
+            timings = stage_func(library_data, results, workers)
+        else:
+            combine(library_data, results, workers=workers)
+            timings = {}
+        seconds = time.perf_counter() - start
+
+        queue.put(
+            {
+                "seconds": seconds,
+                "stages": timings,
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+        )
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+
+
+def _measure(
+    target: str,
+    stages: bool,
+    library_data: Path,
+    results: Path,
+    workers: int,
+) -> Dict[str, Any]:
+    # Spawned processes are not daemons, so they may start their own pool
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_run_target,
+        args=(target, stages, library_data, results, workers, queue),
+    )
+    process.start()
+    measurement = queue.get()
+    process.join()
+    if "error" in measurement:
+        raise RuntimeError(f"Benchmark of {target} failed:\n{measurement['error']}")
+    return measurement
+
+
+def run_benchmarks(
+    library_data: Path,
+    results: Path,
+    targets: List[str] = TARGETS,
+    workers: int = 1,
+    repeat: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Time each pipeline end to end and per stage on a library CSV and results.
+
+    Every run is made in a fresh process, so imports, compiled lookups and
+    peak RSS are measured as in a real run rather than carried over.
+
+    The "pipeline_2022" targets run the whole generate step (the combined
+    pipeline with its result cache, blocklist cache and host matrix, then the
+    vendor names and storing the dataset). "pipeline_2022" starts from empty
+    caches every run, while "pipeline_2022_cached" fills them with an untimed
+    run first.
+
+    Parameters
+    ----------
+    library_data: Path
+        The path to the library CSV.
+    results: Path
+        The path to the results archive or directory.
+    targets: List[str]
+        The pipelines to time, any of `TARGETS`.
+        Default: every pipeline
+    workers: int
+        The number of processes to use for site processing.
+        Default: 1
+    repeat: int
+        The number of end to end and per stage runs of each pipeline.
+        Default: 1
+
+    Returns
+    -------
+    benchmarks: List[Dict[str, Any]]
+        For each pipeline, the number of sites with results, the best end to
+        end time in seconds, the sites per second at that time, the highest
+        peak RSS in megabytes, and the best time of each stage.
+    """
+    import pandas as pd
+
+    from utils_2022 import find_site_results
+
+    data = pd.read_csv(library_data)
+    benchmarks = []
+    for target in targets:
+        n_sites = sum(
+            site is not None
+            for url_column in _target_functions(target)[2]
+            for site in find_site_results(data[url_column], results)
+        )
+
+        if target in WARM_TARGETS:
+            _measure(target, False, library_data, results, workers)
+
+        end_to_end = [
+            _measure(target, False, library_data, results, workers)
+            for _ in range(repeat)
+        ]
+        staged = [
+            _measure(target, True, library_data, results, workers)
+            for _ in range(repeat)
+        ]
+
+        seconds = min(run["seconds"] for run in end_to_end)
+        benchmark = {
+            "target": target,
+            "sites": n_sites,
+            "seconds": seconds,
+            "sites_per_second": n_sites / seconds,
+            "peak_rss_mb": max(run["peak_rss_mb"] for run in end_to_end),
+            "stages": {
+                stage: min(run["stages"][stage] for run in staged)
+                for stage in staged[0]["stages"]
+            },
+        }
+        log.info(
+            f"{target}: {n_sites} sites in {seconds:.2f}s "
+            f"({benchmark['sites_per_second']:.1f} sites/s, "
+            f"peak RSS {benchmark['peak_rss_mb']:.0f} MB)"
+        )
+        benchmarks.append(benchmark)
+
+    return benchmarks
+
+
+def measure_startup(repeat: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    Time importing each analysis module and running each CLI with `--help`,
+    each in a fresh interpreter.
+
+    Import times are the module's cumulative time from `python -X importtime`,
+    so they cover everything the module imports.
+
+    Parameters
+    ----------
+    repeat: int
+        The number of times to measure each, keeping the fastest.
+        Default: 1
+
+    Returns
+    -------
+    startup: Dict[str, Dict[str, float]]
+        The seconds to import each of `STARTUP_MODULES` under "imports", and
+        the wall seconds of each of `STARTUP_SCRIPTS` under "help".
+    """
+    analysis_dir = Path(__file__).parent
+
+    imports = {}
+    for module in STARTUP_MODULES:
+        runs = []
+        for _ in range(repeat):
+            importtime = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=analysis_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stderr
+            # The last line is the module itself: "self | cumulative | name"
+            cumulative = importtime.strip().splitlines()[-1].split("|")[1]
+            runs.append(int(cumulative) / 1e6)
+        imports[module] = min(runs)
+
+    help_times = {}
+    for script in STARTUP_SCRIPTS:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, script, "--help"],
+                cwd=analysis_dir,
+                capture_output=True,
+                check=True,
+            )
+            runs.append(time.perf_counter() - start)
+        help_times[script] = min(runs)
+
+    for name, seconds in {**imports, **help_times}.items():
+        log.info(f"Startup of {name}: {seconds:.3f}s")
+    return {"imports": imports, "help": help_times}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_benchmarks(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> "pd.DataFrame":
+    """
+    Compare the throughput and peak RSS of two benchmark results files.
+
+    Parameters
+    ----------
+    baseline: Dict[str, Any]
+        The loaded contents of the earlier results file.
+    current: Dict[str, Any]
+        The loaded contents of the newer results file.
+
+    Returns
+    -------
+    comparison: pd.DataFrame
+        For each pipeline in both files, the sites per second and peak RSS of
+        each, and the ratio of the current value to the baseline value.
+    """
+    import pandas as pd
+
+    before = {b["target"]: b for b in baseline["benchmarks"]}
+    rows = []
+    for after in current["benchmarks"]:
+        if after["target"] not in before:
+            continue
+        old = before[after["target"]]
+        rows.append(
+            {
+                "target": after["target"],
+                "sites_per_second_baseline": old["sites_per_second"],
+                "sites_per_second": after["sites_per_second"],
+                "sites_per_second_ratio": (
+                    after["sites_per_second"] / old["sites_per_second"]
+                ),
+                "peak_rss_mb_baseline": old["peak_rss_mb"],
+                "peak_rss_mb": after["peak_rss_mb"],
+                "peak_rss_mb_ratio": after["peak_rss_mb"] / old["peak_rss_mb"],
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+def compare_startup(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> "pd.DataFrame":
+    """
+    Compare the import and `--help` times of two benchmark results files.
+
+    Parameters
+    ----------
+    baseline: Dict[str, Any]
+        The loaded contents of the earlier results file.
+    current: Dict[str, Any]
+        The loaded contents of the newer results file.
+
+    Returns
+    -------
+    comparison: pd.DataFrame
+        For each module and CLI in both files, the seconds of each, the
+        ratio of the current time to the baseline time, and for CLIs whether
+        `--help` is within `HELP_BUDGET_SECONDS`.
+    """
+    import pandas as pd
+
+    rows = []
+    for kind in ["imports", "help"]:
+        before = baseline.get("startup", {}).get(kind, {})
+        for name, seconds in current["startup"][kind].items():
+            if name in before:
+                rows.append(
+                    {
+                        "startup": f"{kind}: {name}",
+                        "seconds_baseline": before[name],
+                        "seconds": seconds,
+                        "seconds_ratio": seconds / before[name],
+                        "within_budget": (
+                            seconds <= HELP_BUDGET_SECONDS if kind == "help" else None
+                        ),
+                    }
+                )
+                if kind == "help" and seconds > HELP_BUDGET_SECONDS:
+                    log.warning(
+                        f"{name} --help took {seconds:.3f}s, over the "
+                        f"{HELP_BUDGET_SECONDS}s budget"
+                    )
+
+    return pd.DataFrame(rows)
+
+
+###############################################################################
+
+
+def main() -> None:
+    try:
+        args = Args()
+
+        library_data, results = generate_synthetic_data(
+            args.data_dir,
+            args.sites,
+            hosts=tuple(args.hosts),
+            trackers=tuple(args.trackers),
+            layout=args.layout,
+            seed=args.seed,
+        )
+        benchmarks = run_benchmarks(
+            library_data,
+            results,
+            targets=args.targets,
+            workers=args.workers,
+            repeat=args.repeat,
+        )
+
+        commit = _git_commit()
+        created = datetime.now(timezone.utc)
+        record = {
+            "commit": commit,
+            "created": created.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": multiprocessing.cpu_count(),
+            "workers": args.workers,
+            "repeat": args.repeat,
+            "data": {
+                "sites": args.sites,
+                "hosts": list(args.hosts),
+                "trackers": list(args.trackers),
+                "layout": args.layout,
+                "seed": args.seed,
+            },
+            "benchmarks": benchmarks,
+            "startup": measure_startup(args.repeat),
+        }
+
+        output = args.output
+        if output is None:
+            output = (
+                Path("benchmarks")
+                / f"{commit or 'unknown'}-{created:%Y%m%dT%H%M%S}.json"
+            )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as open_f:
+            json.dump(record, open_f, indent=2)
+        log.info(f"Stored benchmark results to {output}")
+
+        if args.compare is not None:
+            with open(args.compare, "r") as open_f:
+                baseline = json.load(open_f)
+            print(compare_benchmarks(baseline, record).to_string(index=False))
+            print(compare_startup(baseline, record).to_string(index=False))
+
+    except Exception as e:
+        log.error("=============================================")
+        log.error("\n\n" + traceback.format_exc())
+        log.error("=============================================")
+        log.error("\n\n" + str(e) + "\n")
+        log.error("=============================================")
+        sys.exit(1)
+
+
+###############################################################################
+# Allow caller to directly run this module (usually in development scenarios)
+
+if __name__ == "__main__":
+    main()
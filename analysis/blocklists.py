@@ -0,0 +1,762 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import functools
+import logging
+import pickle
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import instrumentation
+from constants_2022 import ACCESS_EVAL_2022_BLOCKLISTS
+from result_cache import file_digest
+
+###############################################################################
+
+log = logging.getLogger(__name__)
+
+# Bump when the compiled layout changes so cached matchers are rebuilt
+MATCHER_CACHE_VERSION = "4"
+
+# The number of request urls whose parts, and site independent verdicts in
+# each matcher, are remembered. Third party urls recur on many sites.
+MATCH_CACHE_SIZE = 65536
+
+# The rule indexes of a matcher: blocking and exception rules, each split into
+# rules for every site and rules limited to or excluding sites (`$domain=`),
+# and the `$important` blocking rules again, which exceptions do not override
+_BLOCK, _BLOCK_DOMAIN, _ALLOW, _ALLOW_DOMAIN, _IMPORTANT, _IMPORTANT_DOMAIN = range(6)
+
+# Runs of these characters are the tokens rules are indexed by. Everything else
+# (including the characters an ABP "^" separator matches) splits tokens.
+_TOKEN = re.compile(r"[a-z0-9%]+")
+
+# Token runs in regex rules, and the escaped literals that can delimit them
+_REGEX_TOKEN = re.compile(r"(?<!\\)[A-Za-z0-9%]+")
+_REGEX_SEPARATORS = {r"\.", r"\/", r"\:", r"\-", r"\_", r"\=", r"\?", r"\&"}
+
+# Parts of most request urls (schemes, top level domains, file types), which
+# rules are only indexed by when they have no other token
+_COMMON_TOKENS = frozenset(
+    [
+        "http",
+        "https",
+        "www",
+        "com",
+        "net",
+        "org",
+        "html",
+        "htm",
+        "php",
+        "js",
+        "css",
+        "json",
+        "gif",
+        "png",
+        "jpg",
+    ]
+)
+
+# What a hostname anchored ("||") rule starts with
+_ANCHOR_HOST = re.compile(r"[a-z0-9.-]+")
+
+# Matched by a "||" anchor: a scheme and any subdomains
+_ANCHOR_REGEX = r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?"
+
+# Matched by a "^" placeholder: a separator character or the end of the url
+_SEPARATOR_REGEX = r"(?:[^\w\-.%]|$)"
+
+# The host of a url, the same as `urlsplit(url).hostname` but quicker
+_URL_HOST = re.compile(
+    r"(?:[a-z][a-z0-9+.-]*:)?//(?:[^/?#@]*@)?(\[[^\]/?#]*\]|[^:/?#]*)"
+)
+
+# Request type options, the request type is not recorded so they are ignored
+_RESOURCE_TYPES = {
+    "beacon",
+    "css",
+    "font",
+    "frame",
+    "image",
+    "media",
+    "object",
+    "object-subrequest",
+    "other",
+    "ping",
+    "script",
+    "stylesheet",
+    "subdocument",
+    "webrtc",
+    "websocket",
+    "xhr",
+    "xmlhttprequest",
+}
+
+###############################################################################
+
+
+class NetworkFilter(NamedTuple):
+    # A compiled network rule, only plain data so the index pickles quickly.
+    # Rules without wildcards, separators or a "||" anchor also keep their
+    # literal text, which is checked with plain string operations instead of
+    # the regex.
+    text: str
+    regex: str
+    literal: Optional[str]
+    anchor_start: bool
+    anchor_end: bool
+    match_case: bool
+    include_domains: FrozenSet[str]
+    exclude_domains: FrozenSet[str]
+    important: bool
+
+
+class _RuleIndex(NamedTuple):
+    # Rules keyed by the host they are anchored to, by the sites they are
+    # limited to (`$domain=`), or by a whole token. The rest are checked for
+    # every url.
+    # Token keyed rules that are plain substrings with no other conditions are
+    # kept apart as (literal, rule id) pairs, which are checked the quickest.
+    # So are host anchored rules such as "||example.com^" or
+    # "||example.com/ads/", as (rest of the pattern after the host, whether it
+    # ends with a "^" separator, rule id), which are checked right after the
+    # url's host without a regex.
+    # Token keyed rules are grouped again by their next rarest token ("" when
+    # they have one token), so a url only reaches the rules whose first two
+    # tokens it has.
+    rules: List[NetworkFilter]
+    by_host: Dict[str, List[int]]
+    by_host_rest: Dict[str, List[Tuple[str, bool, int]]]
+    by_token: Dict[str, Dict[str, List[int]]]
+    by_token_literal: Dict[str, Dict[str, List[Tuple[str, int]]]]
+    by_source: Dict[str, List[int]]
+    unindexed: List[int]
+    # Every token, host and site that keys a rule, to drop the rest of a url's
+    # at once
+    tokens: FrozenSet[str]
+    hosts: FrozenSet[str]
+    sources: FrozenSet[str]
+
+
+def _pattern_to_regex(pattern: str) -> str:
+    if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        return pattern[1:-1]
+
+    start = ""
+    if pattern.startswith("||"):
+        start = _ANCHOR_REGEX
+        pattern = pattern[2:]
+    elif pattern.startswith("|"):
+        start = "^"
+        pattern = pattern[1:]
+    end = ""
+    if pattern.endswith("|"):
+        end = "$"
+        pattern = pattern[:-1]
+
+    body = re.escape(pattern).replace(r"\*", ".*").replace(r"\^", _SEPARATOR_REGEX)
+    return start + body + end
+
+
+def _index_key(pattern: str) -> Tuple[Optional[str], List[str]]:
+    # Get the host a rule is anchored to, or else the tokens it could be
+    # indexed by
+    if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        return None, _regex_tokens(pattern[1:-1])
+
+    pattern = pattern.lower()
+    if pattern.startswith("||"):
+        host_match = _ANCHOR_HOST.match(pattern, 2)
+        if host_match is not None:
+            host = host_match.group()
+            rest = pattern[host_match.end() :]
+            # Only whole host names, not prefixes such as "||ads." or "||ad*"
+            if "." in host.strip(".") and not host.endswith(".") and (
+                not rest or rest[0] in "^/:|"
+            ):
+                return host, []
+
+    left_anchored = pattern.startswith("|")
+    right_anchored = pattern.endswith("|")
+    body = pattern.lstrip("|")
+    body = body[:-1] if right_anchored else body
+
+    # A token is only whole (the same token the url splits into) when neither
+    # side of it can run on into more token characters
+    tokens = []
+    for token_match in _TOKEN.finditer(body):
+        start, end = token_match.span()
+        if start == 0 and not left_anchored:
+            continue
+        if end == len(body) and not right_anchored:
+            continue
+        if body[start - 1 : start] == "*" or body[end : end + 1] == "*":
+            continue
+        tokens.append(token_match.group())
+
+    return None, tokens
+
+
+def _is_common_token(token: str) -> bool:
+    # Tokens that many request urls contain, which make poor index keys
+    return len(token) < 3 or token.isdigit() or token in _COMMON_TOKENS
+
+
+def _regex_tokens(regex: str) -> List[str]:
+    # Whole tokens every match of a regex rule must contain: literal runs
+    # between literal separators, in regexes without groups or alternation
+    if "(" in regex or "|" in regex:
+        return []
+
+    tokens = []
+    for token_match in _REGEX_TOKEN.finditer(regex):
+        start, end = token_match.span()
+        before = regex[max(start - 2, 0) : start]
+        after = regex[end : end + 2]
+        if (before in _REGEX_SEPARATORS or before[-1:] == "/") and (
+            after in _REGEX_SEPARATORS or after[:1] == "/"
+        ):
+            tokens.append(token_match.group().lower())
+
+    return tokens
+
+
+def _parse_rule(line: str) -> Optional[Tuple[bool, str, NetworkFilter]]:
+    # Parse a filter list line into (is_exception, pattern, filter), or None
+    # for comments, cosmetic rules, and rules that cannot apply to a recorded
+    # third party request
+    line = line.strip()
+    if not line or line.startswith("!") or line.startswith("["):
+        return None
+    if "##" in line or "#@#" in line or "#?#" in line or "#$#" in line:
+        return None
+
+    text = line
+    exception = line.startswith("@@")
+    if exception:
+        line = line[2:]
+
+    pattern, options = line, ""
+    if not (len(line) > 1 and line.startswith("/") and line.endswith("/")):
+        dollar = line.rfind("$")
+        if dollar != -1:
+            pattern, options = line[:dollar], line[dollar + 1 :]
+
+    match_case = False
+    important = False
+    include_domains: List[str] = []
+    exclude_domains: List[str] = []
+    for option in filter(None, options.split(",")):
+        negated = option.startswith("~")
+        name = option.lstrip("~")
+        if name.startswith("domain="):
+            for domain in name[len("domain=") :].split("|"):
+                if domain.startswith("~"):
+                    exclude_domains.append(domain[1:].lower())
+                else:
+                    include_domains.append(domain.lower())
+        elif name in ("third-party", "3p"):
+            # Every classified request is third party
+            if negated:
+                return None
+        elif name in ("first-party", "1p"):
+            if not negated:
+                return None
+        elif name == "match-case":
+            match_case = True
+        elif name == "important":
+            important = not exception
+        elif name in _RESOURCE_TYPES:
+            continue
+        else:
+            # Page level (document, popup, csp, ...) or unknown options
+            return None
+
+    literal = None
+    anchor_start = pattern.startswith("|") and not pattern.startswith("||")
+    anchor_end = pattern.endswith("|") and len(pattern) > 1
+    body = pattern[1 if anchor_start else 0 : -1 if anchor_end else None]
+    if not (
+        body.startswith("/") and body.endswith("/") and len(body) > 1
+    ) and not any(special in body for special in "*^|"):
+        literal = body if match_case else body.lower()
+
+    return (
+        exception,
+        pattern,
+        NetworkFilter(
+            text=text,
+            regex=_pattern_to_regex(pattern),
+            literal=literal,
+            anchor_start=anchor_start,
+            anchor_end=anchor_end,
+            match_case=match_case,
+            include_domains=frozenset(include_domains),
+            exclude_domains=frozenset(exclude_domains),
+            important=important,
+        ),
+    )
+
+
+def _build_index(rules: Sequence[Tuple[str, NetworkFilter]]) -> _RuleIndex:
+    keys = [_index_key(pattern) for pattern, _ in rules]
+
+    # Index each rule by its rarest token (then longest), so that tokens most
+    # urls contain such as "https" or "com" only key rules that have no other.
+    # How rare a token is among the rules says little about how rare it is in
+    # urls, so common url tokens are avoided first.
+    token_counts: Dict[str, int] = {}
+    for _, tokens in keys:
+        for token in set(tokens):
+            token_counts[token] = token_counts.get(token, 0) + 1
+
+    index = _RuleIndex(
+        [], {}, {}, {}, {}, {}, [], frozenset(), frozenset(), frozenset()
+    )
+    for (pattern, network_filter), (host, tokens) in zip(rules, keys):
+        rule_id = len(index.rules)
+        index.rules.append(network_filter)
+        if host is not None:
+            rest = pattern[2 + len(host) :]
+            separator_end = rest.endswith("^")
+            rest = rest[:-1] if separator_end else rest
+            if (
+                not any(special in rest for special in "*^|")
+                and not network_filter.match_case
+                and not network_filter.include_domains
+                and not network_filter.exclude_domains
+            ):
+                index.by_host_rest.setdefault(host, []).append(
+                    (rest.lower(), separator_end, rule_id)
+                )
+            else:
+                index.by_host.setdefault(host, []).append(rule_id)
+        elif network_filter.include_domains:
+            # The sites a rule is limited to are more selective than a token
+            for domain in network_filter.include_domains:
+                index.by_source.setdefault(domain, []).append(rule_id)
+        elif tokens:
+            ranked = sorted(
+                set(tokens),
+                key=lambda token: (
+                    _is_common_token(token),
+                    token_counts[token],
+                    -len(token),
+                    token,
+                ),
+            )
+            token = ranked[0]
+            second = ranked[1] if len(ranked) > 1 else ""
+            if (
+                network_filter.literal is not None
+                and not network_filter.anchor_start
+                and not network_filter.anchor_end
+                and not network_filter.match_case
+                and not network_filter.exclude_domains
+            ):
+                index.by_token_literal.setdefault(token, {}).setdefault(
+                    second, []
+                ).append((network_filter.literal, rule_id))
+            else:
+                index.by_token.setdefault(token, {}).setdefault(
+                    second, []
+                ).append(rule_id)
+        else:
+            index.unindexed.append(rule_id)
+
+    return index._replace(
+        tokens=frozenset(index.by_token) | frozenset(index.by_token_literal),
+        hosts=frozenset(index.by_host) | frozenset(index.by_host_rest),
+        sources=frozenset(index.by_source),
+    )
+
+
+class _UrlMatch(NamedTuple):
+    # The verdicts of the rules without a domain option for a url
+    blocked: Optional[NetworkFilter]
+    allowed: bool
+
+
+@functools.lru_cache(maxsize=MATCH_CACHE_SIZE)
+def _host_suffixes(host: str) -> Tuple[str, ...]:
+    # "a.b.com" -> ("a.b.com", "b.com", "com")
+    labels = host.split(".")
+    return tuple(".".join(labels[i:]) for i in range(len(labels)))
+
+
+def _separator_at(url: str, position: int) -> bool:
+    # Whether a "^" placeholder matches at a position, see _SEPARATOR_REGEX
+    if position >= len(url):
+        return True
+    char = url[position]
+    return not (char.isalnum() or char in "_-.%")
+
+
+@functools.lru_cache(maxsize=MATCH_CACHE_SIZE)
+def _parse_url(url: str) -> Tuple[str, Tuple[str, ...], FrozenSet[str], int]:
+    # The lowercased url, its host suffixes, its tokens and where its host
+    # ends, shared by every matcher in the process
+    lowered = url.lower()
+    host_match = _URL_HOST.match(lowered)
+    if host_match is None:
+        host, host_end = "", 0
+    else:
+        host, host_end = host_match.group(1).strip("[]"), host_match.end(1)
+    return (
+        lowered,
+        _host_suffixes(host),
+        frozenset(_TOKEN.findall(lowered)),
+        host_end,
+    )
+
+
+###############################################################################
+
+
+class FilterMatcher:
+    """
+    An EasyList / EasyPrivacy (Adblock Plus syntax) network filter list
+    compiled for classifying request urls.
+
+    Blocking and exception (`@@`) rules are each indexed by the host they are
+    anchored to (`||example.com^`), the sites they are limited to, or else by
+    their rarest whole token, so a
+    url is only checked against the rules that share its host suffixes or one
+    of its tokens. Most rules are plain text once their host or token is
+    known and are checked with string operations; the regexes of the rest are
+    compiled on first use.
+
+    As in Adblock Plus, a matching exception rule allows a request unless an
+    `$important` blocking rule also matches it.
+
+    Rules with a `$domain=` option are kept apart from the rest. The verdict
+    of the other rules only depends on the url, so it is remembered for the
+    last `MATCH_CACHE_SIZE` urls, and only the (few) site specific rules are
+    checked again when a url recurs on another site.
+
+    Only network rules are used. The type of a recorded request is not known,
+    so request type options are ignored, and rules that only apply to first
+    party requests or whole pages (`$document`, `$popup`, ...) are dropped.
+
+    Parameters
+    ----------
+    lines: Iterable[str]
+        The lines of the filter list.
+    """
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        rules: List[List[Tuple[str, NetworkFilter]]] = [[] for _ in range(6)]
+        for line in lines:
+            parsed = _parse_rule(line)
+            if parsed is not None:
+                exception, pattern, network_filter = parsed
+                kind = _ALLOW if exception else _BLOCK
+                if network_filter.include_domains or network_filter.exclude_domains:
+                    kind += 1
+                rules[kind].append((pattern, network_filter))
+                if network_filter.important:
+                    rules[kind - _BLOCK + _IMPORTANT].append((pattern, network_filter))
+
+        self._indexes = tuple(_build_index(kind_rules) for kind_rules in rules)
+        self._compiled: Dict[Tuple[int, int], Optional[Pattern]] = {}
+        self._matches: "OrderedDict[str, _UrlMatch]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(index.rules) for index in self._indexes)
+
+    def __getstate__(self) -> Dict:
+        # Compiled regexes and remembered urls are rebuilt on use rather than
+        # pickled
+        return {"_indexes": self._indexes}
+
+    def __setstate__(self, state: Dict) -> None:
+        self._indexes = state["_indexes"]
+        self._compiled = {}
+        self._matches = OrderedDict()
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Union[str, Path],
+        cache: Optional[Union[str, Path]] = None,
+    ) -> "FilterMatcher":
+        """
+        Load and compile a filter list file.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            The path to the filter list.
+        cache: Optional[Union[str, Path]]
+            An optional file to store the compiled matcher in. It is reused
+            while the filter list content is unchanged, which skips parsing the
+            list on later runs.
+            Default: None (always compile the list)
+
+        Returns
+        -------
+        matcher: FilterMatcher
+            The compiled filter list.
+        """
+        path = Path(path)
+        key = None
+        if cache is not None:
+            cache = Path(cache)
+            key = f"{MATCHER_CACHE_VERSION}-{file_digest(path)}"
+            if cache.exists():
+                try:
+                    with open(cache, "rb") as open_f:
+                        cached_key, matcher = pickle.load(open_f)
+                    if cached_key == key:
+                        return matcher
+                except Exception:
+                    log.warning(f"Ignoring unreadable filter list cache: {cache}")
+
+        with open(path, "r", encoding="utf-8") as open_f:
+            matcher = cls(open_f)
+
+        if cache is not None:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache, "wb") as open_f:
+                pickle.dump((key, matcher), open_f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return matcher
+
+    def _regex(self, kind: int, rule_id: int, rule: NetworkFilter) -> Optional[Pattern]:
+        key = (kind, rule_id)
+        if key not in self._compiled:
+            try:
+                self._compiled[key] = re.compile(
+                    rule.regex, 0 if rule.match_case else re.I
+                )
+            except re.error:
+                # Regex rules in a syntax Python does not support never match
+                self._compiled[key] = None
+        return self._compiled[key]
+
+    def _find(
+        self,
+        kind: int,
+        url: str,
+        lowered: str,
+        host_suffixes: Sequence[str],
+        tokens: FrozenSet[str],
+        host_end: int,
+        source_suffixes: Sequence[str],
+    ) -> Optional[NetworkFilter]:
+        index = self._indexes[kind]
+        if not index.rules:
+            return None
+        for suffix in index.hosts.intersection(host_suffixes):
+            for rest, separator_end, rule_id in index.by_host_rest.get(suffix, ()):
+                if lowered.startswith(rest, host_end) and (
+                    not separator_end
+                    or _separator_at(lowered, host_end + len(rest))
+                ):
+                    return index.rules[rule_id]
+
+        keys = tokens & index.tokens
+        for token in keys:
+            groups = index.by_token_literal.get(token)
+            if groups is None:
+                continue
+            for literal, rule_id in groups.get("", ()):
+                if literal in lowered:
+                    return index.rules[rule_id]
+            for second in tokens.intersection(groups):
+                for literal, rule_id in groups[second]:
+                    if literal in lowered:
+                        return index.rules[rule_id]
+
+        candidates: List[int] = []
+        for suffix in index.hosts.intersection(host_suffixes):
+            candidates.extend(index.by_host.get(suffix, ()))
+        for token in keys:
+            groups = index.by_token.get(token)
+            if groups is None:
+                continue
+            candidates.extend(groups.get("", ()))
+            for second in tokens.intersection(groups):
+                candidates.extend(groups[second])
+        for suffix in index.sources.intersection(source_suffixes):
+            candidates.extend(index.by_source[suffix])
+        candidates.extend(index.unindexed)
+
+        for rule_id in candidates:
+            rule = index.rules[rule_id]
+            if rule.include_domains and rule.include_domains.isdisjoint(
+                source_suffixes
+            ):
+                continue
+            if rule.exclude_domains and not rule.exclude_domains.isdisjoint(
+                source_suffixes
+            ):
+                continue
+            if rule.literal is not None:
+                target = url if rule.match_case else lowered
+                if rule.anchor_start and rule.anchor_end:
+                    found = target == rule.literal
+                elif rule.anchor_start:
+                    found = target.startswith(rule.literal)
+                elif rule.anchor_end:
+                    found = target.endswith(rule.literal)
+                else:
+                    found = rule.literal in target
+                if found:
+                    return rule
+                continue
+            regex = self._regex(kind, rule_id, rule)
+            if regex is not None and regex.search(url):
+                return rule
+
+        return None
+
+    def match(self, url: str, source_host: Optional[str] = None) -> Optional[str]:
+        """
+        Find the rule that blocks a third party request url.
+
+        Parameters
+        ----------
+        url: str
+            The full request url.
+        source_host: Optional[str]
+            The host of the page that made the request, used for rules limited
+            to (or excluding) some sites with `$domain=`. Rules with a domain
+            option never match when this is None.
+            Default: None
+
+        Returns
+        -------
+        rule: Optional[str]
+            The text of the blocking rule, or None if the request is not
+            blocked (no rule matches, or an exception rule also matches).
+        """
+        lowered, host_suffixes, tokens, host_end = _parse_url(url)
+        url_match = self._match_url(url, lowered, host_suffixes, tokens, host_end)
+        source_suffixes = (
+            () if source_host is None else _host_suffixes(source_host.lower())
+        )
+        find_args = (url, lowered, host_suffixes, tokens, host_end, source_suffixes)
+
+        blocked = url_match.blocked
+        if blocked is None:
+            blocked = self._find(_BLOCK_DOMAIN, *find_args)
+            if blocked is None:
+                return None
+        if url_match.allowed or self._find(_ALLOW_DOMAIN, *find_args):
+            important = self._find(_IMPORTANT, *find_args) or self._find(
+                _IMPORTANT_DOMAIN, *find_args
+            )
+            return None if important is None else important.text
+
+        return blocked.text
+
+    def _match_url(
+        self,
+        url: str,
+        lowered: str,
+        host_suffixes: Sequence[str],
+        tokens: FrozenSet[str],
+        host_end: int,
+    ) -> _UrlMatch:
+        # The verdicts of the rules for every site, remembered for the most
+        # recently matched urls
+        url_match = self._matches.get(url)
+        if url_match is not None:
+            self._matches.move_to_end(url)
+            return url_match
+
+        find_args = (url, lowered, host_suffixes, tokens, host_end, ())
+        url_match = _UrlMatch(
+            blocked=self._find(_BLOCK, *find_args),
+            allowed=self._find(_ALLOW, *find_args) is not None,
+        )
+
+        self._matches[url] = url_match
+        if len(self._matches) > MATCH_CACHE_SIZE:
+            self._matches.popitem(last=False)
+        return url_match
+
+
+@instrumentation.timed("load_blocklists")
+def load_blocklists(
+    names: Sequence[str] = ("easylist", "easyprivacy"),
+    blocklists_dir: Union[str, Path] = ACCESS_EVAL_2022_BLOCKLISTS,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Dict[str, FilterMatcher]:
+    """
+    Load and compile the filter lists shipped in `data/blocklists`.
+
+    Parameters
+    ----------
+    names: Sequence[str]
+        The filter lists to load, by file name without the `.txt` suffix.
+        Default: ("easylist", "easyprivacy")
+    blocklists_dir: Union[str, Path]
+        The directory holding the filter lists.
+        Default: The repository's `data/blocklists` directory.
+    cache_dir: Optional[Union[str, Path]]
+        An optional directory to store compiled matchers in, see
+        `FilterMatcher.from_file`.
+        Default: None (always compile the lists)
+
+    Returns
+    -------
+    matchers: Dict[str, FilterMatcher]
+        The compiled matcher for each list name.
+    """
+    blocklists_dir = Path(blocklists_dir)
+    return {
+        name: FilterMatcher.from_file(
+            blocklists_dir / f"{name}.txt",
+            cache=None if cache_dir is None else Path(cache_dir) / f"{name}.pickle",
+        )
+        for name in names
+    }
+
+
+def count_blocked_requests(
+    urls: Iterable[Optional[str]],
+    matchers: Dict[str, FilterMatcher],
+    source_host: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Count how many request urls each filter list blocks.
+
+    Parameters
+    ----------
+    urls: Iterable[Optional[str]]
+        The third party request urls. None entries are skipped.
+    matchers: Dict[str, FilterMatcher]
+        The compiled filter lists, by name.
+    source_host: Optional[str]
+        The host of the page that made the requests.
+        Default: None
+
+    Returns
+    -------
+    counts: Dict[str, int]
+        The number of blocked urls for each list name.
+    """
+    counts = {name: 0 for name in matchers}
+    for url in urls:
+        if url is None:
+            continue
+        for name, matcher in matchers.items():
+            if matcher.match(url, source_host) is not None:
+                counts[name] += 1
+
+    return counts
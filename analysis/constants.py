@@ -2,4 +2,4 @@
 # -*- coding: utf-8 -*-
 
 SINGLE_PAGE_AXE_RESULTS_FILENAME = "inspection.json"
-
+SINGLE_PAGE_EVENT_LOG_FILENAME = "inspection-log.ndjson"
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from pathlib import Path
-from typing import Callable, NamedTuple
+from typing import Callable, Dict, Iterable, NamedTuple
 
 ###############################################################################
 
@@ -11,13 +11,35 @@ ACCESS_EVAL_2022_STUDY_REPORTS = Path(__file__).parent / "reports_2022"
 ACCESS_EVAL_2022_STUDY_DATA = Path(__file__).parent / "data_2022"
 
 ACCESS_EVAL_2022_ELECTION_RESULTS = ACCESS_EVAL_2022_STUDY_DATA / "public_lib_purpose.csv"
+ACCESS_EVAL_2022_PUBLIC_LIBRARIES = ACCESS_EVAL_2022_STUDY_DATA / "public_library.csv"
 ACCESS_EVAL_2022_EVALS_ZIP = (
     ACCESS_EVAL_2022_STUDY_REPORTS / "Homepage.zip"
 )
 
 ACCESS_EVAL_2022_EVALS_UNPACKED = Path("unpacked-eval-results")
+ACCESS_EVAL_2022_RESULTS_CACHE = Path("eval-results-cache.sqlite")
+ACCESS_EVAL_2022_SCAN_RESULTS = Path("scan-results")
+ACCESS_EVAL_2022_COLLECTOR = Path(__file__).parent.parent / "example.js"
+
+PLOTTING_DIR = Path("plots/").resolve()
 
 ACCESS_EVAL_2022_DATASET = ACCESS_EVAL_2022_STUDY_DATA / "public_lib_purpose_total.csv"
+ACCESS_EVAL_2022_DATASET_PARQUET = ACCESS_EVAL_2022_DATASET.with_suffix(".parquet")
+ACCESS_EVAL_2022_VENDOR_NAMES = ACCESS_EVAL_2022_STUDY_DATA / "vendor_names.csv"
+ACCESS_EVAL_2022_HOST_MATRIX = (
+    ACCESS_EVAL_2022_STUDY_DATA / "public_lib_purpose_hosts.npz"
+)
+
+ACCESS_EVAL_2022_DISCONNECT_SERVICES = ACCESS_EVAL_2022_STUDY_DATA / "services.json"
+ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST = (
+    ACCESS_EVAL_2022_STUDY_DATA / "public_suffix_list.dat"
+)
+ACCESS_EVAL_2022_BLOCKLISTS = Path(__file__).parent.parent / "data" / "blocklists"
+ACCESS_EVAL_2022_BLOCKLIST_CACHE = Path("blocklist-cache")
+ACCESS_EVAL_2022_DOMAIN_OWNERS = (
+    Path(__file__).parent.parent / "data" / "webxray" / "domain_owners.json"
+)
+
 ###############################################################################
 
 
@@ -120,6 +142,36 @@ class DatasetFields:
     - "300"
     """
 
+    easylist_blocked_requests_homepage = "easylist_blocked_requests_homepage"
+    easyprivacy_blocked_requests_homepage = "easyprivacy_blocked_requests_homepage"
+    easylist_blocked_requests_catalog = "easylist_blocked_requests_catalog"
+    easyprivacy_blocked_requests_catalog = "easyprivacy_blocked_requests_catalog"
+    """
+    int: The count of recorded third party tracker request urls that the
+    EasyList or EasyPrivacy filter list blocks
+
+    Examples
+    --------
+    - "3"
+    - "12"
+    """
+
+    easylist_blocked_hosts_homepage = "easylist_blocked_hosts_homepage"
+    easyprivacy_blocked_hosts_homepage = "easyprivacy_blocked_hosts_homepage"
+    easylist_blocked_hosts_catalog = "easylist_blocked_hosts_catalog"
+    easyprivacy_blocked_hosts_catalog = "easyprivacy_blocked_hosts_catalog"
+    """
+    int: The count of distinct third party hosts whose root url
+    ("https://<host>/", requested from the library's page) the EasyList or
+    EasyPrivacy filter list blocks. This classifies hosts, not requests:
+    rules that only match a path on a host do not count it.
+
+    Examples
+    --------
+    - "2"
+    - "9"
+    """
+
     current_automation = "Current Automation System Name"
     discovery_interface = "Discovery Interface Name"
     item_ID = "Item ID Type Name"
@@ -132,4 +184,86 @@ class DatasetFields:
     --------
     - "Polaris"
     - "PLUS"
-    """
\ No newline at end of file
+    """
+
+
+###############################################################################
+# Storage types for the dataset columns, used to write and read a typed
+# columnar (Parquet) copy of the dataset instead of re-inferring CSV types
+
+VENDOR_NAME_SUFFIX = " Name"
+VENDOR_YEAR_SUFFIX = " Year"
+
+CATEGORY_FIELDS = [
+    DatasetFields.state,
+    DatasetFields.location,
+]
+
+COUNT_FIELDS = [
+    DatasetFields.number_of_total_trackers_homepage,
+    DatasetFields.behaviour_event_listeners_homepage,
+    DatasetFields.canvas_fingerprinters_homepage,
+    DatasetFields.canvas_font_fingerprinters_homepage,
+    DatasetFields.cookies_homepage,
+    DatasetFields.fb_pixel_events_homepage,
+    DatasetFields.key_logging_homepage,
+    DatasetFields.session_recorders_homepage,
+    DatasetFields.third_party_trackers_homepage,
+    DatasetFields.google_homepage,
+    DatasetFields.google_analytics_homepage,
+    DatasetFields.facebook_homepage,
+    DatasetFields.easylist_blocked_requests_homepage,
+    DatasetFields.easyprivacy_blocked_requests_homepage,
+    DatasetFields.easylist_blocked_hosts_homepage,
+    DatasetFields.easyprivacy_blocked_hosts_homepage,
+    DatasetFields.number_of_total_trackers_catalog,
+    DatasetFields.behaviour_event_listeners_catalog,
+    DatasetFields.canvas_fingerprinters_catalog,
+    DatasetFields.canvas_font_fingerprinters_catalog,
+    DatasetFields.cookies_catalog,
+    DatasetFields.fb_pixel_events_catalog,
+    DatasetFields.key_logging_catalog,
+    DatasetFields.session_recorders_catalog,
+    DatasetFields.third_party_trackers_catalog,
+    DatasetFields.google_catalog,
+    DatasetFields.google_analytics_catalog,
+    DatasetFields.facebook_catalog,
+    DatasetFields.easylist_blocked_requests_catalog,
+    DatasetFields.easyprivacy_blocked_requests_catalog,
+    DatasetFields.easylist_blocked_hosts_catalog,
+    DatasetFields.easyprivacy_blocked_hosts_catalog,
+]
+
+# The same counts before they are suffixed with the page they were gathered on
+COUNT_FIELDS.extend(sorted({field.rsplit("_", 1)[0] for field in COUNT_FIELDS}))
+
+
+def get_dataset_dtypes(columns: Iterable[str]) -> Dict[str, str]:
+    """
+    Get the storage dtype for each known dataset column.
+
+    Vendor name columns and the location columns are stored as categoricals,
+    vendor years as nullable 16 bit unsigned ints, and tracker counts as
+    nullable 32 bit unsigned ints (sites without results have no counts).
+    Other columns are not included and keep their inferred type.
+
+    Parameters
+    ----------
+    columns: Iterable[str]
+        The dataset columns.
+
+    Returns
+    -------
+    dtypes: Dict[str, str]
+        The pandas dtype name for each known column.
+    """
+    dtypes = {}
+    for col in columns:
+        if col in CATEGORY_FIELDS or col.endswith(VENDOR_NAME_SUFFIX):
+            dtypes[col] = "category"
+        elif col.endswith(VENDOR_YEAR_SUFFIX):
+            dtypes[col] = "UInt16"
+        elif col in COUNT_FIELDS:
+            dtypes[col] = "UInt32"
+
+    return dtypes
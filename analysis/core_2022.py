@@ -3,188 +3,198 @@
 
 import json
 import logging
-import re
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Set, Union
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
-import numpy as np
 import pandas as pd
-from dataclasses_json import dataclass_json
-from scipy import stats as sci_stats
-from tqdm import tqdm
 
+import instrumentation
+from blocklists import FilterMatcher, count_blocked_requests, load_blocklists
 from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
-from utils import clean_url
+from inspection import InspectionSummary, read_inspection_summary
+from public_suffix import registrable_domain
+from results_archive import ArchivedSite
+from result_cache import SiteResultCache, file_digest
+from utils_2022 import find_site_results, merge_site_metrics, process_sites
+from vendor_names import canonicalize_vendor_columns, load_vendor_name_map
 from constants_2022 import (
+    ACCESS_EVAL_2022_BLOCKLISTS,
     ACCESS_EVAL_2022_DATASET,
+    ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST,
+    ACCESS_EVAL_2022_VENDOR_NAMES,
     DatasetFields,
+    get_dataset_dtypes,
 )
 
 ###############################################################################
 
 log = logging.getLogger(__name__)
 
+# Bump when the per-site metrics change so cached results are recomputed
+RESULT_CACHE_VERSION = "5"
+
+# The filter lists third party requests are classified with
+BLOCKLIST_NAMES = ("easylist", "easyprivacy")
+
+# Reports whose size is the total size of their sub-reports
+SUMMED_REPORTS = [
+    "canvas_fingerprinters",
+    "canvas_font_fingerprinters",
+    "behaviour_event_listeners",
+]
+
 ###############################################################################
 
-@dataclass_json
-@dataclass
-class RunningMetrics:
-    behaviour_event_listeners: int = 0
-    canvas_fingerprinters: int = 0
-    canvas_font_fingerprinters: int = 0
-    cookies: int = 0
-    fb_pixel_events: int = 0
-    key_logging: int = 0
-    session_recorders: int = 0
-    third_party_trackers: int = 0
-    google: int = 0
-    google_analytics: int = 0
-    facebook: int = 0
-
-    def reset(self):
-        self.behaviour_event_listeners = 0
-        self.canvas_fingerprinters = 0
-        self.canvas_font_fingerprinters = 0
-        self.cookies = 0
-        self.fb_pixel_events = 0
-        self.key_logging = 0
-        self.session_recorders = 0
-        self.third_party_trackers = 0
-        self.google = 0
-        self.google_analytics = 0
-        self.facebook = 0
-
-
-
-@dataclass_json
-@dataclass
-class CompiledMetrics:
-    behaviour_event_listeners: int = 0
-    canvas_fingerprinters: int = 0
-    canvas_font_fingerprinters: int = 0
-    cookies: int = 0
-    fb_pixel_events: int = 0
-    key_logging: int = 0
-    session_recorders: int = 0
-    third_party_trackers: int = 0
-    google: int = 0
-    google_analytics: int = 0
-    facebook: int = 0
+class SiteMetrics:
+    """
+    The tracker counts for a single site.
+
+    A slotted record so each site only stores its counts, in the field order
+    given by `__slots__`. Every count defaults to 0.
+    """
+
+    __slots__ = (
+        "behaviour_event_listeners",
+        "canvas_fingerprinters",
+        "canvas_font_fingerprinters",
+        "cookies",
+        "fb_pixel_events",
+        "key_logging",
+        "session_recorders",
+        "third_party_trackers",
+        "google",
+        "google_analytics",
+        "facebook",
+        "easylist_blocked_requests",
+        "easyprivacy_blocked_requests",
+        "easylist_blocked_hosts",
+        "easyprivacy_blocked_hosts",
+    )
+
+    def __init__(self, **counts: int) -> None:
+        for field in self.__slots__:
+            setattr(self, field, counts.pop(field, 0))
+        if counts:
+            raise TypeError(f"Unknown metrics: {sorted(counts)}")
+
+    def to_dict(self) -> Dict[str, int]:
+        return {field: getattr(self, field) for field in self.__slots__}
 
 
 ###############################################################################
 
+def _metrics_from_summary(
+    summary: InspectionSummary,
+    source_host: str,
+    blocklists: Optional[Dict[str, FilterMatcher]] = None,
+) -> SiteMetrics:
+    # Count a site's trackers from its inspection summary
+    metrics = SiteMetrics()
+    if summary.report_sizes is None:
+        raise KeyError("reports")
+    for key, size in summary.report_sizes.items():
+        if key in SiteMetrics.__slots__:
+            setattr(metrics, key, size)
+    
+    if summary.third_party_tracker_urls is None:
+        raise KeyError("third_party_trackers")
+    for url in summary.third_party_tracker_urls:
+        # Bucket by the tracker's registrable domain, not the whole url
+        host = urlsplit(url).hostname or url
+        domain = registrable_domain(host) or host
+        if "google-analytics" in domain:
+            metrics.google_analytics += 1
+            metrics.google += 1
+        elif "google" in domain:
+            metrics.google += 1
+        elif "facebook" in domain:
+            metrics.facebook += 1
+
+    if blocklists:
+        # The inspection has no full request log. Requests are the recorded
+        # tracker request urls, and hosts are classified separately by the
+        # root url of each distinct third party host.
+        host_urls = [
+            f"https://{host}/"
+            for host in dict.fromkeys(summary.third_party_hosts or [])
+            if host
+        ]
+        with instrumentation.stage("blocklist_matching"):
+            blocked_requests = count_blocked_requests(
+                summary.third_party_tracker_urls,
+                blocklists,
+                source_host=source_host,
+            )
+            blocked_hosts = count_blocked_requests(
+                host_urls, blocklists, source_host=source_host
+            )
+        instrumentation.count(
+            "requests_classified",
+            len(summary.third_party_tracker_urls) + len(host_urls),
+        )
+        for name in blocklists:
+            setattr(metrics, f"{name}_blocked_requests", blocked_requests[name])
+            setattr(metrics, f"{name}_blocked_hosts", blocked_hosts[name])
+
+    return metrics
+
+
 def _recurse_axe_results(
-    axe_results_dir: Path,
-    metrics: RunningMetrics,
-) -> RunningMetrics:
+    axe_results_dir: Union[Path, ArchivedSite],
+    blocklists: Optional[Dict[str, FilterMatcher]] = None,
+) -> SiteMetrics:
 
     # Get this dirs result file
     this_dir_results = axe_results_dir / SINGLE_PAGE_AXE_RESULTS_FILENAME
     
-    metrics = RunningMetrics()
-    metrics.reset()
+    metrics = SiteMetrics()
     if this_dir_results.exists():
-        with open(this_dir_results, "r") as open_f:
-            this_dir_loaded_results = json.load(open_f)
-
         # get the number of different trackers
-        sec_layer = ["canvas_fingerprinters", "canvas_font_fingerprinters", "behaviour_event_listeners"]
-        for key in this_dir_loaded_results['reports'].keys():
-            if key in sec_layer:
-                for sub_key in this_dir_loaded_results['reports'][key].keys():
-                    current_count = getattr(metrics, key)
-                    setattr(
-                        metrics,
-                        key,
-                        current_count + 
-                        len(this_dir_loaded_results['reports'][key][sub_key]),
-                    )
-            else:
-                setattr(
-                    metrics,
-                    key,
-                    len(this_dir_loaded_results['reports'][key]),
-                )
-        
-        tracker_num = len(this_dir_loaded_results['reports']["third_party_trackers"])
-        for i in range(0, tracker_num):
-            if "google-analytics" in this_dir_loaded_results['reports']["third_party_trackers"][i]['url']:
-                current_count = getattr(metrics, "google_analytics")
-                setattr(
-                    metrics,
-                    "google_analytics",
-                    current_count + 1,
-                )
-                current_count = getattr(metrics, "google")
-                setattr(
-                    metrics,
-                    "google",
-                    current_count + 1,
-                )
-            elif "google" in this_dir_loaded_results['reports']["third_party_trackers"][i]['url']:
-                current_count = getattr(metrics, "google")
-                setattr(
-                    metrics,
-                    "google",
-                    current_count + 1,
-                )
-            elif "facebook" in this_dir_loaded_results['reports']["third_party_trackers"][i]['url']:
-                current_count = getattr(metrics, "facebook")
-                setattr(
-                    metrics,
-                    "facebook",
-                    current_count + 1,
-                )
+        summary = read_inspection_summary(
+            this_dir_results, summed_reports=SUMMED_REPORTS
+        )
+        metrics = _metrics_from_summary(
+            summary, axe_results_dir.name, blocklists
+        )
     
     return metrics
 
 
 def process_axe_evaluations_and_extras(
-    axe_results_dir: Union[str, Path],
-) -> CompiledMetrics:
+    axe_results_dir: Union[str, Path, ArchivedSite],
+    blocklists: Optional[Dict[str, FilterMatcher]] = None,
+) -> SiteMetrics:
     """
     Process all blacklight evaluations 
 
     Parameters
     ----------
-    axe_results_dir: Union[str, Path]
+    axe_results_dir: Union[str, Path, ArchivedSite]
         The directory for a specific website that has been processed using the blacklight
-        scraper.
+        scraper, on disk or in a results archive.
+    blocklists: Optional[Dict[str, FilterMatcher]]
+        Compiled filter lists, by name, to count the site's blocked third
+        party requests with. See `blocklists.load_blocklists`.
+        Default: None (leave the blocked request counts at 0)
 
     Returns
     -------
-    metrics: CompiledMetrics
+    metrics: SiteMetrics
         The counts of all trackers types
     """
     # Handle path and dir checking
-    axe_results_dir = Path(axe_results_dir).resolve(strict=True)
+    if not isinstance(axe_results_dir, ArchivedSite):
+        axe_results_dir = Path(axe_results_dir).resolve(strict=True)
     if not axe_results_dir.is_dir():
         raise NotADirectoryError(axe_results_dir)
 
     # Process
-    parsed_metrics = _recurse_axe_results(
-        axe_results_dir, RunningMetrics
-    )
-
-    return CompiledMetrics(
-        behaviour_event_listeners = parsed_metrics.behaviour_event_listeners,
-        canvas_fingerprinters = parsed_metrics.canvas_fingerprinters,
-        canvas_font_fingerprinters = parsed_metrics.canvas_font_fingerprinters,
-        cookies = parsed_metrics.cookies,
-        fb_pixel_events = parsed_metrics.fb_pixel_events,
-        key_logging = parsed_metrics.key_logging,
-        session_recorders = parsed_metrics.session_recorders,
-        third_party_trackers = parsed_metrics.third_party_trackers,
-        google = parsed_metrics.google,
-        google_analytics = parsed_metrics.google_analytics,
-        facebook = parsed_metrics.facebook
-    )
+    return _recurse_axe_results(axe_results_dir, blocklists)
 
 
 def _convert_metrics_to_expanded_data(
-    metrics: CompiledMetrics,
+    metrics: SiteMetrics,
 ) -> Dict[str, int]:
 
     return {
@@ -207,13 +217,37 @@ def _convert_metrics_to_expanded_data(
         f"third_party_trackers": metrics.third_party_trackers,
         f"google": metrics.google,
         f"google_analytics": metrics.google_analytics,
-        f"facebook": metrics.facebook
+        f"facebook": metrics.facebook,
+        f"easylist_blocked_requests": metrics.easylist_blocked_requests,
+        f"easyprivacy_blocked_requests": metrics.easyprivacy_blocked_requests,
+        f"easylist_blocked_hosts": metrics.easylist_blocked_hosts,
+        f"easyprivacy_blocked_hosts": metrics.easyprivacy_blocked_hosts,
     }
 
 
+# The compiled filter lists, set once per worker process by `_init_worker`
+_WORKER_BLOCKLISTS: Optional[Dict[str, FilterMatcher]] = None
+
+
+def _init_worker(blocklists: Dict[str, FilterMatcher]) -> None:
+    global _WORKER_BLOCKLISTS
+    _WORKER_BLOCKLISTS = blocklists
+
+
+def _process_site(access_eval: Union[Path, ArchivedSite]) -> Dict[str, int]:
+    # Run metric generation for a single site, safe to run in a worker process
+    return _convert_metrics_to_expanded_data(
+        process_axe_evaluations_and_extras(access_eval, _WORKER_BLOCKLISTS),
+    )
+
+
 def combine_library_data_with_axe_results(
     library_data: Union[str, Path, pd.DataFrame],
     lib_scraping_results: Union[str, Path],
+    workers: Optional[int] = 1,
+    cache: Optional[Union[str, Path]] = None,
+    use_mmap: bool = False,
+    blocklist_cache: Optional[Union[str, Path]] = None,
 ) -> pd.DataFrame:
     """
     Combine library data CSV (or in memory DataFrame) with the blacklight results for each
@@ -228,7 +262,25 @@ def combine_library_data_with_axe_results(
         library.
     lib_scraping_results: Union[str, Path]
         The path to the directory that contains sub-directories for each library
-        website's blacklight results. 
+        website's blacklight results, or to a zip archive with the same layout.
+        Archives are read in place without unpacking.
+    workers: Optional[int]
+        The number of processes to use for site processing. The compiled
+        filter lists are sent to each worker once.
+        Default: 1 (process every site in the current process)
+        None uses every available core.
+    cache: Optional[Union[str, Path]]
+        An optional SQLite file used to cache per-site metrics between runs.
+        Sites whose `inspection.json` is unchanged reuse their cached metrics.
+        Default: None (compute every site)
+    use_mmap: bool
+        Memory map the results archive for random access to its members.
+        Only used when `lib_scraping_results` is a zip archive.
+        Default: False
+    blocklist_cache: Optional[Union[str, Path]]
+        An optional directory to store the compiled EasyList and EasyPrivacy
+        matchers in, so later runs skip compiling the lists.
+        Default: None (compile the lists every run)
 
     Returns
     -------
@@ -240,87 +292,136 @@ def combine_library_data_with_axe_results(
     I.e. in the spreadsheet the value is `https://website.org` but the associated
     directory should be: `data/website.org`
     """
-    # Confirm paths
-    lib_scraping_results = Path(lib_scraping_results).resolve(
-        strict=True
-    )
-
     if isinstance(library_data, (str, Path)):
         library_data = Path(library_data).resolve(strict=True)
         library_data = pd.read_csv(library_data)
 
-    # Confirm axe scraping results is dir
-    if not lib_scraping_results.is_dir():
-        raise NotADirectoryError(lib_scraping_results)
-
-    # Iter election data and create List of expanded dicts with added
-    expanded_data = []
-    for _, row in tqdm(library_data.iterrows()):
-        if isinstance(row[DatasetFields.catalog_url], str):
-            cleaned_url = clean_url(row[DatasetFields.catalog_url])
-            access_eval = lib_scraping_results / cleaned_url
-        else:
-            access_eval = None
-
-        # if not access_eval == None:
-        if access_eval != None and access_eval.exists():
-            # Run metric generation
-            access_eval_metrics = process_axe_evaluations_and_extras(
-                access_eval,
-            )
+    # Compile the filter lists once for all sites
+    blocklists = load_blocklists(BLOCKLIST_NAMES, cache_dir=blocklist_cache)
+
+    # Find the result directory for each row
+    sites = find_site_results(
+        library_data[DatasetFields.catalog_url],
+        lib_scraping_results,
+        use_mmap=use_mmap,
+    )
 
-            # Combine and merge to expanded data
-            expanded_data.append(
-                {
-                    # Original row details
-                    **row,
-                    # axe-report
-                    **_convert_metrics_to_expanded_data(
-                        access_eval_metrics,
+    # Run metric generation
+    site_cache = None
+    if cache is not None:
+        # Results also depend on the public suffix list and filter lists in use
+        site_cache = SiteResultCache(
+            cache,
+            "core_2022",
+            "-".join(
+                [
+                    RESULT_CACHE_VERSION,
+                    file_digest(ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST),
+                    *(
+                        file_digest(ACCESS_EVAL_2022_BLOCKLISTS / f"{name}.txt")
+                        for name in BLOCKLIST_NAMES
                     ),
-                }
-            )
-        else:
-            row.catalog_url = None
-            expanded_data.append(
-                {
-                    # Original row details with unworking links removed
-                    **row,
-                }
-            )
+                ]
+            ),
+        )
+    site_metrics = process_sites(
+        _process_site,
+        sites,
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(blocklists,),
+        cache=site_cache,
+    )
+    if site_cache is not None:
+        site_cache.close()
+
+    # Join the metrics onto the library data by cleaned url
+    full_data = merge_site_metrics(
+        library_data,
+        DatasetFields.catalog_url,
+        site_metrics,
+        dtype="UInt32",
+    )
 
     log.info(
-        f"Dropped {len(library_data) - len(expanded_data)} rows from dataset "
-        f"because they were missing a result directory."
+        f"{sum(metrics is None for metrics in site_metrics)} rows from dataset "
+        f"have no metrics because they were missing a result directory."
     )
-    return pd.DataFrame(expanded_data)
+    return full_data
+
+
+def _nested_to_json(data: pd.DataFrame) -> pd.DataFrame:
+    # A shallow copy with the lists and dicts (Disconnect hosts and owner
+    # counts) of object columns as JSON text, which both formats store as is
+    columns = {}
+    for col in data.columns[data.dtypes == object]:
+        values = data[col]
+        nested = values.map(lambda value: isinstance(value, (dict, list, tuple)))
+        if nested.any():
+            columns[col] = values.where(
+                ~nested, values[nested].map(json.dumps)
+            )
+    return data.assign(**columns) if columns else data
 
 
-def load_access_eval_2022_dataset(
-    path: Optional[Union[str, Path]] = None
-) -> pd.DataFrame:
+@instrumentation.timed("store_dataset")
+def store_access_eval_2022_dataset(
+    data: pd.DataFrame,
+    path: Optional[Union[str, Path]] = None,
+) -> Path:
     """
-    Load the default access eval 2022 dataset or a provided custom dataset
-    and add all computed fields.
+    Store the combined dataset as CSV or as a typed Parquet file.
+
+    Parquet output stores vendor names and locations as categoricals, and
+    vendor years and tracker counts as nullable small ints, so loading it
+    needs no type inference and can read only the columns a plot needs.
+
+    In both formats the lists of hosts and the owner counts are stored as
+    JSON text (read them with `json.loads`), so CSV and Parquet loads of the
+    same dataset hold the same values.
 
     Parameters
     ----------
+    data: pd.DataFrame
+        The combined dataset.
     path: Optional[Union[str, Path]]
-        An optional path for custom data to load.
-        Default: None (load official 2022 access eval dataset)
+        Where to store the dataset. Paths ending in `.parquet` are stored as
+        Parquet, anything else as CSV.
+        Default: None (the official 2022 access eval dataset CSV)
 
     Returns
     -------
-    data: pd.DataFrame
-        The loaded dataframe object with all extra computed fields added.
+    path: Path
+        The path the dataset was stored to.
     """
-
     if path is None:
         path = ACCESS_EVAL_2022_DATASET
+    path = Path(path)
 
-    # Load base data
-    data = pd.read_csv(ACCESS_EVAL_2022_DATASET)
-    
+    data = _nested_to_json(data)
+    if path.suffix == ".parquet":
+        data.astype(get_dataset_dtypes(data.columns)).to_parquet(path, index=False)
+    else:
+        data.to_csv(path, index=False)
+
+    return path
+
+
+def _find_dataset_file(path: Optional[Union[str, Path]]) -> Path:
+    # Use the Parquet copy next to a CSV dataset when it is at least as new
+    path = Path(ACCESS_EVAL_2022_DATASET if path is None else path)
+    if path.suffix == ".parquet":
+        return path.resolve(strict=True)
+
+    fast_path = path.with_suffix(".parquet")
+    if fast_path.exists() and (
+        not path.exists() or fast_path.stat().st_mtime >= path.stat().st_mtime
+    ):
+        return fast_path.resolve(strict=True)
+    return path.resolve(strict=True)
+
+
+def _add_computed_fields(data: pd.DataFrame, vendor_names: Path) -> pd.DataFrame:
     # Replace the NaN with 0 
     for col in data.columns:
         if "error-type_" in col:
@@ -341,4 +442,126 @@ def load_access_eval_2022_dataset(
         # Norm
         data[avg_error_type_col_name] = data[common_error_col] / data[norm_col]
 
-    return data
\ No newline at end of file
+    # The stored dataset keeps the raw vendor names. Apply the (read only)
+    # vendor name table here, so hand edits to it are used without generating
+    # the dataset again.
+    with instrumentation.stage("canonicalize_vendors"):
+        canonicalize_vendor_columns(data, load_vendor_name_map(vendor_names))
+
+    return data
+
+
+def _dataset_file_key(path: Path) -> Tuple[str, int, int]:
+    # A missing file (e.g. a vendor name table not generated yet) has no
+    # modification time or size
+    if not path.exists():
+        return (str(path), -1, -1)
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _select_columns(
+    data: pd.DataFrame, columns: Optional[List[str]]
+) -> pd.DataFrame:
+    # A shallow copy of the requested columns and the fields computed from them
+    if columns is None:
+        return data.copy(deep=False)
+    computed = [
+        col
+        for col in (f"avg_{col}_per_page" for col in columns)
+        if col in data.columns
+    ]
+    return data[[*columns, *computed]].copy(deep=False)
+
+
+# Loaded datasets by (resolved path, mtime, size) of the dataset and of its
+# vendor name table, and the loaded columns (None for every column), shared by
+# every call to `load_access_eval_2022_dataset`
+_LOADED_DATASETS: Dict[
+    Tuple[Tuple[str, int, int], Tuple[str, int, int], Optional[Tuple[str, ...]]],
+    pd.DataFrame,
+] = {}
+
+
+def clear_loaded_datasets() -> None:
+    """
+    Forget every dataset kept by `load_access_eval_2022_dataset`.
+    """
+    _LOADED_DATASETS.clear()
+
+
+@instrumentation.timed("load_dataset")
+def load_access_eval_2022_dataset(
+    path: Optional[Union[str, Path]] = None,
+    columns: Optional[List[str]] = None,
+    vendor_names: Union[str, Path] = ACCESS_EVAL_2022_VENDOR_NAMES,
+) -> pd.DataFrame:
+    """
+    Load the default access eval 2022 dataset or a provided custom dataset
+    and add all computed fields.
+
+    The stored dataset keeps the vendor names as they were scraped. They are
+    replaced with their canonical spelling from the `vendor_names` table
+    (see `vendor_names.canonicalize_vendor_columns`) on load.
+
+    Each file is only parsed once per process: loaded datasets are kept by
+    resolved path, modification time and size (and those of the vendor name
+    table), so a changed file is read again. Column subsets are served from an already loaded full dataset.
+    A typed Parquet copy next to a CSV (stored by the generate CLI, or with
+    `store_access_eval_2022_dataset`) is read instead while it is at least as
+    new as the CSV. Loading never writes any file.
+
+    Parameters
+    ----------
+    path: Optional[Union[str, Path]]
+        An optional path for custom data to load. Paths ending in `.parquet`
+        are read as Parquet, anything else as CSV.
+        Default: None (load official 2022 access eval dataset)
+    columns: Optional[List[str]]
+        Only load these columns.
+        Default: None (load all columns)
+    vendor_names: Union[str, Path]
+        The vendor name mapping table stored when generating the dataset.
+        Default: The table stored in the repository's `data_2022`.
+
+    Returns
+    -------
+    data: pd.DataFrame
+        The loaded dataframe object with all extra computed fields added.
+        This is a shallow copy of the shared dataset, treat its values as read
+        only (adding or replacing columns is safe).
+    """
+    path = _find_dataset_file(path)
+    vendor_names = Path(vendor_names).resolve()
+    file_key = _dataset_file_key(path)
+    vendor_key = _dataset_file_key(vendor_names)
+
+    # Drop datasets loaded from an older version of this file or its table
+    for key in list(_LOADED_DATASETS):
+        if key[0][0] == file_key[0] and key[1][0] == vendor_key[0] and (
+            key[0] != file_key or key[1] != vendor_key
+        ):
+            del _LOADED_DATASETS[key]
+
+    full_data = _LOADED_DATASETS.get((file_key, vendor_key, None))
+    if full_data is not None:
+        return _select_columns(full_data, columns)
+
+    key = (file_key, vendor_key, None if columns is None else tuple(columns))
+    if key in _LOADED_DATASETS:
+        return _LOADED_DATASETS[key].copy(deep=False)
+
+    # Load base data
+    if path.suffix == ".parquet":
+        data = _add_computed_fields(
+            pd.read_parquet(path, columns=columns), vendor_names
+        )
+        _LOADED_DATASETS[key] = data
+        return data.copy(deep=False)
+
+    # Parse the whole CSV once and serve any column subset from it
+    data = pd.read_csv(path)
+    _LOADED_DATASETS[(file_key, vendor_key, None)] = data
+    _add_computed_fields(data, vendor_names)
+
+    return _select_columns(data, columns)
@@ -3,31 +3,36 @@
 
 import json
 import logging
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from dataclasses_json import dataclass_json
 import pandas as pd
 from pathlib import Path
-from typing import Any, Dict, Optional, Set, Union
-from tqdm import tqdm
-
-from typing import List
-from fuzzywuzzy import fuzz
-from fuzzywuzzy import process
+from typing import Dict, List, Optional, Tuple, Union
 
 from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
-from utils import clean_url
+import instrumentation
+from domain_owners import OwnerIndex
+from inspection import InspectionSummary, read_inspection_summary
+from public_suffix import registrable_domain
+from results_archive import ArchivedSite
+from result_cache import SiteResultCache, file_digest
+from utils_2022 import find_site_results, merge_site_metrics, process_sites
 from constants_2022 import (
-    ACCESS_EVAL_2022_STUDY_DATA,
+    ACCESS_EVAL_2022_DISCONNECT_SERVICES,
     ACCESS_EVAL_2022_DATASET,
+    ACCESS_EVAL_2022_DOMAIN_OWNERS,
+    ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST,
     DatasetFields,
 )
 ###############################################################################
 
 log = logging.getLogger(__name__)
 
+# Bump when the per-site metrics change so cached results are recomputed
+RESULT_CACHE_VERSION = "3"
+
 ###############################################################################
 
-@dataclass_json
 @dataclass
 class TrackerMetrics:
     Email: List[str] = field(default_factory=list)
@@ -40,6 +45,7 @@ class TrackerMetrics:
     Social: List[str] = field(default_factory=list)
     Cryptomining: List[str] = field(default_factory=list)
     Disconnect: List[str] = field(default_factory=list)
+    Owners: Dict[str, int] = field(default_factory=dict)
 
     def reset(self):
         self.Email = []
@@ -52,12 +58,173 @@ class TrackerMetrics:
         self.Social = []
         self.Cryptomining = []
         self.Disconnect = []
+        self.Owners = {}
     
 
+class DisconnectIndex:
+    """
+    A compiled, reusable lookup over the Disconnect `services.json` categories.
+
+    Every URL key and domain value in the services file is broken into its
+    suffixes and stored in a single sorted list (a suffix array). Any string
+    that contains a tracker must have a suffix starting with that tracker, so
+    the matches for a tracker are one contiguous range found by binary search
+    instead of a scan over every category, service, URL, and domain.
+
+    Matching keeps the exact substring semantics of the original scan: each
+    occurrence of a matching string in `services.json` yields one
+    `(category, service)` pair, in file order. Results are cached per tracker
+    because the same few hundred hosts recur across all library sites.
+
+    Parameters
+    ----------
+    disconnect_json: Dict
+        The loaded contents of a Disconnect `services.json` file.
+    """
+
+    def __init__(self, disconnect_json: Dict) -> None:
+        # Intern every string the scan would check and record each occurrence
+        # as (position in file order, category, service)
+        string_ids: Dict[str, int] = {}
+        self._occurrences: List[List[Tuple[int, str, str]]] = []
+        position = 0
+        for category, entries in disconnect_json["categories"].items():
+            for entry in entries:
+                for service, value_dict in entry.items():
+                    for url, values in value_dict.items():
+                        # Flags like `"performance": "true"` iterate per char
+                        for value in [url, *values]:
+                            if value not in string_ids:
+                                string_ids[value] = len(self._occurrences)
+                                self._occurrences.append([])
+                            self._occurrences[string_ids[value]].append(
+                                (position, category, service)
+                            )
+                            position += 1
+
+        # Build the sorted suffix array with the owning string of each suffix
+        suffixes = sorted(
+            (value[i:], string_id)
+            for value, string_id in string_ids.items()
+            for i in range(len(value))
+        )
+        self._suffixes: List[str] = [suffix for suffix, _ in suffixes]
+        self._suffix_owners: List[int] = [owner for _, owner in suffixes]
+        self._cache: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+
+    @classmethod
+    @instrumentation.timed("load_disconnect")
+    def from_file(
+        cls,
+        path: Union[str, Path] = ACCESS_EVAL_2022_DISCONNECT_SERVICES,
+    ) -> "DisconnectIndex":
+        """
+        Load and compile a Disconnect `services.json` file.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            The path to the services file.
+            Default: The services file shipped with the 2022 study data.
+
+        Returns
+        -------
+        index: DisconnectIndex
+            The compiled index.
+        """
+        path = Path(path).resolve(strict=True)
+        with open(path, "r") as open_f:
+            return cls(json.load(open_f))
+
+    def lookup(self, tracker: str) -> Tuple[Tuple[str, str], ...]:
+        """
+        Find every `(category, service)` occurrence whose URL or domain
+        contains the tracker.
+
+        Parameters
+        ----------
+        tracker: str
+            The tracker domain to find.
+
+        Returns
+        -------
+        matches: Tuple[Tuple[str, str], ...]
+            One `(category, service)` pair per matching string occurrence in
+            `services.json`, in file order.
+        """
+        if tracker in self._cache:
+            return self._cache[tracker]
+
+        # The empty string is contained in everything
+        if not tracker:
+            matched_ids = range(len(self._occurrences))
+        else:
+            matched_ids = set()
+            i = bisect_left(self._suffixes, tracker)
+            while i < len(self._suffixes) and self._suffixes[i].startswith(
+                tracker
+            ):
+                matched_ids.add(self._suffix_owners[i])
+                i += 1
+
+        matches = tuple(
+            (category, service)
+            for _, category, service in sorted(
+                occurrence
+                for string_id in matched_ids
+                for occurrence in self._occurrences[string_id]
+            )
+        )
+        self._cache[tracker] = matches
+        return matches
+
+
+def _metrics_from_summary(
+    summary: InspectionSummary,
+    disconnect_index: DisconnectIndex,
+    owner_index: Optional[OwnerIndex] = None,
+) -> TrackerMetrics:
+    # Bucket a site's third party hosts into the Disconnect categories
+    metrics = TrackerMetrics()
+    metrics.reset()
+    if summary.third_party_hosts is None:
+        raise KeyError("hosts")
+
+    matched = 0
+    with instrumentation.stage("disconnect_matching"):
+        for track_link in summary.third_party_hosts:
+            # The collector records no host for some requests (e.g. data urls)
+            if not track_link:
+                continue
+            tracker = track_link.replace("www.", "")
+            # Disconnect lists some google.com subdomains separately
+            if ".google.com" not in track_link:
+                tracker = registrable_domain(track_link) or tracker
+            matches = disconnect_index.lookup(tracker)
+            for category, _ in matches:
+                getattr(metrics, category).append(track_link)
+            matched += bool(matches)
+    instrumentation.count("hosts", len(summary.third_party_hosts))
+    instrumentation.count("hosts_matched", matched)
+    metrics.Email, metrics.Content, metrics.Analytics, metrics.FingerprintingGeneral, metrics.Social, metrics.Disconnect = [
+        list(set(val for val in getattr(metrics, attr))) for attr in [
+            'Email', 'Content', 'Analytics', 'FingerprintingGeneral', 'Social', 'Disconnect']]
+
+    # Distinct third party hosts per ultimate parent company
+    if owner_index is not None:
+        with instrumentation.stage("owner_matching"):
+            metrics.Owners = owner_index.count_hosts(
+                filter(None, summary.third_party_hosts)
+            )
+
+    return metrics
+
+
 def _recurse_axe_results(
-    axe_results_dir: Path,
+    axe_results_dir: Union[Path, ArchivedSite],
     metrics: TrackerMetrics,
-    disconnect_json: Dict,
+    disconnect_index: DisconnectIndex,
+    owner_index: Optional[OwnerIndex] = None,
 ) -> TrackerMetrics:
     
     # Get this dirs result file
@@ -66,27 +233,8 @@ def _recurse_axe_results(
     metrics = TrackerMetrics()
     metrics.reset()
     if this_dir_results.exists():
-        with open(this_dir_results, "r") as open_f:
-            this_dir_loaded_results = json.load(open_f)
-
-        for track_link in this_dir_loaded_results['hosts']["requests"]["third_party"]:
-            tracker = track_link.replace("www.", "")
-            if ".google.com" not in track_link:
-                parts = track_link.split(".")
-                if len(parts) >= 3:
-                    tracker = ".".join(parts[-2:])
-            for category, entries in disconnect_json['categories'].items():
-                for entry in entries:
-                    for value_dict in entry.values():
-                        for url, values in value_dict.items():
-                            if tracker in url:
-                                getattr(metrics, category).append(track_link)
-                            for value in values:
-                                if tracker in value:
-                                    getattr(metrics, category).append(track_link)
-        metrics.Email, metrics.Content, metrics.Analytics, metrics.FingerprintingGeneral, metrics.Social, metrics.Disconnect = [
-            list(set(val for val in getattr(metrics, attr))) for attr in [
-                'Email', 'Content', 'Analytics', 'FingerprintingGeneral', 'Social', 'Disconnect']]
+        summary = read_inspection_summary(this_dir_results)
+        metrics = _metrics_from_summary(summary, disconnect_index, owner_index)
     
     return metrics
 
@@ -105,12 +253,47 @@ def _convert_metrics_to_expanded_data(
         f"Social": metrics.Social,
         f"Cryptomining": metrics.Cryptomining,
         f"Disconnect": metrics.Disconnect,
+        f"Owners": metrics.Owners,
     }
 
 
+# The compiled indexes, set once per worker process by `_init_worker`
+_WORKER_DISCONNECT_INDEX: Optional[DisconnectIndex] = None
+_WORKER_OWNER_INDEX: Optional[OwnerIndex] = None
+
+
+def _init_worker(
+    disconnect_index: DisconnectIndex,
+    owner_index: Optional[OwnerIndex] = None,
+) -> None:
+    global _WORKER_DISCONNECT_INDEX, _WORKER_OWNER_INDEX
+    _WORKER_DISCONNECT_INDEX = disconnect_index
+    _WORKER_OWNER_INDEX = owner_index
+
+
+def _process_site(access_eval: Union[Path, ArchivedSite]) -> Dict[str, List[str]]:
+    # Run metric generation for a single site, safe to run in a worker process
+    if not isinstance(access_eval, ArchivedSite):
+        access_eval = Path(access_eval).resolve(strict=True)
+    if not access_eval.is_dir():
+        raise NotADirectoryError(access_eval)
+
+    return _convert_metrics_to_expanded_data(
+        _recurse_axe_results(
+            access_eval,
+            TrackerMetrics,
+            _WORKER_DISCONNECT_INDEX,
+            _WORKER_OWNER_INDEX,
+        ),
+    )
+
+
 def combine_library_data_with_axe_results(
     library_data: Union[str, Path, pd.DataFrame],
     lib_scraping_results: Union[str, Path],
+    workers: Optional[int] = 1,
+    cache: Optional[Union[str, Path]] = None,
+    use_mmap: bool = False,
 ) -> pd.DataFrame:
     """
     Combine library data CSV (or in memory DataFrame) with the blacklight results for each
@@ -125,80 +308,87 @@ def combine_library_data_with_axe_results(
         library.
     lib_scraping_results: Union[str, Path]
         The path to the directory that contains sub-directories for each library
-        website's blacklight results. 
+        website's blacklight results, or to a zip archive with the same layout.
+        Archives are read in place without unpacking.
+    workers: Optional[int]
+        The number of processes to use for site processing. The compiled
+        Disconnect and domain owner indexes are sent to each worker once.
+        Default: 1 (process every site in the current process)
+        None uses every available core.
+    cache: Optional[Union[str, Path]]
+        An optional SQLite file used to cache per-site metrics between runs.
+        Sites whose `inspection.json` is unchanged reuse their cached metrics.
+        Default: None (compute every site)
+    use_mmap: bool
+        Memory map the results archive for random access to its members.
+        Only used when `lib_scraping_results` is a zip archive.
+        Default: False
 
     Returns
     -------
     full_data: pd.DataFrame
         The original library data, the summed trackers counts for each library
-        website combined into a single dataframe.
+        website combined into a single dataframe. The "Owners" column holds
+        the number of distinct third party hosts each site loads per ultimate
+        parent company (e.g. `{"Alphabet": 4}`), expand it to one column per
+        owner with `pd.DataFrame(full_data["Owners"].dropna().tolist())`.
 
     Finally, any `https://` or `http://` is dropped from the campaign url.
     I.e. in the spreadsheet the value is `https://website.org` but the associated
     directory should be: `data/website.org`
     """
-    # Confirm paths
-    lib_scraping_results = Path(lib_scraping_results).resolve(
-        strict=True
-    )
-
     if isinstance(library_data, (str, Path)):
         library_data = Path(library_data).resolve(strict=True)
         library_data = pd.read_csv(library_data)
 
-    # Confirm axe scraping results is dir
-    if not lib_scraping_results.is_dir():
-        raise NotADirectoryError(lib_scraping_results)
     
-    disconnect_dir = ACCESS_EVAL_2022_STUDY_DATA / "services.json"
-    if disconnect_dir.exists():
-        with open(disconnect_dir, "r") as open_f:
-            disconnect_json = json.load(open_f)
-
-    # Iter election data and create List of expanded dicts with added
-    expanded_data = []
-    for _, row in tqdm(library_data.iterrows()):
-        if isinstance(row[DatasetFields.homepage_url], str):
-            cleaned_url = clean_url(row[DatasetFields.homepage_url])
-            access_eval = lib_scraping_results / cleaned_url
-        else:
-            access_eval = None
-
-        # if not access_eval == None:
-        if access_eval != None and access_eval.exists():
-            access_eval = Path(access_eval).resolve(strict=True)
-            if not access_eval.is_dir():
-                raise NotADirectoryError(access_eval)
-            # Run metric generation
-            access_eval_metrics = _recurse_axe_results(
-                access_eval, TrackerMetrics, disconnect_json
-            )
+    # Compile the Disconnect categories and domain owners once for all sites
+    disconnect_index = DisconnectIndex.from_file()
+    owner_index = OwnerIndex.from_file()
+
+    # Find the result directory for each row
+    sites = find_site_results(
+        library_data[DatasetFields.homepage_url],
+        lib_scraping_results,
+        use_mmap=use_mmap,
+    )
 
-            # Combine and merge to expanded data
-            expanded_data.append(
-                {
-                    # Original row details
-                    **row,
-                    # axe-report
-                    **_convert_metrics_to_expanded_data(
-                        access_eval_metrics,
-                    ),
-                }
-            )
-        else:
-            row.homepage_url = None
-            expanded_data.append(
-                {
-                    # Original row details with unworking links removed
-                    **row,
-                }
-            )
+    # Run metric generation
+    site_cache = None
+    if cache is not None:
+        # Results also depend on the Disconnect services file, domain owners
+        # file and public suffix list in use
+        site_cache = SiteResultCache(
+            cache,
+            "disconnect",
+            f"{RESULT_CACHE_VERSION}-"
+            f"{file_digest(ACCESS_EVAL_2022_DISCONNECT_SERVICES)}-"
+            f"{file_digest(ACCESS_EVAL_2022_DOMAIN_OWNERS)}-"
+            f"{file_digest(ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST)}",
+        )
+    site_metrics = process_sites(
+        _process_site,
+        sites,
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(disconnect_index, owner_index),
+        cache=site_cache,
+    )
+    if site_cache is not None:
+        site_cache.close()
+
+    # Join the metrics onto the library data by cleaned url
+    full_data = merge_site_metrics(
+        library_data,
+        DatasetFields.homepage_url,
+        site_metrics,
+    )
 
     log.info(
-        f"Dropped {len(library_data) - len(expanded_data)} rows from dataset "
-        f"because they were missing a result directory."
+        f"{sum(metrics is None for metrics in site_metrics)} rows from dataset "
+        f"have no metrics because they were missing a result directory."
     )
-    return pd.DataFrame(expanded_data)
+    return full_data
 
 
 def load_access_eval_2022_dataset(
@@ -224,7 +414,7 @@ def load_access_eval_2022_dataset(
         path = ACCESS_EVAL_2022_DATASET
 
     # Load base data
-    data = pd.read_csv(ACCESS_EVAL_2022_DATASET)
+    data = pd.read_csv(path)
     
     # Replace the NaN with 0 
     for col in data.columns:
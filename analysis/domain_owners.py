@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import instrumentation
+from constants_2022 import ACCESS_EVAL_2022_DOMAIN_OWNERS
+
+###############################################################################
+
+
+class OwnerIndex:
+    """
+    A flattened lookup from domains to their ultimate parent owner, built
+    from the webXray `domain_owners.json` list.
+
+    Each owner's `parent_id` chain is resolved once when the index is built,
+    so every listed domain maps straight to the name of the owner at the top of
+    its chain (e.g. "google-analytics.com" -> "Alphabet"). A host is matched
+    by looking up each of its suffixes, from the full host down to its last
+    label, so one query is a handful of dictionary lookups.
+
+    Parameters
+    ----------
+    owners: List[Dict]
+        The loaded contents of a `domain_owners.json` file.
+    """
+
+    def __init__(self, owners: List[Dict]) -> None:
+        by_id = {owner["id"]: owner for owner in owners}
+
+        # Resolve the top of every parent chain, reusing resolved chains
+        ultimate: Dict[int, str] = {}
+        for owner in owners:
+            chain = []
+            current = owner
+            while current["id"] not in ultimate:
+                chain.append(current["id"])
+                parent_id = current["parent_id"]
+                if (
+                    parent_id is None
+                    or parent_id not in by_id
+                    or parent_id in chain
+                ):
+                    ultimate[current["id"]] = current["owner_name"]
+                    break
+                current = by_id[parent_id]
+            for owner_id in chain:
+                ultimate[owner_id] = ultimate[current["id"]]
+
+        # A domain listed by several owners keeps the first one in file order
+        self._domains: Dict[str, str] = {}
+        for owner in owners:
+            for domain in owner["domains"]:
+                self._domains.setdefault(domain.lower(), ultimate[owner["id"]])
+
+        self._cache: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    @instrumentation.timed("load_owners")
+    def from_file(
+        cls,
+        path: Union[str, Path] = ACCESS_EVAL_2022_DOMAIN_OWNERS,
+    ) -> "OwnerIndex":
+        """
+        Load and flatten a webXray `domain_owners.json` file.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            The path to the domain owners file.
+            Default: The file shipped in the repository's `data/webxray`.
+
+        Returns
+        -------
+        index: OwnerIndex
+            The flattened index.
+        """
+        path = Path(path).resolve(strict=True)
+        with open(path, "r", encoding="utf-8") as open_f:
+            return cls(json.load(open_f))
+
+    def owner(self, host: str) -> Optional[str]:
+        """
+        Find the ultimate parent owner of a host.
+
+        Parameters
+        ----------
+        host: str
+            The host name, e.g. "www.google-analytics.com".
+
+        Returns
+        -------
+        owner: Optional[str]
+            The name of the owner at the top of the matched domain's parent
+            chain, e.g. "Alphabet", or None if no suffix of the host is listed.
+        """
+        if host in self._cache:
+            return self._cache[host]
+
+        owner = None
+        labels = host.strip().rstrip(".").lower().split(".")
+        for i in range(len(labels)):
+            owner = self._domains.get(".".join(labels[i:]))
+            if owner is not None:
+                break
+
+        self._cache[host] = owner
+        return owner
+
+    def count_hosts(self, hosts: Iterable[str]) -> Dict[str, int]:
+        """
+        Count the distinct hosts that belong to each ultimate parent owner.
+
+        Parameters
+        ----------
+        hosts: Iterable[str]
+            The host names, e.g. a site's third party hosts.
+
+        Returns
+        -------
+        counts: Dict[str, int]
+            The number of distinct hosts for each owner with at least one
+            host, in order of first appearance. Unowned hosts are not counted.
+        """
+        counts: Dict[str, int] = {}
+        for host in dict.fromkeys(hosts):
+            owner = self.owner(host)
+            if owner is not None:
+                counts[owner] = counts.get(owner, 0) + 1
+
+        return counts
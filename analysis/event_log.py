@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+from tqdm import tqdm
+
+from constants import SINGLE_PAGE_EVENT_LOG_FILENAME
+from constants_2022 import DatasetFields
+from results_archive import ArchivedFile, ArchivedSite
+from utils_2022 import find_site_results, merge_site_metrics
+
+###############################################################################
+
+log = logging.getLogger(__name__)
+
+# The message type prefix of events recorded by the JavaScript API instrument
+INSTRUMENTED_API_PREFIX = "JsInstrument."
+
+###############################################################################
+
+
+@dataclass
+class EventLogSummary:
+    """
+    The aggregated events of a blacklight `inspection-log.ndjson`.
+
+    Only `warn` level lines are events, the same as blacklight's own reports.
+
+    Attributes
+    ----------
+    events: int
+        The number of events in the log.
+    message_types: Dict[str, int]
+        The number of events for each `message.type`, in order of first
+        appearance.
+    symbols: Dict[str, int]
+        The number of events for each instrumented API symbol
+        (`message.data.symbol`), e.g. "HTMLCanvasElement.toDataURL".
+    script_urls: Dict[str, int]
+        The number of events for each calling script url, taken from the first
+        stack frame with a file name.
+    """
+
+    events: int = 0
+    message_types: Dict[str, int] = field(default_factory=dict)
+    symbols: Dict[str, int] = field(default_factory=dict)
+    script_urls: Dict[str, int] = field(default_factory=dict)
+
+
+def _script_url(stack: Any) -> Optional[str]:
+    # The first file name in the stack, or else the source of the last frame
+    if not isinstance(stack, list) or not stack:
+        return None
+    for frame in stack:
+        if isinstance(frame, dict) and "fileName" in frame:
+            return frame["fileName"]
+    last = stack[-1]
+    if not isinstance(last, dict):
+        return None
+    return last.get("source") or None
+
+
+def _count(counts: Dict[str, int], key: Any) -> None:
+    if isinstance(key, str):
+        counts[key] = counts.get(key, 0) + 1
+
+
+def read_event_log_summary(
+    path: Union[str, Path, ArchivedFile],
+) -> EventLogSummary:
+    """
+    Stream a blacklight `inspection-log.ndjson` one line at a time and count
+    its events per message type, instrumented API symbol, and calling script.
+
+    Only one line is held in memory at a time, so memory use is bounded by the
+    longest event and the number of distinct keys rather than the log size.
+    Lines that are not valid JSON objects are skipped.
+
+    Parameters
+    ----------
+    path: Union[str, Path, ArchivedFile]
+        The path to the event log, on disk or in a results archive.
+
+    Returns
+    -------
+    summary: EventLogSummary
+        The aggregated counts.
+    """
+    if isinstance(path, str):
+        path = Path(path)
+
+    summary = EventLogSummary()
+    with path.open("r") as open_f:
+        for line in open_f:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(event, dict) or event.get("level") != "warn":
+                continue
+
+            summary.events += 1
+            message = event.get("message")
+            if not isinstance(message, dict):
+                continue
+            _count(summary.message_types, message.get("type"))
+            data = message.get("data")
+            if isinstance(data, dict):
+                _count(summary.symbols, data.get("symbol"))
+            _count(summary.script_urls, _script_url(message.get("stack")))
+
+    return summary
+
+
+def _read_site_event_log(
+    site: Union[Path, ArchivedSite],
+) -> Optional[EventLogSummary]:
+    event_log = site / SINGLE_PAGE_EVENT_LOG_FILENAME
+    if not event_log.exists():
+        return None
+    return read_event_log_summary(event_log)
+
+
+def summarize_site_event_logs(
+    sites: Sequence[Optional[Union[Path, ArchivedSite]]],
+    threads: int = 1,
+) -> List[Optional[EventLogSummary]]:
+    """
+    Aggregate the event log of many site result directories, optionally in a
+    thread pool.
+
+    Parameters
+    ----------
+    sites: Sequence[Optional[Union[Path, ArchivedSite]]]
+        The site directories to read. `None` entries are skipped.
+    threads: int
+        The number of threads to read logs with. Reading is mostly waiting on
+        file (or archive) reads and decompression, so threads overlap well.
+        Default: 1 (read every log in the current thread)
+
+    Returns
+    -------
+    summaries: List[Optional[EventLogSummary]]
+        The summary for each site, in the same order as `sites`, or None where
+        the site or its event log does not exist.
+    """
+    summaries: List[Optional[EventLogSummary]] = [None] * len(sites)
+    pending = [i for i, site in enumerate(sites) if site is not None]
+
+    if threads == 1:
+        for i in tqdm(pending):
+            summaries[i] = _read_site_event_log(sites[i])
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = executor.map(
+                _read_site_event_log, [sites[i] for i in pending]
+            )
+            for i, summary in zip(pending, tqdm(results, total=len(pending))):
+                summaries[i] = summary
+
+    return summaries
+
+
+def _convert_summary_to_expanded_data(
+    summary: EventLogSummary,
+) -> Dict[str, Any]:
+
+    return {
+        "logged_events": summary.events,
+        "instrumented_api_calls": sum(
+            count
+            for message_type, count in summary.message_types.items()
+            if message_type.startswith(INSTRUMENTED_API_PREFIX)
+        ),
+        "event_types": summary.message_types,
+        "instrumented_api_symbols": summary.symbols,
+        "instrumented_api_scripts": summary.script_urls,
+    }
+
+
+def combine_library_data_with_event_logs(
+    library_data: Union[str, Path, pd.DataFrame],
+    lib_scraping_results: Union[str, Path],
+    url_column: str = DatasetFields.homepage_url,
+    threads: int = 1,
+    use_mmap: bool = False,
+) -> pd.DataFrame:
+    """
+    Combine library data CSV (or in memory DataFrame) with the aggregated
+    blacklight event log for each library website.
+
+    Parameters
+    ----------
+    library_data: Union[str, Path, pd.DataFrame]
+        The path to, or the in-memory dataframe, containing basic library data.
+    lib_scraping_results: Union[str, Path]
+        The path to the directory that contains sub-directories for each library
+        website's blacklight results, or to a zip archive with the same layout.
+    url_column: str
+        The library data column with the website url to find results for.
+        Default: DatasetFields.homepage_url
+    threads: int
+        The number of threads to read event logs with.
+        Default: 1
+    use_mmap: bool
+        Memory map the results archive for random access to its members.
+        Only used when `lib_scraping_results` is a zip archive.
+        Default: False
+
+    Returns
+    -------
+    full_data: pd.DataFrame
+        The original library data with the number of logged events and
+        instrumented API calls for each website, plus the per message type,
+        per API symbol and per calling script counts as dictionaries.
+    """
+    if isinstance(library_data, (str, Path)):
+        library_data = Path(library_data).resolve(strict=True)
+        library_data = pd.read_csv(library_data)
+
+    # Find the result directory for each row
+    sites = find_site_results(
+        library_data[url_column], lib_scraping_results, use_mmap=use_mmap
+    )
+
+    # Aggregate each site's log
+    summaries = summarize_site_event_logs(sites, threads=threads)
+    site_metrics = [
+        None if summary is None else _convert_summary_to_expanded_data(summary)
+        for summary in summaries
+    ]
+
+    log.info(
+        f"{sum(metrics is None for metrics in site_metrics)} rows from dataset "
+        f"have no event log metrics because they were missing an event log."
+    )
+    return merge_site_metrics(library_data, url_column, site_metrics)
@@ -4,10 +4,11 @@ import argparse
 import logging
 import sys
 import traceback
+from contextlib import nullcontext
+from pathlib import Path
 
 import constants_2022
-from disconnect import combine_library_data_with_axe_results
-from utils_2022 import unpack_data
+import instrumentation
 
 ###############################################################################
 
@@ -32,6 +33,128 @@ class Args(argparse.Namespace):
                 "2022 preliminary study."
             ),
         )
+        p.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=None,
+            help=(
+                "The number of processes to use for site processing. "
+                "Default: every available core."
+            ),
+        )
+        p.add_argument(
+            "--cache",
+            dest="cache",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_RESULTS_CACHE,
+            help=(
+                "SQLite file used to reuse per-site metrics for unchanged "
+                "inspection reports between runs. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_RESULTS_CACHE}"
+            ),
+        )
+        p.add_argument(
+            "--no-cache",
+            dest="cache",
+            action="store_const",
+            const=None,
+            help="Recompute every site without reading or writing the cache.",
+        )
+        p.add_argument(
+            "--blocklist-cache",
+            dest="blocklist_cache",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_BLOCKLIST_CACHE,
+            help=(
+                "Directory used to reuse the compiled EasyList and EasyPrivacy "
+                "matchers while the filter lists are unchanged. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_BLOCKLIST_CACHE}"
+            ),
+        )
+        p.add_argument(
+            "--no-blocklist-cache",
+            dest="blocklist_cache",
+            action="store_const",
+            const=None,
+            help="Compile the filter lists without reading or writing the cache.",
+        )
+        p.add_argument(
+            "--unpack",
+            dest="unpack",
+            action="store_true",
+            help=(
+                "Unpack the results archive to disk before processing instead of "
+                "reading each inspection report straight from the archive."
+            ),
+        )
+        p.add_argument(
+            "--mmap",
+            dest="use_mmap",
+            action="store_true",
+            help="Memory map the results archive when reading it in place.",
+        )
+        p.add_argument(
+            "--format",
+            dest="output_format",
+            choices=["csv", "parquet"],
+            default="csv",
+            help=(
+                "Store the dataset as CSV or as a typed Parquet file next to it. "
+                "Default: csv"
+            ),
+        )
+        p.add_argument(
+            "--no-parquet-copy",
+            dest="parquet_copy",
+            action="store_false",
+            help=(
+                "With the csv format, do not also store a typed Parquet copy "
+                "next to the CSV. Loading the dataset reads the copy instead of "
+                "the CSV while the copy is at least as new."
+            ),
+        )
+        p.add_argument(
+            "--vendor-names",
+            dest="vendor_names",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_VENDOR_NAMES,
+            help=(
+                "The vendor name mapping table. Vendor names it does not cover "
+                "yet are matched and added to it. The stored dataset keeps the "
+                "raw names, the table is applied when the dataset is loaded. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_VENDOR_NAMES}"
+            ),
+        )
+        p.add_argument(
+            "--host-matrix",
+            dest="host_matrix",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_HOST_MATRIX,
+            help=(
+                "Where to store the sparse sites x third party hosts matrix. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_HOST_MATRIX}"
+            ),
+        )
+        p.add_argument(
+            "--event-logs",
+            dest="event_logs",
+            action="store_true",
+            help=(
+                "Also count the events and instrumented API calls in each "
+                "site's blacklight event log (inspection-log.ndjson)."
+            ),
+        )
+        p.add_argument(
+            "--profile",
+            dest="profile",
+            type=Path,
+            default=None,
+            help=(
+                "A directory to store a cProfile profile (`.pstats`) and a "
+                "JSON file of per-stage timings and counters for this run in."
+            ),
+        )
         p.parse_args(namespace=self)
 
 
@@ -40,22 +163,61 @@ class Args(argparse.Namespace):
 
 def main() -> None:
     try:
-        _ = Args()
-
-        # Unpack and store
-        eval_data = unpack_data(
-            constants_2022.ACCESS_EVAL_2022_EVALS_ZIP,
-            constants_2022.ACCESS_EVAL_2022_EVALS_UNPACKED,
-            clean=True,
-        )
-
-        # Combine
-        expanded_data = combine_library_data_with_axe_results(
-            constants_2022.ACCESS_EVAL_2022_ELECTION_RESULTS,
-            eval_data,
-        )
-        # Store to data dir
-        expanded_data.to_csv(constants_2022.ACCESS_EVAL_2022_DATASET, index=False)
+        args = Args()
+
+        # Only load pandas and the pipeline once there is work to do, so
+        # `--help` and bad arguments return straight away
+        from core_2022 import store_access_eval_2022_dataset
+        from pipeline_2022 import combine_library_data_with_all_results
+        from utils_2022 import unpack_data
+        from vendor_names import update_vendor_name_map
+
+        profiling = nullcontext()
+        if args.profile is not None:
+            profiling = instrumentation.profile(
+                args.profile, "generate-access-eval-2022-dataset"
+            )
+
+        with profiling:
+            # Read the results archive in place unless asked to unpack it
+            eval_data = constants_2022.ACCESS_EVAL_2022_EVALS_ZIP
+            if args.unpack:
+                eval_data = unpack_data(
+                    constants_2022.ACCESS_EVAL_2022_EVALS_ZIP,
+                    constants_2022.ACCESS_EVAL_2022_EVALS_UNPACKED,
+                    clean=True,
+                )
+
+            # Combine the homepage and catalog results in one pass
+            expanded_data = combine_library_data_with_all_results(
+                constants_2022.ACCESS_EVAL_2022_ELECTION_RESULTS,
+                eval_data,
+                workers=args.workers,
+                cache=args.cache,
+                use_mmap=args.use_mmap,
+                blocklist_cache=args.blocklist_cache,
+                host_matrix=args.host_matrix,
+                event_logs=args.event_logs,
+            )
+            # Match the spelling variants of new vendor names, the stored
+            # dataset keeps the raw names
+            update_vendor_name_map(expanded_data, args.vendor_names)
+
+            # Store to data dir
+            store_access_eval_2022_dataset(
+                expanded_data,
+                constants_2022.ACCESS_EVAL_2022_DATASET_PARQUET
+                if args.output_format == "parquet"
+                else constants_2022.ACCESS_EVAL_2022_DATASET,
+            )
+            if args.output_format == "csv" and args.parquet_copy:
+                try:
+                    store_access_eval_2022_dataset(
+                        expanded_data,
+                        constants_2022.ACCESS_EVAL_2022_DATASET_PARQUET,
+                    )
+                except ImportError as e:
+                    log.warning(f"Could not store the Parquet copy: {e}")
         # test local
         # expanded_data.to_csv('data_test.csv', index=False)
 
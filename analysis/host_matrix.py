@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from utils import clean_urls
+
+###############################################################################
+
+
+class HostMatrix:
+    """
+    A sparse sites x third party hosts matrix, with the host vocabulary and
+    the index of sites it is keyed by.
+
+    Row `i` is the `i`th site (result directory) and column `j` the `j`th host
+    in `hosts`. An entry is 1 where the site requested the host, and missing
+    (0) otherwise. Library urls are mapped to rows by their cleaned url, the
+    same key `merge_site_metrics` joins metrics by, so any column of library
+    data can be lined up with the matrix with `rows_for`.
+
+    Parameters
+    ----------
+    matrix: sparse.csr_matrix
+        The binary sites x hosts matrix.
+    hosts: Sequence[str]
+        The host name of each column.
+    sites: Sequence[str]
+        The result directory name of each row.
+    url_rows: Dict[str, int]
+        The row of each cleaned library url.
+    """
+
+    def __init__(
+        self,
+        matrix: sparse.csr_matrix,
+        hosts: Sequence[str],
+        sites: Sequence[str],
+        url_rows: Dict[str, int],
+    ) -> None:
+        self.matrix = matrix
+        self.hosts = np.asarray(hosts, dtype=str)
+        self.sites = np.asarray(sites, dtype=str)
+        self.url_rows = url_rows
+
+    @classmethod
+    def from_site_hosts(
+        cls,
+        sites: Sequence[str],
+        site_hosts: Sequence[Iterable[str]],
+        url_rows: Optional[Dict[str, int]] = None,
+    ) -> "HostMatrix":
+        """
+        Intern each site's hosts and build the matrix in one pass.
+
+        Parameters
+        ----------
+        sites: Sequence[str]
+            The result directory name of each site.
+        site_hosts: Sequence[Iterable[str]]
+            The third party hosts of each site, in the same order as `sites`.
+            Repeated and empty hosts are ignored.
+        url_rows: Optional[Dict[str, int]]
+            The row of each cleaned library url.
+            Default: None (each site's own name maps to its row)
+
+        Returns
+        -------
+        host_matrix: HostMatrix
+            The matrix, with hosts numbered in order of first appearance.
+        """
+        vocabulary: Dict[str, int] = {}
+        indptr = [0]
+        indices = []
+        for hosts in site_hosts:
+            row = {
+                vocabulary.setdefault(host, len(vocabulary))
+                for host in hosts
+                if host
+            }
+            indices.extend(sorted(row))
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.uint8),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(sites), len(vocabulary)),
+        )
+        if url_rows is None:
+            url_rows = {site: i for i, site in enumerate(sites)}
+
+        return cls(matrix, list(vocabulary), sites, url_rows)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Store the matrix, host vocabulary and site index to one `.npz` file.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            Where to store the matrix.
+
+        Returns
+        -------
+        path: Path
+            The path the matrix was stored to.
+        """
+        path = Path(path)
+        np.savez_compressed(
+            path,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.asarray(self.matrix.shape),
+            hosts=self.hosts,
+            sites=self.sites,
+            url_keys=np.asarray(list(self.url_rows), dtype=str),
+            url_rows=np.asarray(list(self.url_rows.values()), dtype=np.int32),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "HostMatrix":
+        """
+        Load a matrix stored by `save`.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            The path to the `.npz` file.
+
+        Returns
+        -------
+        host_matrix: HostMatrix
+            The loaded matrix.
+        """
+        path = Path(path).resolve(strict=True)
+        with np.load(path, allow_pickle=False) as stored:
+            matrix = sparse.csr_matrix(
+                (
+                    np.ones(len(stored["indices"]), dtype=np.uint8),
+                    stored["indices"],
+                    stored["indptr"],
+                ),
+                shape=tuple(stored["shape"]),
+            )
+            url_rows = dict(
+                zip(stored["url_keys"].tolist(), stored["url_rows"].tolist())
+            )
+            return cls(matrix, stored["hosts"], stored["sites"], url_rows)
+
+    def rows_for(self, urls: Iterable[Any]) -> np.ndarray:
+        """
+        Find the matrix row of each library url.
+
+        Parameters
+        ----------
+        urls: Iterable[Any]
+            The library website urls, e.g. the Homepage column.
+
+        Returns
+        -------
+        rows: np.ndarray
+            The row of each url, or -1 where the url has no results.
+        """
+        return (
+            clean_urls(urls).map(self.url_rows).fillna(-1).to_numpy(dtype=np.int64)
+        )
+
+    def prevalence(self) -> pd.Series:
+        """
+        The number of sites that request each host, most common first.
+        """
+        counts = np.asarray(self.matrix.sum(axis=0, dtype=np.int64)).ravel()
+        return pd.Series(counts, index=self.hosts).sort_values(
+            ascending=False, kind="stable"
+        )
+
+    def top_hosts(self, n: int) -> pd.Series:
+        """
+        The `n` hosts requested by the most sites, with their number of sites.
+        """
+        return self.prevalence().head(n)
+
+    def cooccurrence(self) -> sparse.csr_matrix:
+        """
+        The number of sites that request each pair of hosts.
+
+        Returns
+        -------
+        cooccurrence: sparse.csr_matrix
+            A hosts x hosts matrix, with each host's prevalence on the
+            diagonal.
+        """
+        matrix = self.matrix.astype(np.int32)
+        return (matrix.T @ matrix).tocsr()
+
+    def cooccurrence_table(self, hosts: Sequence[str]) -> pd.DataFrame:
+        """
+        The number of sites that request each pair of some hosts, e.g. the
+        `top_hosts`.
+
+        Parameters
+        ----------
+        hosts: Sequence[str]
+            The hosts to compare.
+
+        Returns
+        -------
+        cooccurrence: pd.DataFrame
+            A dense hosts x hosts table.
+        """
+        columns = self._columns(hosts)
+        selected = self.matrix[:, columns].astype(np.int32)
+        return pd.DataFrame(
+            (selected.T @ selected).toarray(), index=list(hosts), columns=list(hosts)
+        )
+
+    def group_prevalence(
+        self,
+        urls: Iterable[Any],
+        groups: Iterable[Any],
+        hosts: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        The share of sites in each group that request each host, e.g. for each
+        automation system vendor.
+
+        Parameters
+        ----------
+        urls: Iterable[Any]
+            The library website urls, e.g. the Catalog column.
+        groups: Iterable[Any]
+            The group of each url, e.g. the Current Automation System column.
+            Urls without results or with a missing group are left out, and a
+            site is counted once per group however many urls map to it.
+        hosts: Optional[Sequence[str]]
+            The hosts to compare.
+            Default: None (every host)
+
+        Returns
+        -------
+        prevalence: pd.DataFrame
+            A groups x hosts table of the fraction of sites in each group that
+            request each host, plus a "sites" column with the group sizes.
+        """
+        rows = self.rows_for(urls)
+        groups = pd.Series(list(groups), dtype=object)
+        keep = (rows >= 0) & groups.notna().to_numpy()
+        pairs = pd.DataFrame({"row": rows[keep], "group": groups[keep].to_numpy()})
+        pairs = pairs.drop_duplicates()
+        codes, labels = pd.factorize(pairs["group"], sort=True)
+
+        # A groups x sites indicator matrix sums each group's rows at once
+        membership = sparse.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int32), (codes, pairs["row"].to_numpy())),
+            shape=(len(labels), self.matrix.shape[0]),
+        )
+        matrix = self.matrix
+        columns = self.hosts
+        if hosts is not None:
+            matrix = matrix[:, self._columns(hosts)]
+            columns = list(hosts)
+        counts = (membership @ matrix.astype(np.int32)).toarray()
+        sizes = np.asarray(membership.sum(axis=1)).ravel()
+
+        prevalence = pd.DataFrame(
+            counts / sizes[:, np.newaxis], index=labels, columns=columns
+        )
+        prevalence.insert(0, "sites", sizes)
+        return prevalence
+
+    def _columns(self, hosts: Sequence[str]) -> np.ndarray:
+        index = pd.Index(self.hosts)
+        columns = index.get_indexer(list(hosts))
+        if (columns < 0).any():
+            missing = [host for host, i in zip(hosts, columns) if i < 0]
+            raise KeyError(f"Unknown hosts: {missing}")
+        return columns
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection, Dict, IO, Iterator, List, Optional, Union
+
+import instrumentation
+from results_archive import ArchivedFile
+
+###############################################################################
+
+# Strings are matched whole (so brackets inside them are never counted), a lone
+# quote marks a string cut off at the end of the buffer, and everything else
+# that is not structure or whitespace is a scalar (number, true, false, null)
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|"|[{}\[\],:]|[^\s{}\[\],:"]+', re.S)
+
+# When skipping a value only brackets and (whole) strings matter
+_SKIP_TOKEN = re.compile(r'([{\[])|([}\]])|("[^"\\]*(?:\\.[^"\\]*)*")|(")', re.S)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_STREAM_THRESHOLD = 8 * 1024 * 1024
+
+###############################################################################
+
+
+@dataclass
+class InspectionSummary:
+    """
+    The parts of a blacklight `inspection.json` that the analysis uses.
+
+    Attributes
+    ----------
+    report_sizes: Optional[Dict[str, int]]
+        The size of each entry in `reports`, in file order. None if the
+        inspection has no `reports`.
+    third_party_tracker_urls: Optional[List[str]]
+        The `url` of each entry in `reports.third_party_trackers`. None if the
+        inspection has no third party tracker report.
+    third_party_hosts: Optional[List[str]]
+        The values of `hosts.requests.third_party`. None if the inspection has
+        no host list.
+    """
+
+    report_sizes: Optional[Dict[str, int]] = None
+    third_party_tracker_urls: Optional[List[str]] = None
+    third_party_hosts: Optional[List[str]] = None
+
+
+###############################################################################
+
+
+class _TokenStream:
+    # A JSON tokenizer over a text file that holds at most one chunk (or one
+    # token, if a single token is larger than a chunk) in memory at a time
+
+    def __init__(self, open_f: IO[str], chunk_size: int) -> None:
+        self._open_f = open_f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        if self._eof:
+            raise ValueError("Unexpected end of JSON input")
+
+        # Drop consumed text, and grow the read while a token spans the buffer
+        pending = self._buffer[self._position :]
+        chunk = self._open_f.read(max(self._chunk_size, len(pending)))
+        self._buffer = pending + chunk
+        self._position = 0
+        self._eof = not chunk
+
+    def next(self) -> str:
+        while True:
+            match = _TOKEN.search(self._buffer, self._position)
+            if match is not None:
+                token = match.group()
+                # Hold back anything that may continue in the next chunk
+                if self._eof or (
+                    token != '"' and match.end() < len(self._buffer)
+                ):
+                    if token == '"':
+                        raise ValueError("Unterminated string in JSON input")
+                    self._position = match.end()
+                    return token
+            self._fill()
+
+    def skip(self, token: str) -> None:
+        # Consume the rest of the value that starts with token
+        if token != "{" and token != "[":
+            return
+
+        depth = 1
+        while True:
+            for match in _SKIP_TOKEN.finditer(self._buffer, self._position):
+                kind = match.lastindex
+                if kind == 1:
+                    depth += 1
+                elif kind == 2:
+                    depth -= 1
+                    if not depth:
+                        self._position = match.end()
+                        return
+                elif kind == 4:
+                    # A string cut off at the end of the buffer
+                    self._position = match.start()
+                    break
+            else:
+                self._position = len(self._buffer)
+            self._fill()
+
+
+def _iter_object(tokens: _TokenStream) -> Iterator[str]:
+    # Yield each decoded key after an opening "{"
+    # The caller must consume the value before asking for the next key
+    token = tokens.next()
+    if token == "}":
+        return
+    while True:
+        key = json.loads(token)
+        tokens.next()  # ":"
+        yield key
+        if tokens.next() == "}":
+            return
+        token = tokens.next()
+
+
+def _iter_array(tokens: _TokenStream) -> Iterator[str]:
+    # Yield the first token of each element after an opening "["
+    # The caller must consume the rest of the element before the next one
+    token = tokens.next()
+    if token == "]":
+        return
+    while True:
+        yield token
+        if tokens.next() == "]":
+            return
+        token = tokens.next()
+
+
+def _size(tokens: _TokenStream, token: str) -> int:
+    # Equivalent to `len(value)` without building the value
+    size = 0
+    if token == "{":
+        for _ in _iter_object(tokens):
+            tokens.skip(tokens.next())
+            size += 1
+    elif token == "[":
+        for first in _iter_array(tokens):
+            tokens.skip(first)
+            size += 1
+    elif token.startswith('"'):
+        size = len(json.loads(token))
+    else:
+        raise TypeError(
+            f"object of type '{type(json.loads(token)).__name__}' has no len()"
+        )
+
+    return size
+
+
+def _scalar(tokens: _TokenStream, token: str) -> Optional[Union[str, int, float]]:
+    # Decode a scalar value, containers are skipped and read as None
+    if token == "{" or token == "[":
+        tokens.skip(token)
+        return None
+
+    return json.loads(token)
+
+
+def _read_reports(
+    tokens: _TokenStream,
+    summary: InspectionSummary,
+    summed_reports: Collection[str],
+) -> None:
+    summary.report_sizes = {}
+    for key in _iter_object(tokens):
+        token = tokens.next()
+        if key in summed_reports and token == "{":
+            summary.report_sizes[key] = sum(
+                _size(tokens, tokens.next()) for _ in _iter_object(tokens)
+            )
+        elif key == "third_party_trackers" and token == "[":
+            summary.third_party_tracker_urls = []
+            for first in _iter_array(tokens):
+                url = None
+                if first == "{":
+                    for tracker_key in _iter_object(tokens):
+                        value = tokens.next()
+                        if tracker_key == "url":
+                            url = _scalar(tokens, value)
+                        else:
+                            tokens.skip(value)
+                else:
+                    tokens.skip(first)
+                summary.third_party_tracker_urls.append(url)
+            summary.report_sizes[key] = len(summary.third_party_tracker_urls)
+        else:
+            summary.report_sizes[key] = _size(tokens, token)
+
+
+def _read_hosts(tokens: _TokenStream, summary: InspectionSummary) -> None:
+    for key in _iter_object(tokens):
+        token = tokens.next()
+        if key != "requests" or token != "{":
+            tokens.skip(token)
+            continue
+        for request_key in _iter_object(tokens):
+            token = tokens.next()
+            if request_key == "third_party" and token == "[":
+                summary.third_party_hosts = [
+                    _scalar(tokens, first) for first in _iter_array(tokens)
+                ]
+            else:
+                tokens.skip(token)
+
+
+def _summarize_loaded(
+    loaded: Dict, summed_reports: Collection[str]
+) -> InspectionSummary:
+    # Same extraction as the streaming reader for an already loaded report
+    summary = InspectionSummary()
+    reports = loaded.get("reports")
+    if isinstance(reports, dict):
+        summary.report_sizes = {}
+        for key, report in reports.items():
+            if key in summed_reports and isinstance(report, dict):
+                summary.report_sizes[key] = sum(len(sub) for sub in report.values())
+            else:
+                summary.report_sizes[key] = len(report)
+            if key == "third_party_trackers" and isinstance(report, list):
+                summary.third_party_tracker_urls = [
+                    tracker.get("url") if isinstance(tracker, dict) else None
+                    for tracker in report
+                ]
+
+    hosts = loaded.get("hosts")
+    if isinstance(hosts, dict) and isinstance(hosts.get("requests"), dict):
+        third_party = hosts["requests"].get("third_party")
+        if isinstance(third_party, list):
+            summary.third_party_hosts = [
+                None if isinstance(host, (dict, list)) else host
+                for host in third_party
+            ]
+
+    return summary
+
+
+@instrumentation.timed("parse_inspection")
+def read_inspection_summary(
+    path: Union[str, Path, ArchivedFile],
+    summed_reports: Collection[str] = (),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+) -> InspectionSummary:
+    """
+    Stream a blacklight `inspection.json` and pull out only the report sizes,
+    third party tracker urls, and third party hosts.
+
+    Files at or above `stream_threshold` bytes are tokenized in fixed size
+    chunks and every other value is skipped without being built, so peak memory
+    is bounded by the chunk size and the largest single string in the file
+    rather than by the size of the report. Smaller files are read with
+    `json.load`, which is faster when the whole report fits comfortably in
+    memory.
+
+    Parameters
+    ----------
+    path: Union[str, Path, ArchivedFile]
+        The path to the `inspection.json` file, on disk or in a results archive.
+    summed_reports: Collection[str]
+        Reports whose size should be the total size of their sub-reports
+        (i.e. `sum(len(sub) for sub in report.values())`) rather than their
+        number of keys.
+        Default: () (every report size is `len(report)`)
+    chunk_size: int
+        The number of characters to read at a time.
+        Default: 64 KiB
+    stream_threshold: Optional[int]
+        The file size in bytes from which the file is streamed rather than
+        loaded whole. None always loads the file whole, 0 always streams.
+        Default: 8 MiB
+
+    Returns
+    -------
+    summary: InspectionSummary
+        The extracted fields.
+    """
+    if isinstance(path, str):
+        path = Path(path)
+
+    size = path.stat().st_size
+    instrumentation.count("inspection_bytes", size)
+    if stream_threshold is None or size < stream_threshold:
+        with path.open("r") as open_f:
+            return _summarize_loaded(json.load(open_f), summed_reports)
+
+    summary = InspectionSummary()
+    with path.open("r") as open_f:
+        tokens = _TokenStream(open_f, chunk_size)
+        if tokens.next() != "{":
+            raise ValueError(f"Expected a JSON object in {path}")
+
+        for key in _iter_object(tokens):
+            token = tokens.next()
+            if key == "reports" and token == "{":
+                _read_reports(tokens, summary, summed_reports)
+            elif key == "hosts" and token == "{":
+                _read_hosts(tokens, summary)
+            else:
+                tokens.skip(token)
+
+    return summary
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import cProfile
+import functools
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+###############################################################################
+
+log = logging.getLogger(__name__)
+
+###############################################################################
+
+
+class Metrics:
+    """
+    Wall time per named stage and named counters for one run.
+
+    Stages may nest (e.g. "parse_inspection" runs inside "process_sites"), so
+    stage times are not meant to add up to the run time. Stages and counters
+    recorded in worker processes are merged in by `process_sites`, so for
+    those stages the time is summed over every worker.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    def add_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: "Metrics") -> None:
+        for name, seconds in other.seconds.items():
+            self.add_stage(name, seconds, other.calls[name])
+        for name, n in other.counters.items():
+            self.count(name, n)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in self.seconds.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class _Stage:
+    # Add the time spent inside the `with` block to a stage on exit
+
+    __slots__ = ("_metrics", "_name", "_start")
+
+    def __init__(self, metrics: Metrics, name: str) -> None:
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self._metrics.add_stage(self._name, time.perf_counter() - self._start)
+
+
+###############################################################################
+
+# The metrics of the current run, None while instrumentation is disabled
+_METRICS: Optional[Metrics] = None
+
+# Returned by `stage` while disabled, so a disabled stage costs one call
+_NULL_STAGE = nullcontext()
+
+
+def enable() -> Metrics:
+    """
+    Start recording stages and counters in this process.
+
+    Returns
+    -------
+    metrics: Metrics
+        The metrics that are recorded to until `disable` is called.
+    """
+    global _METRICS
+    _METRICS = Metrics()
+    return _METRICS
+
+
+def disable() -> Optional[Metrics]:
+    """
+    Stop recording stages and counters in this process.
+
+    Returns
+    -------
+    metrics: Optional[Metrics]
+        The metrics recorded since `enable`, or None if it was not enabled.
+    """
+    global _METRICS
+    metrics, _METRICS = _METRICS, None
+    return metrics
+
+
+def enabled() -> bool:
+    return _METRICS is not None
+
+
+def current() -> Optional[Metrics]:
+    """
+    The metrics being recorded to, or None while instrumentation is disabled.
+    """
+    return _METRICS
+
+
+def stage(name: str) -> ContextManager:
+    """
+    Time a block of code as a named stage.
+
+    Use as `with instrumentation.stage("merge"): ...`. While instrumentation
+    is disabled this returns a shared no-op context manager.
+    """
+    if _METRICS is None:
+        return _NULL_STAGE
+    return _Stage(_METRICS, name)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function so every call to it is timed as a named stage.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _METRICS is None:
+                return func(*args, **kwargs)
+            with _Stage(_METRICS, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Add an already measured duration to a named stage.
+    """
+    if _METRICS is not None:
+        _METRICS.add_stage(name, seconds)
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Add `n` to a named counter, e.g. `count("inspection_bytes", size)`.
+    """
+    if _METRICS is not None:
+        _METRICS.count(name, n)
+
+
+def call_with_metrics(func: Callable, *args: Any) -> Tuple[Any, Metrics]:
+    """
+    Call a function with a fresh set of metrics and return them with its
+    result. Used to bring the metrics of a worker process task back to the
+    parent process, which merges them in.
+    """
+    global _METRICS
+    outer, _METRICS = _METRICS, Metrics()
+    try:
+        return func(*args), _METRICS
+    finally:
+        _METRICS = outer
+
+
+@contextmanager
+def profile(output_dir: Union[str, Path], name: str) -> Iterator[Metrics]:
+    """
+    Record stages and counters, and run cProfile, for the `with` block.
+
+    On exit, stores the profile to `<output_dir>/<name>.pstats` (read it with
+    `python -m pstats` or snakeviz) and the metrics to
+    `<output_dir>/<name>-metrics.json`, and logs the slowest stages.
+
+    Only the current process is profiled. Stages and counters from worker
+    processes are included in the metrics, but run with one worker to see
+    per-site work in the profile.
+
+    Parameters
+    ----------
+    output_dir: Union[str, Path]
+        The directory to store the profile and metrics in.
+    name: str
+        The file name prefix, usually the name of the CLI.
+
+    Yields
+    ------
+    metrics: Metrics
+        The metrics being recorded.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    metrics = enable()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield metrics
+    finally:
+        profiler.disable()
+        total = time.perf_counter() - start
+        disable()
+
+        profiler.dump_stats(output_dir / f"{name}.pstats")
+        with open(output_dir / f"{name}-metrics.json", "w") as open_f:
+            json.dump({"seconds": total, **metrics.to_dict()}, open_f, indent=2)
+
+        log.info(f"Total: {total:.2f}s")
+        for stage_name, seconds in sorted(
+            metrics.seconds.items(), key=lambda item: item[1], reverse=True
+        ):
+            log.info(
+                f"  {stage_name}: {seconds:.2f}s "
+                f"({metrics.calls[stage_name]} calls)"
+            )
+        for counter_name, n in metrics.counters.items():
+            log.info(f"  {counter_name}: {n}")
+        log.info(f"Stored profile and metrics to {output_dir}")
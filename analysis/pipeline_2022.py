@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+import core_2022
+import disconnect
+import event_log
+from blocklists import FilterMatcher, load_blocklists
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from disconnect import DisconnectIndex, TrackerMetrics
+from domain_owners import OwnerIndex
+from inspection import read_inspection_summary
+from results_archive import ArchivedSite
+from result_cache import SiteResultCache, file_digest
+from utils import clean_urls
+from utils_2022 import find_site_results, merge_site_metrics, process_sites
+from constants_2022 import (
+    ACCESS_EVAL_2022_BLOCKLISTS,
+    ACCESS_EVAL_2022_DISCONNECT_SERVICES,
+    ACCESS_EVAL_2022_DOMAIN_OWNERS,
+    ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST,
+    DatasetFields,
+)
+
+###############################################################################
+
+log = logging.getLogger(__name__)
+
+# Bump when the per-site results change so cached results are recomputed
+RESULT_CACHE_VERSION = "2"
+
+# The library data url columns and the suffix of the columns made from them
+URL_COLUMN_SUFFIXES = {
+    DatasetFields.homepage_url: "_homepage",
+    DatasetFields.catalog_url: "_catalog",
+}
+
+###############################################################################
+
+
+# The compiled indexes, set once per worker process by `_init_worker`
+_WORKER_DISCONNECT_INDEX: Optional[DisconnectIndex] = None
+_WORKER_OWNER_INDEX: Optional[OwnerIndex] = None
+_WORKER_BLOCKLISTS: Optional[Dict[str, FilterMatcher]] = None
+
+
+def _init_worker(
+    disconnect_index: DisconnectIndex,
+    owner_index: OwnerIndex,
+    blocklists: Dict[str, FilterMatcher],
+) -> None:
+    global _WORKER_DISCONNECT_INDEX, _WORKER_OWNER_INDEX, _WORKER_BLOCKLISTS
+    _WORKER_DISCONNECT_INDEX = disconnect_index
+    _WORKER_OWNER_INDEX = owner_index
+    _WORKER_BLOCKLISTS = blocklists
+
+
+def _process_site(
+    access_eval: Union[Path, ArchivedSite],
+) -> Dict[str, Dict[str, Any]]:
+    # Read a site's report once and run every extractor on it, safe to run in
+    # a worker process
+    if not isinstance(access_eval, ArchivedSite):
+        access_eval = Path(access_eval).resolve(strict=True)
+    if not access_eval.is_dir():
+        raise NotADirectoryError(access_eval)
+
+    site_metrics = core_2022.SiteMetrics()
+    tracker_metrics = TrackerMetrics()
+    hosts = []
+    this_dir_results = access_eval / SINGLE_PAGE_AXE_RESULTS_FILENAME
+    if this_dir_results.exists():
+        summary = read_inspection_summary(
+            this_dir_results, summed_reports=core_2022.SUMMED_REPORTS
+        )
+        site_metrics = core_2022._metrics_from_summary(
+            summary, access_eval.name, _WORKER_BLOCKLISTS
+        )
+        tracker_metrics = disconnect._metrics_from_summary(
+            summary, _WORKER_DISCONNECT_INDEX, _WORKER_OWNER_INDEX
+        )
+        hosts = list(dict.fromkeys(summary.third_party_hosts))
+
+    return {
+        "counts": core_2022._convert_metrics_to_expanded_data(site_metrics),
+        "categories": disconnect._convert_metrics_to_expanded_data(
+            tracker_metrics
+        ),
+        "hosts": hosts,
+    }
+
+
+def _suffixed(
+    metrics: Optional[Dict[str, Any]], suffix: str
+) -> Optional[Dict[str, Any]]:
+    if metrics is None:
+        return None
+    return {f"{key}{suffix}": value for key, value in metrics.items()}
+
+
+def _store_host_matrix(
+    path: Union[str, Path],
+    library_data: pd.DataFrame,
+    column_sites: Dict[str, List[Optional[Union[Path, ArchivedSite]]]],
+    unique_sites: List[Union[Path, ArchivedSite]],
+    results: List[Dict[str, Any]],
+) -> None:
+    # Imported here so runs that do not store the matrix skip scipy
+    from host_matrix import HostMatrix
+
+    rows = {site: i for i, site in enumerate(unique_sites)}
+    url_rows = {}
+    for url_column, sites in column_sites.items():
+        for url, site in zip(clean_urls(library_data[url_column]), sites):
+            if site is not None:
+                url_rows.setdefault(url, rows[site])
+
+    matrix = HostMatrix.from_site_hosts(
+        [site.name for site in unique_sites],
+        [result["hosts"] for result in results],
+        url_rows,
+    )
+    matrix.save(path)
+    log.info(
+        f"Stored the {matrix.matrix.shape[0]} sites x "
+        f"{matrix.matrix.shape[1]} hosts matrix to {path}"
+    )
+
+
+def combine_library_data_with_all_results(
+    library_data: Union[str, Path, pd.DataFrame],
+    lib_scraping_results: Union[str, Path],
+    workers: Optional[int] = 1,
+    cache: Optional[Union[str, Path]] = None,
+    use_mmap: bool = False,
+    blocklist_cache: Optional[Union[str, Path]] = None,
+    host_matrix: Optional[Union[str, Path]] = None,
+    event_logs: bool = False,
+) -> pd.DataFrame:
+    """
+    Combine library data CSV (or in memory DataFrame) with the blacklight
+    tracker counts and the Disconnect categories of both the homepage and the
+    catalog of each library, in a single pass over the results.
+
+    The result directories of both url columns are deduplicated, each
+    directory's `inspection.json` is read once, and every extractor (the
+    blacklight counts, vendor buckets and blocked requests of `core_2022`, and
+    the Disconnect categories and owners of `disconnect`) runs on that one
+    summary. The results are then joined back onto the library data under
+    `_homepage` and `_catalog` suffixed columns.
+
+    Parameters
+    ----------
+    library_data: Union[str, Path, pd.DataFrame]
+        The path to, or the in-memory dataframe, containing basic library data.
+        This CSV or dataframe should contain two columns "Homepage" and
+        "Catalog" that are used to find the blacklight results of each library.
+    lib_scraping_results: Union[str, Path]
+        The path to the directory that contains sub-directories for each library
+        website's blacklight results, or to a zip archive with the same layout.
+        Archives are read in place without unpacking.
+    workers: Optional[int]
+        The number of processes to use for site processing. The compiled
+        indexes and filter lists are sent to each worker once.
+        Default: 1 (process every site in the current process)
+        None uses every available core.
+    cache: Optional[Union[str, Path]]
+        An optional SQLite file used to cache per-site results between runs.
+        Sites whose `inspection.json` is unchanged reuse their cached results.
+        Default: None (compute every site)
+    use_mmap: bool
+        Memory map the results archive for random access to its members.
+        Only used when `lib_scraping_results` is a zip archive.
+        Default: False
+    blocklist_cache: Optional[Union[str, Path]]
+        An optional directory to store the compiled EasyList and EasyPrivacy
+        matchers in, so later runs skip compiling the lists.
+        Default: None (compile the lists every run)
+    host_matrix: Optional[Union[str, Path]]
+        An optional `.npz` file to store the sites x third party hosts matrix
+        of every site with results in. Load it with `HostMatrix.load`.
+        Default: None (do not store the matrix)
+    event_logs: bool
+        Also aggregate each site's `inspection-log.ndjson` (see
+        `event_log.combine_library_data_with_event_logs`), read in one thread
+        per worker.
+        Default: False (skip the event logs)
+
+    Returns
+    -------
+    full_data: pd.DataFrame
+        The original library data followed by the homepage tracker counts and
+        Disconnect categories (and event log counts), then the same for the
+        catalog.
+    """
+    if isinstance(library_data, (str, Path)):
+        library_data = Path(library_data).resolve(strict=True)
+        library_data = pd.read_csv(library_data)
+
+    # Compile the lookups once for all sites
+    disconnect_index = DisconnectIndex.from_file()
+    owner_index = OwnerIndex.from_file()
+    blocklists = load_blocklists(
+        core_2022.BLOCKLIST_NAMES, cache_dir=blocklist_cache
+    )
+
+    # Find the result directory for each row of each url column, and process
+    # every distinct directory once
+    column_sites = {
+        url_column: find_site_results(
+            library_data[url_column], lib_scraping_results, use_mmap=use_mmap
+        )
+        for url_column in URL_COLUMN_SUFFIXES
+    }
+    unique_sites = list(
+        dict.fromkeys(
+            site
+            for sites in column_sites.values()
+            for site in sites
+            if site is not None
+        )
+    )
+    found = sum(
+        site is not None for sites in column_sites.values() for site in sites
+    )
+    log.info(
+        f"Processing {len(unique_sites)} distinct result directories for "
+        f"{found} homepage and catalog urls."
+    )
+
+    # Run metric generation
+    site_cache = None
+    if cache is not None:
+        # Results also depend on every lookup file in use
+        site_cache = SiteResultCache(
+            cache,
+            "pipeline_2022",
+            "-".join(
+                [
+                    RESULT_CACHE_VERSION,
+                    core_2022.RESULT_CACHE_VERSION,
+                    disconnect.RESULT_CACHE_VERSION,
+                    file_digest(ACCESS_EVAL_2022_DISCONNECT_SERVICES),
+                    file_digest(ACCESS_EVAL_2022_DOMAIN_OWNERS),
+                    file_digest(ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST),
+                    *(
+                        file_digest(ACCESS_EVAL_2022_BLOCKLISTS / f"{name}.txt")
+                        for name in core_2022.BLOCKLIST_NAMES
+                    ),
+                ]
+            ),
+        )
+    results = process_sites(
+        _process_site,
+        unique_sites,
+        workers=workers,
+        initializer=_init_worker,
+        initargs=(disconnect_index, owner_index, blocklists),
+        cache=site_cache,
+    )
+    if site_cache is not None:
+        site_cache.close()
+    site_results = dict(zip(unique_sites, results))
+
+    if host_matrix is not None:
+        _store_host_matrix(
+            host_matrix, library_data, column_sites, unique_sites, results
+        )
+
+    # Aggregate the event log of every distinct site, when asked to
+    site_event_logs = {}
+    if event_logs:
+        summaries = event_log.summarize_site_event_logs(
+            unique_sites, threads=workers or os.cpu_count() or 1
+        )
+        site_event_logs = dict(zip(unique_sites, summaries))
+
+    # Fan the results back out to each url column
+    full_data = library_data
+    for url_column, suffix in URL_COLUMN_SUFFIXES.items():
+        row_results = [
+            None if site is None else site_results[site]
+            for site in column_sites[url_column]
+        ]
+        full_data = merge_site_metrics(
+            full_data,
+            url_column,
+            [
+                None if result is None else _suffixed(result["counts"], suffix)
+                for result in row_results
+            ],
+            dtype="UInt32",
+        )
+        full_data = merge_site_metrics(
+            full_data,
+            url_column,
+            [
+                None if result is None else _suffixed(result["categories"], suffix)
+                for result in row_results
+            ],
+        )
+        if event_logs:
+            summaries = [
+                None if site is None else site_event_logs[site]
+                for site in column_sites[url_column]
+            ]
+            full_data = merge_site_metrics(
+                full_data,
+                url_column,
+                [
+                    None
+                    if summary is None
+                    else _suffixed(
+                        event_log._convert_summary_to_expanded_data(summary),
+                        suffix,
+                    )
+                    for summary in summaries
+                ],
+            )
+
+        log.info(
+            f"{sum(result is None for result in row_results)} rows from dataset "
+            f"have no {url_column} metrics because they were missing a result "
+            f"directory."
+        )
+
+    return full_data
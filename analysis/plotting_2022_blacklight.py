@@ -1,43 +1,174 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, NamedTuple, Optional
 import logging
 
 
 import altair as alt
+import numpy as np
 import pandas as pd
 
-from constants_2022 import DatasetFields
+from constants_2022 import PLOTTING_DIR, DatasetFields
 from core_2022 import load_access_eval_2022_dataset
+from stats_2022 import compute_group_comparisons
 
 ###############################################################################
 
-PLOTTING_DIR = Path("plots/").resolve()
 logging.basicConfig(
     level=logging.INFO,
     format="[%(levelname)4s: %(module)s:%(lineno)4s %(asctime)s] %(message)s",
 )
 log = logging.getLogger(__name__)
 
+SUMMARY_SCORE_COLS = [
+    DatasetFields.number_of_total_trackers_homepage,
+    DatasetFields.number_of_total_trackers_catalog,
+]
+
+# The dimensions the summary stats are split by, and their plot name prefixes
+SPLIT_DIMENSIONS = {
+    DatasetFields.state: "location-split-",
+    DatasetFields.current_automation: "current-automation-split-",
+    DatasetFields.discovery_interface: "discovery-interface-split-",
+    DatasetFields.item_ID: "item-ID-split-",
+    DatasetFields.web_content: "web-content-split-",
+}
+
+# How far past the quartiles (in IQRs) the whiskers reach, as in Vega-Lite
+BOXPLOT_WHISKER_EXTENT = 1.5
+
+# The tidy table of group comparison tests stored next to the plots
+GROUP_COMPARISONS_FILENAME = "group-comparisons.csv"
+
 ###############################################################################
 
+def _column_stats(values: pd.Series) -> Dict[str, Any]:
+    # The statistics reported in the figure text, also used for the scale
+    return {
+        "mean": values.mean(),
+        "std": values.std(),
+        "min": values.min(),
+        "max": values.max(),
+        "median": values.median(),
+        "major": values.quantile([0.25, 0.75]),
+    }
+
+
+def _boxplot_summary(
+    data: pd.DataFrame,
+    col: str,
+    group: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    # One "box" record per group with the quartiles and Tukey whiskers, plus
+    # one "outlier" record per distinct value past the whiskers. Records only
+    # hold the keys they use, which keeps the embedded chart data small.
+    # Missing values are ignored.
+    groups = [(None, data)] if group is None else data.groupby(
+        group, observed=True, sort=True
+    )
+
+    records: List[Dict[str, Any]] = []
+    for key, group_data in groups:
+        values = np.sort(
+            group_data[col].to_numpy(dtype=float, na_value=np.nan)
+        )
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            continue
+
+        q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        reach = BOXPLOT_WHISKER_EXTENT * (q3 - q1)
+        inside = values[(values >= q1 - reach) & (values <= q3 + reach)]
+        lower, upper = inside[0], inside[-1]
+        group_records = [
+            {
+                "kind": "box",
+                "lower": float(lower),
+                "q1": float(q1),
+                "median": float(median),
+                "q3": float(q3),
+                "upper": float(upper),
+            }
+        ]
+        # Repeated outliers are drawn on top of each other, so keep one each
+        group_records.extend(
+            {"kind": "outlier", "value": float(value)}
+            for value in np.unique(values[(values < lower) | (values > upper)])
+        )
+        if group is not None:
+            for record in group_records:
+                record[group] = key.item() if isinstance(key, np.generic) else key
+        records.extend(group_records)
+
+    return records
+
+
+def _aggregated_boxplot(
+    summary: List[Dict[str, Any]],
+    col: str,
+    scale: alt.Scale,
+    column: Optional[str] = None,
+    column_spacing: Optional[float] = None,
+) -> alt.TopLevelMixin:
+    # Draw a boxplot from `_boxplot_summary` records, in the Vega-Lite style
+    base = alt.Chart().transform_filter(alt.datum.kind == "box")
+    layers = alt.layer(
+        base.mark_rule().encode(
+            y=alt.Y("lower:Q", scale=scale, title=col), y2="upper:Q"
+        ),
+        base.mark_bar(size=14).encode(y="q1:Q", y2="q3:Q"),
+        base.mark_tick(color="white", size=14).encode(y="median:Q"),
+        alt.Chart()
+        .transform_filter(alt.datum.kind == "outlier")
+        .mark_point()
+        .encode(y="value:Q"),
+        data=alt.Data(values=summary),
+    )
+    if column is None:
+        return layers
+
+    # The records carry no dtypes to infer the field type from
+    return layers.facet(
+        column=alt.Facet(f"{column}:N"),
+        spacing=alt.Undefined if column_spacing is None else column_spacing,
+    )
+
+
 def _plot_and_fig_text(
     data: pd.DataFrame,
     plot_cols: List[str],
     fig_text_prefix: str,
     subset_name: str,
-    column: Optional[alt.Column] = None,
+    column: Optional[str] = None,
+    column_spacing: Optional[float] = None,
     consistent_scale: bool = False,
+    stats: Optional[Dict[str, Dict[str, Any]]] = None,
+    pre_aggregate: bool = True,
 ) -> None:
-    
+    """
+    Plot a boxplot of each column side by side, optionally split into columns
+    by the values of the `column` field (`column_spacing` pixels apart), and
+    store the chart with the summary stats text.
+
+    With `pre_aggregate` the quartiles, whiskers and outliers of each column
+    (and group) are computed here and only that small table is embedded in the
+    chart, so the chart size and export time do not grow with the data.
+    Otherwise every row is embedded and Vega-Lite aggregates it on render.
+    """
+    if stats is None:
+        stats = {col: _column_stats(data[col]) for col in plot_cols}
+
+    build_start = time.perf_counter()
     chart = alt.hconcat(spacing=40)
     for col in plot_cols:
+        col_stats = stats[col]
         scale = alt.Scale(
             domain=(
-                data[col].min(),
-                data[col].max(),
+                col_stats["min"],
+                col_stats["max"],
             ),
             # domain=(
             #     0,
@@ -46,7 +177,15 @@ def _plot_and_fig_text(
             # padding=1,
             )
 
-        if column is None:
+        if pre_aggregate:
+            chart |= _aggregated_boxplot(
+                _boxplot_summary(data, col, column),
+                col,
+                scale,
+                column,
+                column_spacing,
+            )
+        elif column is None:
             chart |= (
                 alt.Chart(data)
                 .mark_boxplot()
@@ -66,26 +205,38 @@ def _plot_and_fig_text(
                         col,
                         scale=scale,
                     ),
-                    column=column,
+                    column=alt.Column(
+                        column,
+                        spacing=(
+                            alt.Undefined
+                            if column_spacing is None
+                            else column_spacing
+                        ),
+                    ),
                 )
             )
         fig_text_prefix += (
             f" {col} "
-            f"mean: {round(data[col].mean(), 2)}, "
-            f"std: {round(data[col].std(), 2)}, "
-            f"min: {round(data[col].min(), 2)}, "
-            f"max: {round(data[col].max(), 2)}."
-            f"median: {round(data[col].median(), 2)}."
-            f"major: {round(data[col].quantile([0.25, 0.75]), 2)}."
+            f"mean: {round(col_stats['mean'], 2)}, "
+            f"std: {round(col_stats['std'], 2)}, "
+            f"min: {round(col_stats['min'], 2)}, "
+            f"max: {round(col_stats['max'], 2)}."
+            f"median: {round(col_stats['median'], 2)}."
+            f"major: {round(col_stats['major'], 2)}."
         )
     chart.properties(title="Campaign Website Content")
 
     # Save fig and text
+    save_start = time.perf_counter()
     fig_save_path = PLOTTING_DIR / f"{subset_name}.png"
     fig_save_path.parent.mkdir(parents=True, exist_ok=True)
     chart.save(str(fig_save_path))
     with open(fig_save_path.with_suffix(".txt"), "w") as open_f:
         open_f.write(fig_text_prefix)
+    log.info(
+        f"{subset_name}: built chart in {save_start - build_start:.2f}s, "
+        f"saved in {time.perf_counter() - save_start:.2f}s"
+    )
 
 
 def plot_homepage_stats(
@@ -97,10 +248,6 @@ def plot_homepage_stats(
     """
     Input data should be the "flattened" dataset.
     """
-    # Load default data
-    if data is None:
-        data = load_access_eval_2022_dataset()
-
     score_cols = [
         DatasetFields.number_of_total_trackers_homepage,
         DatasetFields.behaviour_event_listeners_homepage,
@@ -112,6 +259,10 @@ def plot_homepage_stats(
         DatasetFields.session_recorders_homepage,
     ]
 
+    # Load default data
+    if data is None:
+        data = load_access_eval_2022_dataset(columns=[*score_cols, *keep_cols])
+
     # Create content plots
     _plot_and_fig_text(
         data=data[[*score_cols, *keep_cols]],
@@ -133,10 +284,6 @@ def plot_catalog_stats(
     """
     Input data should be the "flattened" dataset.
     """
-    # Load default data
-    if data is None:
-        data = load_access_eval_2022_dataset()
-
     score_cols = [
         DatasetFields.number_of_total_trackers_catalog,
         DatasetFields.behaviour_event_listeners_catalog,
@@ -148,6 +295,10 @@ def plot_catalog_stats(
         DatasetFields.session_recorders_catalog,
     ]
 
+    # Load default data
+    if data is None:
+        data = load_access_eval_2022_dataset(columns=[*score_cols, *keep_cols])
+
     # Create content plots
     _plot_and_fig_text(
         data=data[[*score_cols, *keep_cols]],
@@ -169,14 +320,11 @@ def plot_summary_stats(
     """
     Input data should be the "flattened" dataset.
     """
+    score_cols = SUMMARY_SCORE_COLS
+
     # Load default data
     if data is None:
-        data = load_access_eval_2022_dataset()
-
-    score_cols = [
-        DatasetFields.number_of_total_trackers_homepage,
-        DatasetFields.number_of_total_trackers_catalog,
-    ]
+        data = load_access_eval_2022_dataset(columns=[*score_cols, *keep_cols])
 
     # Create content plots
     _plot_and_fig_text(
@@ -191,115 +339,220 @@ def plot_summary_stats(
     )
 
 
-def plot_state_based_summary_stats(
+class SplitSummary(NamedTuple):
+    # The rows of the most common values of one dimension, and the summary
+    # statistics of each score column over those rows
+    dimension: str
+    subset_name: str
+    data: pd.DataFrame
+    stats: Dict[str, Dict[str, Any]]
+
+
+
+def compute_split_summaries(
+    data: pd.DataFrame,
+    dimensions: List[str],
+    score_cols: List[str] = SUMMARY_SCORE_COLS,
+    top_n: int = 5,
+) -> List[SplitSummary]:
+    """
+    Filter the data to the most common values of each dimension and compute
+    the summary statistics the split plots need, for every dimension at once.
+
+    The dimensions are converted to categoricals together, and each is
+    filtered through its codes. The score columns of every dimension's rows
+    are then stacked into one frame keyed by dimension, so the statistics of
+    all dimensions come from a single groupby.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        The "flattened" dataset with every dimension and score column.
+    dimensions: List[str]
+        The `DatasetFields` columns to split by.
+    score_cols: List[str]
+        The columns to summarize.
+        Default: SUMMARY_SCORE_COLS
+    top_n: int
+        The number of most common values of each dimension to keep.
+        Default: 5
+
+    Returns
+    -------
+    splits: List[SplitSummary]
+        The filtered rows and statistics for each dimension, in order.
+    """
+    # Match on the codes of categoricals rather than comparing strings
+    categories = data[dimensions].astype("category")
+    split_data = {}
+    for dimension in dimensions:
+        top_values = data[dimension].value_counts().nlargest(top_n).index
+        log.info(top_values)
+
+        values = categories[dimension]
+        top_codes = values.cat.categories.get_indexer(top_values)
+        mask = values.cat.codes.isin(top_codes[top_codes >= 0]).to_numpy()
+        split_data[dimension] = data.loc[mask, [*score_cols, dimension]]
+
+    # One groupby over the rows of every dimension. Dimensions with no rows
+    # are kept as empty groups.
+    stacked = pd.concat(
+        [rows[score_cols] for rows in split_data.values()], ignore_index=True
+    )
+    keys = pd.Categorical(
+        np.repeat(list(split_data), [len(rows) for rows in split_data.values()]),
+        categories=list(split_data),
+    )
+    grouped = stacked.groupby(keys, observed=False)
+    statistics = ["mean", "std", "min", "max", "median"]
+    summary = grouped.agg(statistics)
+    quartiles = grouped.quantile([0.25, 0.75])
+
+    splits = []
+    for dimension, rows in split_data.items():
+        stats = {}
+        for col in score_cols:
+            stats[col] = {
+                statistic: summary.at[dimension, (col, statistic)]
+                for statistic in statistics
+            }
+            stats[col]["major"] = quartiles.loc[dimension, col].rename_axis(None)
+        splits.append(
+            SplitSummary(
+                dimension=dimension,
+                subset_name=SPLIT_DIMENSIONS.get(dimension, f"{dimension}-split-"),
+                data=rows,
+                stats=stats,
+            )
+        )
+
+    return splits
+
+
+def plot_split_summary_stats(
     data: Optional[pd.DataFrame] = None,
+    dimensions: Optional[List[str]] = None,
+    top_n: int = 5,
 ) -> None:
-    
+    """
+    Plot the summary stats split by the most common values of each dimension.
+
+    Every filter and statistic is computed up front by
+    `compute_split_summaries`, and the charts are then built from those.
+
+    Parameters
+    ----------
+    data: Optional[pd.DataFrame]
+        The "flattened" dataset.
+        Default: None (load only the needed columns of the default dataset)
+    dimensions: Optional[List[str]]
+        The `DatasetFields` columns to split by.
+        Default: None (every dimension in SPLIT_DIMENSIONS)
+    top_n: int
+        The number of most common values of each dimension to plot.
+        Default: 5
+    """
+    if dimensions is None:
+        dimensions = list(SPLIT_DIMENSIONS)
+
     # Load default data
     if data is None:
-        data = load_access_eval_2022_dataset()
-
-    # Drop any locations with less than two campaigns (originally <= 2)
-    location_counts = data[DatasetFields.state].value_counts()
-    top_5_locations = location_counts.nlargest(5).index
-    log.info(top_5_locations)
-    data = data[data[DatasetFields.state].isin(top_5_locations)]
-
-    # Plot basic stats
-    plot_summary_stats(
-        data,
-        subset_name="location-split-",
-        keep_cols=[DatasetFields.state],
-        plot_kwargs={"column": alt.Column(DatasetFields.state, spacing=60)},
-    )
+        data = load_access_eval_2022_dataset(
+            columns=[*dimensions, *SUMMARY_SCORE_COLS]
+        )
 
+    for split in compute_split_summaries(
+        data, dimensions, SUMMARY_SCORE_COLS, top_n
+    ):
+        _plot_and_fig_text(
+            data=split.data,
+            plot_cols=SUMMARY_SCORE_COLS,
+            fig_text_prefix=(
+                "Distributions for key content statistics "
+                "gathered while scraping campaign websites."
+            ),
+            subset_name=f"{split.subset_name}content-stats",
+            column=split.dimension,
+            column_spacing=60,
+            stats=split.stats,
+        )
 
-def plot_automation_based_summary_stats(
+
+def plot_state_based_summary_stats(
     data: Optional[pd.DataFrame] = None,
 ) -> None:
+    plot_split_summary_stats(data, [DatasetFields.state])
 
-    # Load default data
-    if data is None:
-        data = load_access_eval_2022_dataset()
-
-    location_counts = data[DatasetFields.current_automation].value_counts()
-    top_5_locations = location_counts.nlargest(5).index
-    data = data[data[DatasetFields.current_automation].isin(top_5_locations)]
-
-    # Plot basic stats
-    plot_summary_stats(
-        data,
-        subset_name="current-automation-split-",
-        keep_cols=[DatasetFields.current_automation],
-        plot_kwargs={"column": alt.Column(DatasetFields.current_automation, spacing=60)},
-    )
+
+def plot_automation_based_summary_stats(
+    data: Optional[pd.DataFrame] = None,
+) -> None:
+    plot_split_summary_stats(data, [DatasetFields.current_automation])
 
 
 def plot_interface_based_summary_stats(
     data: Optional[pd.DataFrame] = None,
 ) -> None:
-    
-    # Load default data
-    if data is None:
-        data = load_access_eval_2022_dataset()
-
-    location_counts = data[DatasetFields.discovery_interface].value_counts()
-    top_5_locations = location_counts.nlargest(5).index
-    log.info(top_5_locations)
-    data = data[data[DatasetFields.discovery_interface].isin(top_5_locations)]
-
-    # Plot basic stats
-    plot_summary_stats(
-        data,
-        subset_name="discovery-interface-split-",
-        keep_cols=[DatasetFields.discovery_interface],
-        plot_kwargs={
-            "column": alt.Column(DatasetFields.discovery_interface, spacing=60)
-        },
-    )
+    plot_split_summary_stats(data, [DatasetFields.discovery_interface])
+
 
 def plot_ID_based_summary_stats(
     data: Optional[pd.DataFrame] = None,
 ) -> None:
-    
-    # Load default data
-    if data is None:
-        data = load_access_eval_2022_dataset()
-
-    location_counts = data[DatasetFields.item_ID].value_counts()
-    top_5_locations = location_counts.nlargest(5).index
-    log.info(top_5_locations)
-    data = data[data[DatasetFields.item_ID].isin(top_5_locations)]
-
-    # Plot basic stats
-    plot_summary_stats(
-        data,
-        subset_name="item-ID-split-",
-        keep_cols=[DatasetFields.item_ID],
-        plot_kwargs={
-            "column": alt.Column(DatasetFields.item_ID, spacing=60)
-        },
-    )
+    plot_split_summary_stats(data, [DatasetFields.item_ID])
+
 
 def plot_content_based_summary_stats(
     data: Optional[pd.DataFrame] = None,
 ) -> None:
-    
+    plot_split_summary_stats(data, [DatasetFields.web_content])
+
+
+def write_group_comparisons(
+    data: Optional[pd.DataFrame] = None,
+    dimensions: Optional[List[str]] = None,
+    top_n: int = 5,
+) -> Path:
+    """
+    Store the group comparison tests of the summary stats (see
+    `compute_group_comparisons`) as a CSV table next to the plots.
+
+    Parameters
+    ----------
+    data: Optional[pd.DataFrame]
+        The "flattened" dataset.
+        Default: None (load only the needed columns of the default dataset)
+    dimensions: Optional[List[str]]
+        The `DatasetFields` columns to compare the groups of.
+        Default: None (every dimension in SPLIT_DIMENSIONS)
+    top_n: int
+        The number of most common values of each dimension to compare, as in
+        the split plots.
+        Default: 5
+
+    Returns
+    -------
+    path: Path
+        The path the table was stored to.
+    """
+    if dimensions is None:
+        dimensions = list(SPLIT_DIMENSIONS)
+
     # Load default data
     if data is None:
-        data = load_access_eval_2022_dataset()
-
-    location_counts = data[DatasetFields.web_content].value_counts()
-    top_5_locations = location_counts.nlargest(5).index
-    log.info(top_5_locations)
-    data = data[data[DatasetFields.item_ID].isin(top_5_locations)]
-
-    # Plot basic stats
-    plot_summary_stats(
-        data,
-        subset_name="web-content-split-",
-        keep_cols=[DatasetFields.item_ID],
-        plot_kwargs={
-            "column": alt.Column(DatasetFields.item_ID, spacing=60)
-        },
-    )
\ No newline at end of file
+        data = load_access_eval_2022_dataset(
+            columns=[*dimensions, *SUMMARY_SCORE_COLS]
+        )
+
+    start = time.perf_counter()
+    comparisons = compute_group_comparisons(
+        data, SUMMARY_SCORE_COLS, dimensions, top_n
+    )
+    save_path = PLOTTING_DIR / GROUP_COMPARISONS_FILENAME
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    comparisons.to_csv(save_path, index=False)
+    log.info(
+        f"Stored {len(comparisons)} group comparisons to {save_path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return save_path
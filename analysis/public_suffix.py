@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import ipaddress
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from constants_2022 import ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST
+
+###############################################################################
+
+# Where the private (registry-operated, e.g. "github.io") rules start
+_PRIVATE_SECTION = "// ===BEGIN PRIVATE DOMAINS==="
+
+# Trie node markers, neither can be a DNS label
+_RULE = "."
+_EXCEPTION = "!"
+
+DEFAULT_CACHE_SIZE = 4096
+
+###############################################################################
+
+
+class PublicSuffixList:
+    """
+    An offline public suffix list (https://publicsuffix.org) compiled into a
+    trie of reversed domain labels, used to find the registrable domain
+    (eTLD+1) of a host.
+
+    Parameters
+    ----------
+    rules: Iterable[str]
+        The lines of a `public_suffix_list.dat` file. Comments and blank lines
+        are ignored.
+    include_private: bool
+        Also use the private section of the list. Private suffixes such as
+        "cloudfront.net" or "googleapis.com" make every customer subdomain its
+        own registrable domain, which splits CDN and API hosts away from the
+        tracker lists that name the parent domain.
+        Default: False (ICANN suffixes only)
+    cache_size: Optional[int]
+        The number of hosts to keep resolved results for. None keeps every
+        result.
+        Default: 4096
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[str],
+        include_private: bool = False,
+        cache_size: Optional[int] = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self._root: Dict[str, Any] = {}
+        for line in rules:
+            rule = line.strip()
+            if rule.startswith(_PRIVATE_SECTION) and not include_private:
+                break
+            if not rule or rule.startswith("//"):
+                continue
+            # Only the first whitespace separated word of a line is the rule
+            rule = rule.split()[0]
+            self._add_rule(rule)
+            try:
+                encoded = rule.encode("idna").decode("ascii")
+            except UnicodeError:
+                continue
+            if encoded != rule:
+                self._add_rule(encoded)
+
+        self._cached_registrable_domain = lru_cache(maxsize=cache_size)(
+            self._registrable_domain
+        )
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Union[str, Path] = ACCESS_EVAL_2022_PUBLIC_SUFFIX_LIST,
+        include_private: bool = False,
+        cache_size: Optional[int] = DEFAULT_CACHE_SIZE,
+    ) -> "PublicSuffixList":
+        """
+        Load and compile a `public_suffix_list.dat` file.
+
+        Parameters
+        ----------
+        path: Union[str, Path]
+            The path to the list.
+            Default: The list stored with the 2022 study data.
+        include_private: bool
+            Also use the private section of the list.
+            Default: False (ICANN suffixes only)
+        cache_size: Optional[int]
+            The number of hosts to keep resolved results for.
+            Default: 4096
+
+        Returns
+        -------
+        suffix_list: PublicSuffixList
+            The compiled list.
+        """
+        with open(path, "r", encoding="utf-8") as open_f:
+            return cls(
+                open_f, include_private=include_private, cache_size=cache_size
+            )
+
+    def _add_rule(self, rule: str) -> None:
+        exception = rule.startswith("!")
+        node = self._root
+        for label in reversed(rule.lstrip("!").lower().split(".")):
+            node = node.setdefault(label, {})
+        node[_EXCEPTION if exception else _RULE] = True
+
+    def _registrable_domain(self, host: str) -> Optional[str]:
+        host = host.strip().rstrip(".").lower()
+        if not host or ":" in host:
+            return None
+        try:
+            ipaddress.ip_address(host)
+            return None
+        except ValueError:
+            pass
+
+        labels = host.split(".")
+        if not all(labels):
+            return None
+
+        # The longest matching rule wins, exceptions beat wildcards, and with
+        # no matching rule the public suffix is the last label
+        suffix_length = 1
+        node = self._root
+        for depth, label in enumerate(reversed(labels), 1):
+            child = node.get(label)
+            if child is not None and child.get(_EXCEPTION):
+                suffix_length = depth - 1
+                break
+            if "*" in node:
+                suffix_length = depth
+            if child is None:
+                break
+            if child.get(_RULE):
+                suffix_length = depth
+            node = child
+
+        if len(labels) <= suffix_length:
+            return None
+        return ".".join(labels[-(suffix_length + 1) :])
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        """
+        Get the registrable domain (public suffix plus one label) of a host.
+
+        Results are kept in a bounded LRU cache, as the same tracker hosts
+        recur across most sites.
+
+        Parameters
+        ----------
+        host: str
+            The host name, e.g. "stats.g.doubleclick.net" or "foo.co.uk".
+
+        Returns
+        -------
+        domain: Optional[str]
+            The lowercased registrable domain, e.g. "doubleclick.net" or
+            "foo.co.uk". None for IP addresses, malformed hosts and hosts that
+            are themselves a public suffix.
+        """
+        return self._cached_registrable_domain(host)
+
+
+@lru_cache(maxsize=None)
+def get_public_suffix_list() -> PublicSuffixList:
+    """
+    Get the ICANN section of the public suffix list stored with the 2022 study
+    data, compiled once per process.
+    """
+    return PublicSuffixList.from_file()
+
+
+def registrable_domain(host: str) -> Optional[str]:
+    """
+    Get the registrable domain of a host using the public suffix list stored
+    with the 2022 study data. See `PublicSuffixList.registrable_domain`.
+    """
+    return get_public_suffix_list().registrable_domain(host)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from results_archive import ArchivedFile, ArchivedSite
+
+###############################################################################
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_results (
+    namespace TEXT NOT NULL,
+    site TEXT NOT NULL,
+    version TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (namespace, site)
+)
+"""
+
+###############################################################################
+
+
+def file_digest(
+    path: Union[str, Path, ArchivedFile], block_size: int = 1024 * 1024
+) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without reading it whole.
+
+    Parameters
+    ----------
+    path: Union[str, Path, ArchivedFile]
+        The file to hash, on disk or in a results archive.
+    block_size: int
+        The number of bytes to read at a time.
+        Default: 1 MiB
+
+    Returns
+    -------
+    digest: str
+        The hex digest of the file contents.
+    """
+    if isinstance(path, str):
+        path = Path(path)
+
+    sha = hashlib.sha256()
+    with path.open("rb") as open_f:
+        for block in iter(lambda: open_f.read(block_size), b""):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+class SiteResultCache:
+    """
+    A persistent SQLite cache of computed per-site results.
+
+    Each result is stored under its namespace (the pipeline that computed it)
+    and site directory name, together with the version of the code and inputs
+    used to compute it and the mtime, size and SHA-256 digest of the site's
+    `inspection.json`. A cached result is reused when the version matches and
+    either the mtime and size are unchanged or, if they changed (for example
+    because the archive was unpacked again), the content digest is unchanged.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        The SQLite database file. Created if it does not exist.
+    namespace: str
+        The name of the pipeline storing results, e.g. "core_2022".
+    version: str
+        A version string for the code and any shared inputs (such as the
+        Disconnect services file). Results stored under another version are
+        never reused.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        namespace: str,
+        version: str,
+    ) -> None:
+        self.path = Path(path)
+        self.namespace = namespace
+        self.version = version
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute(_SCHEMA)
+
+        # Fingerprints computed during `get`, reused by `put`
+        self._fingerprints: Dict[str, Tuple[int, int, Optional[str]]] = {}
+
+    def _fingerprint(
+        self, site: Union[Path, ArchivedSite]
+    ) -> Optional[Tuple[Union[Path, ArchivedFile], int, int]]:
+        results_file = site / SINGLE_PAGE_AXE_RESULTS_FILENAME
+        if not results_file.exists():
+            return None
+
+        stat = results_file.stat()
+        return results_file, stat.st_mtime_ns, stat.st_size
+
+    def get(self, site: Union[Path, ArchivedSite]) -> Optional[Any]:
+        """
+        Get the cached result for a site directory if it is still valid.
+
+        Parameters
+        ----------
+        site: Union[Path, ArchivedSite]
+            The site results directory, on disk or in a results archive.
+
+        Returns
+        -------
+        result: Optional[Any]
+            The cached result or None if there is no valid cached result.
+        """
+        fingerprint = self._fingerprint(site)
+        if fingerprint is None:
+            return None
+        results_file, mtime_ns, size = fingerprint
+
+        row = self._connection.execute(
+            "SELECT version, mtime_ns, size, digest, result FROM site_results "
+            "WHERE namespace = ? AND site = ?",
+            (self.namespace, site.name),
+        ).fetchone()
+        if row is None or row[0] != self.version:
+            self._fingerprints[site.name] = (mtime_ns, size, None)
+            return None
+
+        _, cached_mtime_ns, cached_size, cached_digest, result = row
+        if cached_mtime_ns == mtime_ns and cached_size == size:
+            return json.loads(result)
+
+        # The file was touched, only reuse the result if the content is the same
+        digest = file_digest(results_file)
+        if digest != cached_digest:
+            self._fingerprints[site.name] = (mtime_ns, size, digest)
+            return None
+
+        self._connection.execute(
+            "UPDATE site_results SET mtime_ns = ?, size = ? "
+            "WHERE namespace = ? AND site = ?",
+            (mtime_ns, size, self.namespace, site.name),
+        )
+        return json.loads(result)
+
+    def put(self, site: Union[Path, ArchivedSite], result: Any) -> None:
+        """
+        Store the result for a site directory.
+
+        Parameters
+        ----------
+        site: Union[Path, ArchivedSite]
+            The site results directory, on disk or in a results archive.
+        result: Any
+            The JSON serializable result computed for the site.
+        """
+        fingerprint = self._fingerprint(site)
+        if fingerprint is None:
+            return
+        results_file, mtime_ns, size = fingerprint
+
+        digest = None
+        if self._fingerprints.get(site.name, (None, None, None))[:2] == (
+            mtime_ns,
+            size,
+        ):
+            digest = self._fingerprints[site.name][2]
+        if digest is None:
+            digest = file_digest(results_file)
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO site_results "
+            "(namespace, site, version, mtime_ns, size, digest, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.namespace,
+                site.name,
+                self.version,
+                mtime_ns,
+                size,
+                digest,
+                json.dumps(result),
+            ),
+        )
+
+    def commit(self) -> None:
+        """
+        Write all pending changes to disk.
+        """
+        self._connection.commit()
+        self._fingerprints.clear()
+
+    def close(self) -> None:
+        """
+        Commit pending changes and close the database.
+        """
+        self.commit()
+        self._connection.close()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import mmap
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, List, NamedTuple, Set, Tuple, Union
+
+###############################################################################
+
+# Archives opened by this process, keyed by (path, use_mmap, pid) so that a
+# forked worker never shares a file offset with its parent. An archive may be
+# stored under both the path it was opened with and its resolved path.
+_OPEN_ARCHIVES: Dict[Tuple[str, bool, int], "ResultsArchive"] = {}
+
+###############################################################################
+
+
+class _SeekableMmap(mmap.mmap):
+    # zipfile checks `seekable`, which mmap objects only provide from 3.13
+    def seekable(self) -> bool:
+        return True
+
+
+class ArchivedStat(NamedTuple):
+    st_size: int
+    st_mtime_ns: int
+
+
+class ResultsArchive:
+    """
+    A blacklight results zip that is read in place instead of being unpacked.
+
+    The archive is expected to have the same layout as the unpacked results
+    directory: one `<site>/inspection.json` per site. Use
+    `open_results_archive` rather than this constructor so that each process
+    opens an archive only once.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        The path to the zip file.
+    use_mmap: bool
+        Memory map the archive instead of reading it through a file handle.
+        Reading members then needs no seek or read system calls, which helps
+        random access over many small members.
+        Default: False
+    """
+
+    def __init__(self, path: Union[str, Path], use_mmap: bool = False) -> None:
+        self.path = Path(path).resolve(strict=True)
+        self.use_mmap = use_mmap
+
+        self._file = open(self.path, "rb")
+        self._mmap = None
+        if use_mmap:
+            self._mmap = _SeekableMmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        self._zip = zipfile.ZipFile(self._mmap if use_mmap else self._file)
+
+        # Every directory that holds at least one member
+        self._dirs: Set[str] = set()
+        for name in self._zip.namelist():
+            for parent in PurePosixPath(name.rstrip("/")).parents:
+                self._dirs.add(str(parent))
+
+    def __contains__(self, site: str) -> bool:
+        return site in self._dirs
+
+    def site_names(self) -> List[str]:
+        """
+        Get the names of all top level (site) directories in the archive.
+        """
+        return [name for name in self._dirs if name != "." and "/" not in name]
+
+    def site(self, name: str) -> "ArchivedSite":
+        """
+        Get a picklable handle for a site directory in the archive.
+        """
+        return ArchivedSite(str(self.path), name, self.use_mmap)
+
+    def getinfo(self, member: str) -> zipfile.ZipInfo:
+        return self._zip.getinfo(member)
+
+    def open(self, member: str) -> IO[bytes]:
+        return self._zip.open(member)
+
+    def is_dir(self, member: str) -> bool:
+        return member in self._dirs
+
+    def close(self) -> None:
+        """
+        Close the archive and forget it in this process.
+        """
+        for key, open_archive in list(_OPEN_ARCHIVES.items()):
+            if open_archive is self:
+                del _OPEN_ARCHIVES[key]
+        self._zip.close()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+
+def open_results_archive(
+    path: Union[str, Path], use_mmap: bool = False
+) -> ResultsArchive:
+    """
+    Open a results archive, reusing the archive already opened by this process.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        The path to the zip file.
+    use_mmap: bool
+        Memory map the archive instead of reading it through a file handle.
+        Default: False
+
+    Returns
+    -------
+    archive: ResultsArchive
+        The open archive.
+    """
+    pid = os.getpid()
+    key = (str(path), use_mmap, pid)
+    if key not in _OPEN_ARCHIVES:
+        resolved_key = (str(Path(path).resolve(strict=True)), use_mmap, pid)
+        if resolved_key not in _OPEN_ARCHIVES:
+            _OPEN_ARCHIVES[resolved_key] = ResultsArchive(path, use_mmap)
+        _OPEN_ARCHIVES[key] = _OPEN_ARCHIVES[resolved_key]
+
+    return _OPEN_ARCHIVES[key]
+
+
+@dataclass(frozen=True)
+class ArchivedFile:
+    """
+    A file in a results archive with the parts of the `pathlib.Path` API used
+    by the analysis (`name`, `exists`, `stat` and `open`).
+    """
+
+    archive_path: str
+    member: str
+    use_mmap: bool = False
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    @property
+    def _archive(self) -> ResultsArchive:
+        return open_results_archive(self.archive_path, self.use_mmap)
+
+    def exists(self) -> bool:
+        try:
+            self._archive.getinfo(self.member)
+            return True
+        except KeyError:
+            return False
+
+    def stat(self) -> ArchivedStat:
+        info = self._archive.getinfo(self.member)
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return ArchivedStat(info.file_size, int(mtime * 1e9))
+
+    def open(self, mode: str = "r") -> IO:
+        if mode not in ("r", "rb"):
+            raise ValueError(f"Archived files are read only, got mode: '{mode}'")
+
+        open_f = self._archive.open(self.member)
+        if mode == "rb":
+            return open_f
+        return io.TextIOWrapper(open_f, encoding="utf-8")
+
+
+@dataclass(frozen=True)
+class ArchivedSite:
+    """
+    A site directory in a results archive with the parts of the `pathlib.Path`
+    API used by the analysis (`name`, `/`, `exists` and `is_dir`).
+
+    Only the archive path and member name are pickled, so handles can be sent
+    to worker processes, which each open the archive once on first use.
+    """
+
+    archive_path: str
+    member: str
+    use_mmap: bool = False
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    def __truediv__(self, name: str) -> ArchivedFile:
+        return ArchivedFile(
+            self.archive_path, f"{self.member}/{name}", self.use_mmap
+        )
+
+    def exists(self) -> bool:
+        return self.is_dir()
+
+    def is_dir(self) -> bool:
+        return open_results_archive(self.archive_path, self.use_mmap).is_dir(
+            self.member
+        )
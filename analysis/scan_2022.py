@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shlex
+import shutil
+import signal
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+import constants_2022
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from constants_2022 import DatasetFields
+from utils import clean_url
+
+###############################################################################
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(levelname)4s: %(module)s:%(lineno)4s %(asctime)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+# The directory scans are written to before they are moved into place
+PARTIAL_SCANS_DIRNAME = ".partial"
+
+# The number of characters of a failed collector's stderr to keep
+ERROR_TAIL_CHARS = 2000
+
+###############################################################################
+
+
+class Args(argparse.Namespace):
+    def __init__(self) -> None:
+        self.__parse()
+
+    def __parse(self) -> None:
+        p = argparse.ArgumentParser(
+            prog="scan-2022",
+            description=(
+                "Scan every library homepage and catalog with the local "
+                "blacklight collector, several at a time."
+            ),
+        )
+        p.add_argument(
+            "--library-data",
+            dest="library_data",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_PUBLIC_LIBRARIES,
+            help=(
+                "The CSV of libraries to scan. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_PUBLIC_LIBRARIES}"
+            ),
+        )
+        p.add_argument(
+            "--columns",
+            dest="columns",
+            nargs="+",
+            default=[DatasetFields.homepage_url, DatasetFields.catalog_url],
+            help="The url columns to scan. Default: Homepage Catalog",
+        )
+        p.add_argument(
+            "--out-dir",
+            dest="out_dir",
+            type=Path,
+            default=constants_2022.ACCESS_EVAL_2022_SCAN_RESULTS,
+            help=(
+                "The directory to store each site's results in, as "
+                "<clean url>/inspection.json. "
+                f"Default: {constants_2022.ACCESS_EVAL_2022_SCAN_RESULTS}"
+            ),
+        )
+        p.add_argument(
+            "--collector",
+            dest="collector",
+            type=shlex.split,
+            default=["node", str(constants_2022.ACCESS_EVAL_2022_COLLECTOR)],
+            help=(
+                "The command that scans the url given as its last argument "
+                "into <clean url>/ under its working directory. "
+                "Default: node example.js"
+            ),
+        )
+        p.add_argument(
+            "--concurrency",
+            dest="concurrency",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="The number of scans to run at once. Default: every core",
+        )
+        p.add_argument(
+            "--timeout",
+            dest="timeout",
+            type=float,
+            default=300,
+            help="The seconds a single scan may take. Default: 300",
+        )
+        p.add_argument(
+            "--retries",
+            dest="retries",
+            type=int,
+            default=2,
+            help="The number of times to retry a failed scan. Default: 2",
+        )
+        p.add_argument(
+            "--backoff",
+            dest="backoff",
+            type=float,
+            default=5,
+            help=(
+                "The seconds to wait before the first retry, doubled for "
+                "each retry after. Default: 5"
+            ),
+        )
+        p.add_argument(
+            "--rescan",
+            dest="rescan",
+            action="store_true",
+            help="Scan sites again even if they already have results.",
+        )
+        p.parse_args(namespace=self)
+
+
+###############################################################################
+
+
+class ScanResult(NamedTuple):
+    """
+    The outcome of scanning one site.
+
+    Attributes
+    ----------
+    url: str
+        The url that was scanned.
+    site: str
+        The cleaned url, which is also the name of the site's result directory.
+    status: str
+        "scanned", "skipped" (results already existed), "failed" or "timeout".
+    attempts: int
+        The number of times the collector was run.
+    seconds: float
+        The wall time spent on the site, including retries.
+    error: Optional[str]
+        The end of the collector's stderr for the last failed attempt.
+    """
+
+    url: str
+    site: str
+    status: str
+    attempts: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def collect_scan_urls(
+    urls: Iterable[object],
+) -> List[str]:
+    """
+    Pick one url to scan for each distinct result directory.
+
+    Parameters
+    ----------
+    urls: Iterable[object]
+        The library website urls, e.g. the Homepage and Catalog columns.
+        Anything that is not a non-empty string is skipped.
+
+    Returns
+    -------
+    urls: List[str]
+        The first url for each distinct cleaned url, in order.
+    """
+    by_site = {}
+    for url in urls:
+        if isinstance(url, str) and url.strip():
+            by_site.setdefault(clean_url(url.strip()), url.strip())
+
+    return list(by_site.values())
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    # The collector starts a browser, so stop its whole process group
+    if process.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _run_collector(
+    collector: Sequence[str],
+    url: str,
+    cwd: Path,
+    timeout: float,
+) -> Optional[str]:
+    # Run the collector once, returning None on success or else the error
+    process = await asyncio.create_subprocess_exec(
+        *collector,
+        url,
+        cwd=cwd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        raise
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+
+    if process.returncode != 0:
+        return (
+            f"Exited with {process.returncode}: "
+            f"{stderr.decode(errors='replace')[-ERROR_TAIL_CHARS:]}"
+        )
+    return None
+
+
+async def scan_site(
+    url: str,
+    out_dir: Path,
+    collector: Sequence[str],
+    semaphore: asyncio.Semaphore,
+    timeout: float = 300,
+    retries: int = 2,
+    backoff: float = 5,
+    rescan: bool = False,
+) -> ScanResult:
+    """
+    Scan one site with the collector, retrying with exponential backoff.
+
+    Each attempt runs in its own directory under `out_dir/.partial`, and the
+    site's results only replace `out_dir/<clean url>` once the attempt has
+    written an `inspection.json`, so an interrupted or failed scan never
+    leaves partial results in place.
+
+    Parameters
+    ----------
+    url: str
+        The url to scan.
+    out_dir: Path
+        The directory to store the site's results in.
+    collector: Sequence[str]
+        The collector command, which is given the url as its last argument.
+    semaphore: asyncio.Semaphore
+        Held while the collector runs, to bound the number of running scans.
+    timeout: float
+        The seconds a single attempt may take before it is killed.
+        Default: 300
+    retries: int
+        The number of times to retry a failed or timed out attempt.
+        Default: 2
+    backoff: float
+        The seconds to wait before the first retry, doubled (with jitter) for
+        each retry after.
+        Default: 5
+    rescan: bool
+        Scan the site even if it already has results.
+        Default: False
+
+    Returns
+    -------
+    result: ScanResult
+        The outcome of the scan.
+    """
+    site = clean_url(url)
+    results_dir = out_dir / site
+    if not rescan and (results_dir / SINGLE_PAGE_AXE_RESULTS_FILENAME).exists():
+        return ScanResult(url, site, "skipped", 0, 0.0)
+
+    start = time.perf_counter()
+    status = "failed"
+    error: Optional[str] = None
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            await asyncio.sleep(delay * random.uniform(1, 1.5))
+
+        partial_dir = out_dir / PARTIAL_SCANS_DIRNAME / f"{site}-{attempt}"
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        partial_dir.mkdir(parents=True)
+        try:
+            async with semaphore:
+                error = await _run_collector(collector, url, partial_dir, timeout)
+            status = "failed"
+            if error is None:
+                if (partial_dir / site / SINGLE_PAGE_AXE_RESULTS_FILENAME).exists():
+                    shutil.rmtree(results_dir, ignore_errors=True)
+                    shutil.move(str(partial_dir / site), str(results_dir))
+                    seconds = time.perf_counter() - start
+                    return ScanResult(url, site, "scanned", attempt + 1, seconds)
+                error = f"No {SINGLE_PAGE_AXE_RESULTS_FILENAME} was written"
+        except asyncio.TimeoutError:
+            status = "timeout"
+            error = f"Timed out after {timeout}s"
+        finally:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+
+        log.debug(f"Attempt {attempt + 1} for {url} failed: {error}")
+
+    return ScanResult(
+        url, site, status, retries + 1, time.perf_counter() - start, error
+    )
+
+
+async def scan_sites(
+    urls: Sequence[str],
+    out_dir: Union[str, Path],
+    collector: Sequence[str],
+    concurrency: int = 1,
+    timeout: float = 300,
+    retries: int = 2,
+    backoff: float = 5,
+    rescan: bool = False,
+) -> List[ScanResult]:
+    """
+    Scan many sites with the collector, running up to `concurrency` at once.
+
+    See `scan_site` for the parameters shared with it.
+
+    Parameters
+    ----------
+    urls: Sequence[str]
+        The urls to scan, one per result directory (see `collect_scan_urls`).
+    out_dir: Union[str, Path]
+        The directory to store each site's results in, as
+        `<clean url>/inspection.json`.
+    collector: Sequence[str]
+        The collector command, which is given each url as its last argument.
+    concurrency: int
+        The largest number of collectors to run at once.
+        Default: 1
+
+    Returns
+    -------
+    results: List[ScanResult]
+        The outcome of each scan, in the same order as `urls`.
+    """
+    # Imported here so `--help` stays fast
+    from tqdm import tqdm
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    tasks = [
+        asyncio.ensure_future(
+            scan_site(
+                url,
+                out_dir,
+                collector,
+                semaphore,
+                timeout=timeout,
+                retries=retries,
+                backoff=backoff,
+                rescan=rescan,
+            )
+        )
+        for url in urls
+    ]
+    try:
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
+            result = await task
+            if result.status in ("failed", "timeout"):
+                log.warning(
+                    f"Could not scan {result.url} after {result.attempts} "
+                    f"attempts: {result.error}"
+                )
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Drop the staging directory once every scan has finished with it
+    shutil.rmtree(out_dir / PARTIAL_SCANS_DIRNAME, ignore_errors=True)
+
+    return [task.result() for task in tasks]
+
+
+def run_scans(
+    library_data: Union[str, Path],
+    out_dir: Union[str, Path],
+    collector: Sequence[str],
+    columns: Sequence[str] = (
+        DatasetFields.homepage_url,
+        DatasetFields.catalog_url,
+    ),
+    **kwargs: object,
+) -> List[ScanResult]:
+    """
+    Scan every distinct homepage and catalog in a library CSV.
+
+    Parameters
+    ----------
+    library_data: Union[str, Path]
+        The path to the library CSV.
+    out_dir: Union[str, Path]
+        The directory to store each site's results in.
+    collector: Sequence[str]
+        The collector command, which is given each url as its last argument.
+    columns: Sequence[str]
+        The url columns to scan.
+        Default: the Homepage and Catalog columns
+    **kwargs
+        Passed on to `scan_sites`.
+
+    Returns
+    -------
+    results: List[ScanResult]
+        The outcome of each scan.
+    """
+    import pandas as pd
+
+    data = pd.read_csv(Path(library_data).resolve(strict=True), usecols=columns)
+    urls = collect_scan_urls(
+        url for column in columns for url in data[column].tolist()
+    )
+    log.info(f"Scanning {len(urls)} distinct sites from {library_data}")
+
+    results = asyncio.run(scan_sites(urls, out_dir, collector, **kwargs))
+
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    log.info(f"Scan results: {counts}")
+    return results
+
+
+###############################################################################
+
+
+def main() -> None:
+    try:
+        args = Args()
+        results = run_scans(
+            args.library_data,
+            args.out_dir,
+            args.collector,
+            columns=args.columns,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            retries=args.retries,
+            backoff=args.backoff,
+            rescan=args.rescan,
+        )
+        if any(result.status in ("failed", "timeout") for result in results):
+            sys.exit(1)
+
+    except Exception as e:
+        log.error("=============================================")
+        log.error("\n\n" + traceback.format_exc())
+        log.error("=============================================")
+        log.error("\n\n" + str(e) + "\n")
+        log.error("=============================================")
+        sys.exit(1)
+
+
+###############################################################################
+# Allow caller to directly run this module (usually in development scenarios)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats as sci_stats
+
+###############################################################################
+
+# The number of bootstrap resamples drawn for each median
+DEFAULT_RESAMPLES = 10_000
+
+# The coverage of the bootstrap confidence intervals
+DEFAULT_CONFIDENCE = 0.95
+
+# Resamples are drawn in batches of at most this many (resample x value) cells
+MAX_BOOTSTRAP_CELLS = 2**22
+
+# The columns of the table `compute_group_comparisons` returns
+GROUP_COMPARISON_COLUMNS = [
+    "metric",
+    "dimension",
+    "test",
+    "group",
+    "other_group",
+    "n",
+    "other_n",
+    "statistic",
+    "p_value",
+    "p_adjusted",
+    "median",
+    "ci_low",
+    "ci_high",
+]
+
+###############################################################################
+
+
+def bootstrap_median_ci(
+    values: np.ndarray,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    rng: Optional[np.random.Generator] = None,
+) -> Tuple[float, float]:
+    """
+    A percentile bootstrap confidence interval of the median.
+
+    A resample only depends on how many times each distinct value is drawn, so
+    each batch of resamples is drawn at once as a (resamples x distinct values)
+    array of multinomial counts, and every median is read off its cumulative
+    counts. Tracker counts have few distinct values, so this is much cheaper
+    than drawing and sorting every resampled value.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        The sample. Missing values are ignored.
+    resamples: int
+        The number of resamples to draw.
+        Default: 10000
+    confidence: float
+        The coverage of the interval.
+        Default: 0.95
+    rng: Optional[np.random.Generator]
+        The random generator to draw with.
+        Default: None (a new unseeded generator)
+
+    Returns
+    -------
+    ci: Tuple[float, float]
+        The lower and upper bound of the interval, NaN for an empty sample.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return (np.nan, np.nan)
+
+    uniques, counts = np.unique(values, return_counts=True)
+    probabilities = counts / n
+    # The positions of the middle value(s) in a sorted resample
+    lower_middle, upper_middle = (n - 1) // 2, n // 2
+
+    medians = np.empty(resamples)
+    batch = max(1, MAX_BOOTSTRAP_CELLS // len(uniques))
+    for start in range(0, resamples, batch):
+        stop = min(start + batch, resamples)
+        cumulative = np.cumsum(
+            rng.multinomial(n, probabilities, size=stop - start), axis=1
+        )
+        # The first distinct value whose cumulative count passes a position
+        lower = (cumulative <= lower_middle).sum(axis=1)
+        upper = (cumulative <= upper_middle).sum(axis=1)
+        medians[start:stop] = (uniques[lower] + uniques[upper]) / 2
+
+    alpha = (1 - confidence) / 2
+    ci_low, ci_high = np.quantile(medians, [alpha, 1 - alpha])
+    return (float(ci_low), float(ci_high))
+
+
+def holm_adjust(p_values: np.ndarray) -> np.ndarray:
+    """
+    Holm-Bonferroni adjust a family of p-values for multiple comparisons.
+    """
+    p_values = np.asarray(p_values, dtype=float)
+    order = np.argsort(p_values)
+    m = len(p_values)
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(
+        np.maximum.accumulate((m - np.arange(m)) * p_values[order]), 1.0
+    )
+    return adjusted
+
+
+def _group_values(
+    data: pd.DataFrame,
+    metric: str,
+    dimension: str,
+    top_n: Optional[int],
+) -> Dict[Any, np.ndarray]:
+    # The non missing values of a metric for each (most common) dimension value
+    rows = data[[dimension, metric]].dropna()
+    keep = rows[dimension].value_counts()
+    if top_n is not None:
+        keep = keep.nlargest(top_n)
+    rows = rows[rows[dimension].isin(keep.index)]
+    return {
+        key: group[metric].to_numpy(dtype=float)
+        for key, group in rows.groupby(dimension, observed=True, sort=True)
+    }
+
+
+def compute_group_comparisons(
+    data: pd.DataFrame,
+    metrics: List[str],
+    dimensions: List[str],
+    top_n: Optional[int] = 5,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Compare the distribution of each metric between the groups of each
+    dimension, e.g. tracker counts by state or automation system vendor.
+
+    For every metric and dimension this runs:
+
+    * a Kruskal-Wallis test over all groups ("kruskal")
+    * a two-sided Mann-Whitney U test for every pair of groups
+      ("mannwhitney"), with Holm adjusted p-values over those pairs
+    * a bootstrap confidence interval of each group's median
+      ("bootstrap_median", see `bootstrap_median_ci`)
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        The "flattened" dataset with every metric and dimension column.
+    metrics: List[str]
+        The `DatasetFields` columns to compare, e.g. SUMMARY_SCORE_COLS.
+    dimensions: List[str]
+        The `DatasetFields` columns to group by.
+    top_n: Optional[int]
+        Only compare the most common values of each dimension, as in the split
+        plots.
+        Default: 5 (None compares every value)
+    resamples: int
+        The number of bootstrap resamples for each median.
+        Default: 10000
+    confidence: float
+        The coverage of the median confidence intervals.
+        Default: 0.95
+    seed: int
+        The seed of the bootstrap, so the table is reproducible.
+        Default: 0
+
+    Returns
+    -------
+    comparisons: pd.DataFrame
+        One row per test, with the GROUP_COMPARISON_COLUMNS. Columns a test
+        does not use are missing.
+    """
+    rng = np.random.default_rng(seed)
+
+    records: List[Dict[str, Any]] = []
+    for metric in metrics:
+        for dimension in dimensions:
+            groups = _group_values(data, metric, dimension, top_n)
+            base = {"metric": metric, "dimension": dimension}
+
+            for key, values in groups.items():
+                ci_low, ci_high = bootstrap_median_ci(
+                    values, resamples, confidence, rng
+                )
+                records.append(
+                    {
+                        **base,
+                        "test": "bootstrap_median",
+                        "group": key,
+                        "n": len(values),
+                        "median": float(np.median(values)),
+                        "ci_low": ci_low,
+                        "ci_high": ci_high,
+                    }
+                )
+
+            if len(groups) < 2:
+                continue
+
+            # Identical values everywhere leave nothing to rank, which gives
+            # NaN (or raises, in older scipy versions)
+            try:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    statistic, p_value = sci_stats.kruskal(*groups.values())
+            except ValueError:
+                statistic, p_value = np.nan, np.nan
+            records.append(
+                {
+                    **base,
+                    "test": "kruskal",
+                    "n": sum(len(values) for values in groups.values()),
+                    "statistic": float(statistic),
+                    "p_value": float(p_value),
+                }
+            )
+
+            pairs = []
+            for (key, values), (other_key, other_values) in combinations(
+                groups.items(), 2
+            ):
+                statistic, p_value = sci_stats.mannwhitneyu(
+                    values, other_values, alternative="two-sided"
+                )
+                pairs.append(
+                    {
+                        **base,
+                        "test": "mannwhitney",
+                        "group": key,
+                        "other_group": other_key,
+                        "n": len(values),
+                        "other_n": len(other_values),
+                        "statistic": float(statistic),
+                        "p_value": float(p_value),
+                    }
+                )
+            adjusted = holm_adjust([pair["p_value"] for pair in pairs])
+            for pair, p_adjusted in zip(pairs, adjusted):
+                pair["p_adjusted"] = float(p_adjusted)
+            records.extend(pairs)
+
+    return pd.DataFrame.from_records(records, columns=GROUP_COMPARISON_COLUMNS)
@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+###############################################################################
+
+# The analysis modules import each other as top level modules, the same as when
+# the scripts are run from the analysis directory
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from blocklists import FilterMatcher
+from constants_2022 import ACCESS_EVAL_2022_BLOCKLISTS
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+RULES = [
+    "||tracker.com^",
+    "||cdn.example.com/ads/",
+    "/pixel.gif?$third-party",
+    "/beacon/*$domain=news.org|~sports.news.org",
+    "||widgets.com^$domain=~shop.org",
+    "@@||tracker.com/consent^",
+    "@@/pixel.gif?allowed=$domain=partner.org",
+    "||metrics.net^",
+    "@@||metrics.net^",
+    "||metrics.net/collect^$important",
+    "~ignored$third-party,~third-party",
+    "@@||tracker.com/page$document",
+]
+
+###############################################################################
+
+
+@pytest.fixture(scope="module")
+def matcher() -> FilterMatcher:
+    return FilterMatcher(RULES)
+
+
+@pytest.mark.parametrize(
+    "url, source_host, expected",
+    [
+        # Host anchors match the host and its subdomains only, up to a separator
+        ("https://tracker.com/t.js", None, "||tracker.com^"),
+        ("https://a.b.tracker.com/", None, "||tracker.com^"),
+        ("https://tracker.com.evil.org/t.js", None, None),
+        ("https://nottracker.com/t.js", None, None),
+        ("https://cdn.example.com/ads/1.png", None, "||cdn.example.com/ads/"),
+        ("https://cdn.example.com/ad/1.png", None, None),
+        # Every classified request is third party
+        (
+            "https://img.site.io/pixel.gif?id=1",
+            "library.org",
+            "/pixel.gif?$third-party",
+        ),
+        # Sites a rule is limited to, and excluded from
+        (
+            "https://cdn.io/beacon/1",
+            "www.news.org",
+            "/beacon/*$domain=news.org|~sports.news.org",
+        ),
+        ("https://cdn.io/beacon/1", "sports.news.org", None),
+        ("https://cdn.io/beacon/1", "library.org", None),
+        ("https://cdn.io/beacon/1", None, None),
+        ("https://widgets.com/w.js", "library.org", "||widgets.com^$domain=~shop.org"),
+        ("https://widgets.com/w.js", "www.shop.org", None),
+        # Exceptions, and exceptions limited to some sites
+        ("https://tracker.com/consent", None, None),
+        ("https://tracker.com/consent/x", None, None),
+        ("https://tracker.com/consents", None, "||tracker.com^"),
+        ("https://img.site.io/pixel.gif?allowed=1", "partner.org", None),
+        (
+            "https://img.site.io/pixel.gif?allowed=1",
+            "library.org",
+            "/pixel.gif?$third-party",
+        ),
+        # Important rules override exceptions
+        ("https://metrics.net/page", None, None),
+        (
+            "https://metrics.net/collect?v=1",
+            None,
+            "||metrics.net/collect^$important",
+        ),
+    ],
+)
+def test_rule_verdicts(
+    matcher: FilterMatcher,
+    url: str,
+    source_host: Optional[str],
+    expected: Optional[str],
+) -> None:
+    assert matcher.match(url, source_host) == expected
+    # The remembered verdict of a recurring url is the same
+    assert matcher.match(url, source_host) == expected
+
+
+def test_unusable_rules_are_dropped(matcher: FilterMatcher) -> None:
+    # First party only and page level rules never apply to a recorded request
+    assert len(matcher) < len(RULES)
+    assert matcher.match("https://x.org/~ignored") is None
+
+
+def test_collector_verdicts_are_matched() -> None:
+    # Every request the collector classified with EasyPrivacy is blocked
+    with open(TEST_DATA_DIR / "veteransunited-1.0.3" / "inspection.json") as open_f:
+        trackers = json.load(open_f)["reports"]["third_party_trackers"]
+    urls: List[str] = [
+        tracker["url"]
+        for tracker in trackers
+        if tracker["data"]["listName"] == "easyprivacy.txt"
+    ]
+    assert urls
+
+    matcher = FilterMatcher.from_file(ACCESS_EVAL_2022_BLOCKLISTS / "easyprivacy.txt")
+    unblocked = [
+        url for url in urls if matcher.match(url, "www.veteransunited.com") is None
+    ]
+    assert unblocked == []
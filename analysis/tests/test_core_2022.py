@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pandas as pd
+import pytest
+
+import core_2022
+from blocklists import FilterMatcher
+from inspection import InspectionSummary, read_inspection_summary
+from vendor_names import store_vendor_name_map
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+###############################################################################
+
+
+@pytest.fixture(scope="module")
+def summary() -> InspectionSummary:
+    return read_inspection_summary(
+        TEST_DATA_DIR / "veteransunited-1.0.3" / "inspection.json",
+        summed_reports=core_2022.SUMMED_REPORTS,
+    )
+
+
+###############################################################################
+
+
+def test_blocked_requests_and_hosts_are_counted_apart(
+    summary: InspectionSummary,
+) -> None:
+    blocklists = {
+        # Blocks a whole host, so both its requests and the host itself
+        "easylist": FilterMatcher(["||google-analytics.com^$third-party"]),
+        # Only blocks a path, which no host root url has
+        "easyprivacy": FilterMatcher(["/collect?"]),
+    }
+    metrics = core_2022._metrics_from_summary(
+        summary, "www.veteransunited.com", blocklists
+    )
+
+    analytics_requests = [
+        url
+        for url in summary.third_party_tracker_urls
+        if urlsplit(url).hostname.endswith("google-analytics.com")
+    ]
+    assert analytics_requests
+    assert metrics.easylist_blocked_requests == len(analytics_requests)
+    assert metrics.easylist_blocked_hosts == len(
+        {
+            host
+            for host in summary.third_party_hosts
+            if host and host.endswith("google-analytics.com")
+        }
+    )
+
+    assert metrics.easyprivacy_blocked_requests == sum(
+        "/collect?" in url for url in summary.third_party_tracker_urls
+    )
+    assert metrics.easyprivacy_blocked_hosts == 0
+
+
+def test_blocked_counts_need_blocklists(summary: InspectionSummary) -> None:
+    metrics = core_2022._metrics_from_summary(summary, "www.veteransunited.com")
+
+    assert metrics.easylist_blocked_requests == 0
+    assert metrics.easylist_blocked_hosts == 0
+
+
+def test_vendor_names_are_canonicalized_on_load(tmp_path: Path) -> None:
+    data = pd.DataFrame({"ILS Name": ["SirsiDynix", "Sirsi Dynix", "Koha"]})
+    dataset = core_2022.store_access_eval_2022_dataset(data, tmp_path / "data.csv")
+    vendor_names = store_vendor_name_map(
+        {"SirsiDynix": "SirsiDynix", "Sirsi Dynix": "SirsiDynix"},
+        tmp_path / "vendor_names.csv",
+    )
+    core_2022.clear_loaded_datasets()
+
+    loaded = core_2022.load_access_eval_2022_dataset(
+        dataset, vendor_names=vendor_names
+    )
+    assert loaded["ILS Name"].tolist() == ["SirsiDynix", "SirsiDynix", "Koha"]
+
+    # The stored dataset keeps the raw names, and a missing table maps none
+    assert pd.read_csv(dataset)["ILS Name"].tolist() == data["ILS Name"].tolist()
+    unmapped = core_2022.load_access_eval_2022_dataset(
+        dataset, vendor_names=tmp_path / "missing.csv"
+    )
+    assert unmapped["ILS Name"].tolist() == data["ILS Name"].tolist()
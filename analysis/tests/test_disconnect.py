@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+import disconnect
+from constants_2022 import ACCESS_EVAL_2022_DISCONNECT_SERVICES
+from disconnect import DisconnectIndex
+from domain_owners import OwnerIndex
+from inspection import read_inspection_summary
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+# Every blacklight report with third party hosts
+REPORTS = sorted(
+    path
+    for path in TEST_DATA_DIR.glob("*/inspection.json")
+    if json.loads(path.read_text()).get("hosts", {}).get("requests")
+)
+
+# The categories the original scan deduplicated
+DEDUPLICATED = [
+    "Email",
+    "Content",
+    "Analytics",
+    "FingerprintingGeneral",
+    "Social",
+    "Disconnect",
+]
+
+###############################################################################
+
+
+@pytest.fixture(scope="module")
+def disconnect_json() -> Dict:
+    with open(ACCESS_EVAL_2022_DISCONNECT_SERVICES, "r") as open_f:
+        return json.load(open_f)
+
+
+@pytest.fixture(scope="module")
+def disconnect_index(disconnect_json: Dict) -> DisconnectIndex:
+    return DisconnectIndex(disconnect_json)
+
+
+def _nested_scan(tracker: str, disconnect_json: Dict) -> List[str]:
+    # The category of every services.json string containing the tracker, as
+    # the original scan over every category, service, url and domain found them
+    categories = []
+    for category, entries in disconnect_json["categories"].items():
+        for entry in entries:
+            for value_dict in entry.values():
+                for url, values in value_dict.items():
+                    if tracker in url:
+                        categories.append(category)
+                    for value in values:
+                        if tracker in value:
+                            categories.append(category)
+    return categories
+
+
+def _trackers(host: str) -> List[str]:
+    # The tracker the original scan derived from a host (the last two labels),
+    # the registrable domain used now, and the host itself
+    tracker = host.replace("www.", "")
+    parts = host.split(".")
+    if ".google.com" not in host and len(parts) >= 3:
+        tracker = ".".join(parts[-2:])
+    return [tracker, host.replace("www.", ""), host]
+
+
+###############################################################################
+
+
+@pytest.mark.parametrize("report", REPORTS, ids=lambda path: path.parent.name)
+def test_lookup_matches_nested_scan(
+    report: Path,
+    disconnect_json: Dict,
+    disconnect_index: DisconnectIndex,
+) -> None:
+    summary = read_inspection_summary(report)
+    assert summary.third_party_hosts
+
+    for host in filter(None, summary.third_party_hosts):
+        for tracker in _trackers(host):
+            assert [
+                category for category, _ in disconnect_index.lookup(tracker)
+            ] == _nested_scan(tracker, disconnect_json), tracker
+
+
+@pytest.mark.parametrize("report", REPORTS, ids=lambda path: path.parent.name)
+def test_metrics_match_nested_scan(
+    report: Path,
+    disconnect_json: Dict,
+    disconnect_index: DisconnectIndex,
+) -> None:
+    summary = read_inspection_summary(report)
+    metrics = disconnect._metrics_from_summary(summary, disconnect_index)
+
+    # The original scan, with the tracker derived from each host as it is now
+    expected: Dict[str, List[str]] = {
+        category: [] for category in disconnect_json["categories"]
+    }
+    for host in filter(None, summary.third_party_hosts):
+        tracker = host.replace("www.", "")
+        if ".google.com" not in host:
+            tracker = disconnect.registrable_domain(host) or tracker
+        for category in _nested_scan(tracker, disconnect_json):
+            expected[category].append(host)
+
+    for category, hosts in expected.items():
+        if category in DEDUPLICATED:
+            assert sorted(getattr(metrics, category)) == sorted(set(hosts))
+        else:
+            assert getattr(metrics, category) == hosts
+
+
+def test_lookup_of_empty_tracker_matches_everything(
+    disconnect_json: Dict,
+    disconnect_index: DisconnectIndex,
+) -> None:
+    assert [
+        category for category, _ in disconnect_index.lookup("")
+    ] == _nested_scan("", disconnect_json)
+
+
+def test_owners_skip_missing_hosts(disconnect_index: DisconnectIndex) -> None:
+    # kohls-new.com has a request the collector recorded no host for
+    summary = read_inspection_summary(
+        TEST_DATA_DIR / "kohls-new.com" / "inspection.json"
+    )
+    assert None in summary.third_party_hosts
+
+    owner_index = OwnerIndex.from_file()
+    metrics = disconnect._metrics_from_summary(
+        summary, disconnect_index, owner_index
+    )
+    assert metrics.Owners == owner_index.count_hosts(
+        filter(None, summary.third_party_hosts)
+    )
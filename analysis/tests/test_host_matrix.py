@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from host_matrix import HostMatrix
+
+###############################################################################
+
+
+@pytest.fixture
+def host_matrix() -> HostMatrix:
+    return HostMatrix.from_site_hosts(
+        ["a.org", "b.org", "c.org"],
+        [
+            ["x.com", "y.com", "x.com", ""],
+            ["y.com", "z.com"],
+            ["y.com"],
+        ],
+        {"a.org": 0, "b.org": 1, "c.org": 2, "a.org/about": 0},
+    )
+
+
+###############################################################################
+
+
+def test_save_and_load_round_trip(host_matrix: HostMatrix, tmp_path: Path) -> None:
+    path = host_matrix.save(tmp_path / "hosts.npz")
+    loaded = HostMatrix.load(path)
+
+    assert (loaded.matrix != host_matrix.matrix).nnz == 0
+    assert loaded.hosts.tolist() == ["x.com", "y.com", "z.com"]
+    assert loaded.sites.tolist() == ["a.org", "b.org", "c.org"]
+    assert loaded.url_rows == host_matrix.url_rows
+    assert loaded.rows_for(["https://a.org/about", "https://d.org/"]).tolist() == [
+        0,
+        -1,
+    ]
+
+
+def test_prevalence(host_matrix: HostMatrix) -> None:
+    prevalence = host_matrix.prevalence()
+
+    assert prevalence.to_dict() == {"y.com": 3, "x.com": 1, "z.com": 1}
+    assert prevalence.index.tolist() == ["y.com", "x.com", "z.com"]
+
+
+def test_cooccurrence(host_matrix: HostMatrix) -> None:
+    # Hosts in vocabulary order: x.com, y.com, z.com
+    np.testing.assert_array_equal(
+        host_matrix.cooccurrence().toarray(),
+        [
+            [1, 1, 0],
+            [1, 3, 1],
+            [0, 1, 1],
+        ],
+    )
+    assert host_matrix.cooccurrence_table(["y.com", "z.com"]).to_numpy().tolist() == [
+        [3, 1],
+        [1, 1],
+    ]
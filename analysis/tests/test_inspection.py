@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+
+import pytest
+
+import core_2022
+from inspection import read_inspection_summary
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+# Small enough that most strings and scalars are cut across chunks
+CHUNK_SIZE = 7
+
+# Escaped quotes and backslashes, brackets inside strings, unicode escapes, and
+# values long enough to span many chunks
+ESCAPED_INSPECTION = {
+    "uri_ins": 'https://a.org/?q="{[x]}"',
+    "reports": {
+        "cookies": [{"name": 'a\\"b', "value": "}]" * 20}],
+        "third_party_trackers": [
+            {"url": 'https://t.com/p?a="1"&b=\\', "data": {"x": [1, 2.5e3]}},
+            {"url": "https://t.com/café/" + "x" * 50, "data": None},
+            {"url": "https://t.com/{}[],:", "data": True},
+        ],
+        "canvas_fingerprinters": {
+            "fingerprinters": ["a", "b\\\\"],
+            "styles": {"font": ['"', "\\"]},
+        },
+        "key_logging": {},
+    },
+    "hosts": {
+        "requests": {
+            "first_party": ["a.org"],
+            "third_party": ["t.com", "x\\\"y.com", "über.de"],
+        },
+        "links": {"third_party": ["ignored.com"]},
+    },
+}
+
+###############################################################################
+
+
+def _assert_stream_matches_load(path: Path) -> None:
+    loaded = read_inspection_summary(
+        path, summed_reports=core_2022.SUMMED_REPORTS, stream_threshold=None
+    )
+    streamed = read_inspection_summary(
+        path,
+        summed_reports=core_2022.SUMMED_REPORTS,
+        chunk_size=CHUNK_SIZE,
+        stream_threshold=0,
+    )
+    assert streamed == loaded
+
+
+@pytest.mark.parametrize(
+    "path",
+    sorted(TEST_DATA_DIR.glob("*/inspection.json")),
+    ids=lambda path: path.parent.name,
+)
+def test_stream_matches_load(path: Path) -> None:
+    _assert_stream_matches_load(path)
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_stream_matches_load_with_escapes(
+    tmp_path: Path, ensure_ascii: bool
+) -> None:
+    path = tmp_path / "inspection.json"
+    with open(path, "w", encoding="utf-8") as open_f:
+        json.dump(ESCAPED_INSPECTION, open_f, indent=1, ensure_ascii=ensure_ascii)
+
+    _assert_stream_matches_load(path)
+    summary = read_inspection_summary(path, chunk_size=CHUNK_SIZE, stream_threshold=0)
+    assert summary.third_party_tracker_urls == [
+        tracker["url"]
+        for tracker in ESCAPED_INSPECTION["reports"]["third_party_trackers"]
+    ]
+    assert summary.third_party_hosts == ["t.com", 'x\\"y.com', "über.de"]
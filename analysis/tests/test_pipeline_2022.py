@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from constants import SINGLE_PAGE_EVENT_LOG_FILENAME
+from constants_2022 import DatasetFields
+from event_log import combine_library_data_with_event_logs
+from pipeline_2022 import combine_library_data_with_all_results
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+EVENT_LOG_COLUMNS = [
+    "logged_events",
+    "instrumented_api_calls",
+    "event_types",
+    "instrumented_api_symbols",
+    "instrumented_api_scripts",
+]
+
+###############################################################################
+
+
+@pytest.fixture(scope="module")
+def results_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    # Sites with a report and event log, and one with only a report
+    results_dir = tmp_path_factory.mktemp("results")
+    template = TEST_DATA_DIR / "veteransunited-1.0.3"
+    shutil.copytree(template, results_dir / "library.org")
+    shutil.copytree(template, results_dir / "catalog.library.org")
+    (results_dir / "catalog.library.org" / SINGLE_PAGE_EVENT_LOG_FILENAME).unlink()
+    return results_dir
+
+
+@pytest.fixture(scope="module")
+def library_data() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            DatasetFields.homepage_url: [
+                "https://library.org/",
+                "https://library.org/about",
+                "https://missing.org/",
+            ],
+            DatasetFields.catalog_url: [
+                "https://catalog.library.org/",
+                None,
+                "https://library.org/search",
+            ],
+        }
+    )
+
+
+###############################################################################
+
+
+def test_event_logs_are_opt_in(
+    library_data: pd.DataFrame, results_dir: Path
+) -> None:
+    full_data = combine_library_data_with_all_results(library_data, results_dir)
+
+    assert not any(column.startswith("logged_events") for column in full_data)
+
+
+def test_event_logs_match_aggregator(
+    library_data: pd.DataFrame, results_dir: Path
+) -> None:
+    full_data = combine_library_data_with_all_results(
+        library_data, results_dir, event_logs=True
+    )
+
+    for url_column, suffix in [
+        (DatasetFields.homepage_url, "_homepage"),
+        (DatasetFields.catalog_url, "_catalog"),
+    ]:
+        expected = combine_library_data_with_event_logs(
+            library_data, results_dir, url_column=url_column
+        )
+        for column in EVENT_LOG_COLUMNS:
+            pd.testing.assert_series_equal(
+                full_data[f"{column}{suffix}"],
+                expected[column],
+                check_names=False,
+            )
+
+    assert full_data["logged_events_homepage"].notna().tolist() == [
+        True,
+        True,
+        False,
+    ]
+    # The catalog has a report but no event log
+    assert full_data["logged_events_catalog"].notna().tolist() == [
+        False,
+        False,
+        True,
+    ]
+    assert full_data["number_of_total_trackers_catalog"].notna().tolist() == [
+        True,
+        False,
+        True,
+    ]
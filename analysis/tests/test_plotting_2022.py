@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+from plotting_2022_blacklight import (
+    SUMMARY_SCORE_COLS,
+    _column_stats,
+    compute_split_summaries,
+)
+
+###############################################################################
+
+
+def _as_float(value: object) -> float:
+    return np.nan if pd.isna(value) else float(value)
+
+
+###############################################################################
+
+
+def test_split_summaries_match_each_split() -> None:
+    rng = np.random.default_rng(0)
+    n = 500
+    data = pd.DataFrame(
+        {
+            "vendor": rng.choice(["a", "b", "c", "d", None], n),
+            "state": rng.choice(["WA", "OR", "CA"], n),
+            "empty": [None] * n,
+            **{
+                col: pd.array(
+                    np.where(rng.random(n) < 0.1, np.nan, rng.integers(0, 40, n)),
+                    dtype="Float64",
+                )
+                for col in SUMMARY_SCORE_COLS
+            },
+        }
+    )
+
+    splits = compute_split_summaries(data, ["vendor", "state", "empty"], top_n=2)
+
+    assert [split.dimension for split in splits] == ["vendor", "state", "empty"]
+    for split in splits:
+        top_values = data[split.dimension].value_counts().nlargest(2).index
+        expected = data[data[split.dimension].isin(top_values)]
+        assert split.data.index.equals(expected.index)
+        for col in SUMMARY_SCORE_COLS:
+            expected_stats = _column_stats(expected[col])
+            for statistic in ["mean", "std", "min", "max", "median"]:
+                np.testing.assert_allclose(
+                    _as_float(split.stats[col][statistic]),
+                    _as_float(expected_stats[statistic]),
+                )
+            np.testing.assert_allclose(
+                split.stats[col]["major"].to_numpy(dtype=float, na_value=np.nan),
+                expected_stats["major"].to_numpy(dtype=float, na_value=np.nan),
+            )
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from typing import Optional
+
+import pytest
+
+from public_suffix import PublicSuffixList, registrable_domain
+
+###############################################################################
+
+RULES = [
+    "// ===BEGIN ICANN DOMAINS===",
+    "com",
+    "uk",
+    "co.uk",
+    "*.ck",
+    "!www.ck",
+    "// ===BEGIN PRIVATE DOMAINS===",
+    "cloudfront.net",
+]
+
+###############################################################################
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("stats.g.doubleclick.com", "doubleclick.com"),
+        ("WWW.Example.COM.", "example.com"),
+        ("foo.co.uk", "foo.co.uk"),
+        ("a.b.foo.co.uk", "foo.co.uk"),
+        ("co.uk", None),
+        # Every label under a wildcard is a public suffix
+        ("a.b.ck", "a.b.ck"),
+        ("b.ck", None),
+        # Exceptions to a wildcard are registrable
+        ("www.ck", "www.ck"),
+        ("a.www.ck", "www.ck"),
+        # Private suffixes are not used by default
+        ("d1.cloudfront.net", "cloudfront.net"),
+        # Unlisted suffixes are the last label
+        ("a.b.example", "b.example"),
+        ("127.0.0.1", None),
+        ("a..com", None),
+        ("", None),
+    ],
+)
+def test_registrable_domain(host: str, expected: Optional[str]) -> None:
+    assert PublicSuffixList(RULES).registrable_domain(host) == expected
+
+
+def test_private_suffixes() -> None:
+    suffix_list = PublicSuffixList(RULES, include_private=True)
+
+    assert suffix_list.registrable_domain("d1.cloudfront.net") == "d1.cloudfront.net"
+
+
+def test_stored_list() -> None:
+    assert registrable_domain("www.bbc.co.uk") == "bbc.co.uk"
+    assert registrable_domain("stats.g.doubleclick.net") == "doubleclick.net"
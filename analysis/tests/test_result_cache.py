@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from pathlib import Path
+
+import pytest
+
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from result_cache import SiteResultCache
+
+###############################################################################
+
+
+@pytest.fixture
+def site(tmp_path: Path) -> Path:
+    site = tmp_path / "library.org"
+    site.mkdir()
+    (site / SINGLE_PAGE_AXE_RESULTS_FILENAME).write_text('{"reports": {}}')
+    return site
+
+
+def _touch(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+###############################################################################
+
+
+def test_hit_when_only_mtime_changes(tmp_path: Path, site: Path) -> None:
+    cache = SiteResultCache(tmp_path / "cache.sqlite", "test", "1")
+    assert cache.get(site) is None
+    cache.put(site, {"trackers": 3})
+    cache.close()
+
+    _touch(site / SINGLE_PAGE_AXE_RESULTS_FILENAME)
+    cache = SiteResultCache(tmp_path / "cache.sqlite", "test", "1")
+    assert cache.get(site) == {"trackers": 3}
+    cache.close()
+
+
+def test_miss_when_content_changes(tmp_path: Path, site: Path) -> None:
+    cache = SiteResultCache(tmp_path / "cache.sqlite", "test", "1")
+    cache.put(site, {"trackers": 3})
+    cache.commit()
+
+    # Same size, so only the digest tells the content apart
+    (site / SINGLE_PAGE_AXE_RESULTS_FILENAME).write_text('{"reports": []}')
+    _touch(site / SINGLE_PAGE_AXE_RESULTS_FILENAME)
+    assert cache.get(site) is None
+    cache.close()
+
+
+def test_miss_when_version_changes(tmp_path: Path, site: Path) -> None:
+    cache = SiteResultCache(tmp_path / "cache.sqlite", "test", "1")
+    cache.put(site, {"trackers": 3})
+    cache.close()
+
+    cache = SiteResultCache(tmp_path / "cache.sqlite", "test", "2")
+    assert cache.get(site) is None
+    cache.close()
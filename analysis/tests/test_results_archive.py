@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pickle
+import shutil
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import core_2022
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from inspection import read_inspection_summary
+from results_archive import ArchivedSite, open_results_archive
+from utils_2022 import find_site_results
+
+###############################################################################
+
+TEST_DATA_DIR = Path(__file__).parent.parent.parent / "__tests__" / "test-data"
+
+###############################################################################
+
+
+@pytest.fixture(scope="module")
+def results_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    results_dir = tmp_path_factory.mktemp("results")
+    shutil.copytree(
+        TEST_DATA_DIR / "veteransunited-1.0.3", results_dir / "library.org"
+    )
+    return results_dir
+
+
+@pytest.fixture(scope="module")
+def results_zip(results_dir: Path) -> Path:
+    path = results_dir.parent / "results.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for member in sorted(results_dir.rglob("*")):
+            archive.write(member, member.relative_to(results_dir).as_posix())
+    return path
+
+
+###############################################################################
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_archived_site_reads_same_summary(
+    results_dir: Path, results_zip: Path, use_mmap: bool
+) -> None:
+    [site] = find_site_results(
+        ["https://library.org/"], results_zip, use_mmap=use_mmap
+    )
+    assert isinstance(site, ArchivedSite)
+    assert site.is_dir()
+    assert not (site / "missing.json").exists()
+
+    results_file = site / SINGLE_PAGE_AXE_RESULTS_FILENAME
+    expected_file = results_dir / "library.org" / SINGLE_PAGE_AXE_RESULTS_FILENAME
+    assert results_file.stat().st_size == expected_file.stat().st_size
+    for stream_threshold in [None, 0]:
+        assert read_inspection_summary(
+            results_file,
+            summed_reports=core_2022.SUMMED_REPORTS,
+            stream_threshold=stream_threshold,
+        ) == read_inspection_summary(
+            expected_file, summed_reports=core_2022.SUMMED_REPORTS
+        )
+
+
+def test_archived_site_is_picklable(results_zip: Path) -> None:
+    site = open_results_archive(results_zip).site("library.org")
+
+    assert pickle.loads(pickle.dumps(site)) == site
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from constants import SINGLE_PAGE_AXE_RESULTS_FILENAME
+from scan_2022 import PARTIAL_SCANS_DIRNAME, ScanResult, scan_site, scan_sites
+from utils import clean_url
+
+###############################################################################
+
+URL = "https://www.example-library.org/"
+SITE = clean_url(URL)
+
+# Timed out collectors are killed with their whole process group
+needs_process_groups = pytest.mark.skipif(
+    not hasattr(os, "killpg") or not Path("/proc").exists(),
+    reason="needs process groups and /proc",
+)
+
+# A stand in for the blacklight collector. Each run writes an inspection.json
+# into <site>/ under its working directory, then behaves as the planned
+# outcome of its attempt: "ok" exits cleanly, "fail" exits with an error and
+# "hang" starts a child in its process group and never exits.
+STUB_COLLECTOR = """
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+state, site, url = Path(sys.argv[1]), sys.argv[2], sys.argv[3]
+attempts = state / "attempts"
+attempt = len(attempts.read_text()) if attempts.exists() else 0
+attempts.write_text("x" * (attempt + 1))
+plan = (state / "plan").read_text().split()
+outcome = plan[min(attempt, len(plan) - 1)]
+
+Path(site).mkdir()
+with open(Path(site) / "inspection.json", "w") as open_f:
+    json.dump({"url": url, "attempt": attempt}, open_f)
+
+if outcome == "fail":
+    sys.stderr.write("collector failed")
+    sys.exit(3)
+if outcome == "hang":
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    (state / "child.pid").write_text(str(child.pid))
+    time.sleep(60)
+"""
+
+###############################################################################
+
+
+@pytest.fixture
+def stub_state(tmp_path: Path) -> Path:
+    state = tmp_path / "state"
+    state.mkdir()
+    return state
+
+
+def _collector(tmp_path: Path, state: Path, plan: List[str]) -> List[str]:
+    script = tmp_path / "collector.py"
+    script.write_text(STUB_COLLECTOR)
+    (state / "plan").write_text(" ".join(plan))
+    return [sys.executable, str(script), str(state), SITE]
+
+
+def _scan(
+    out_dir: Path,
+    collector: List[str],
+    timeout: float = 30,
+    retries: int = 0,
+) -> ScanResult:
+    async def scan() -> ScanResult:
+        return await scan_site(
+            URL,
+            out_dir,
+            collector,
+            asyncio.Semaphore(1),
+            timeout=timeout,
+            retries=retries,
+            backoff=0,
+        )
+
+    return asyncio.run(scan())
+
+
+def _is_running(pid: int) -> bool:
+    # Killed processes can linger as zombies until their new parent reaps them
+    try:
+        with open(f"/proc/{pid}/stat") as open_f:
+            return open_f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def _assert_partial_cleaned(out_dir: Path) -> None:
+    # Every attempt's staging directory is removed, whatever its outcome
+    partial_dir = out_dir / PARTIAL_SCANS_DIRNAME
+    assert not partial_dir.exists() or not any(partial_dir.iterdir())
+
+
+###############################################################################
+
+
+def test_scan_success(tmp_path: Path, stub_state: Path) -> None:
+    out_dir = tmp_path / "out"
+    result = _scan(out_dir, _collector(tmp_path, stub_state, ["ok"]))
+
+    assert result.status == "scanned"
+    assert result.attempts == 1
+    assert result.error is None
+    with open(out_dir / SITE / SINGLE_PAGE_AXE_RESULTS_FILENAME) as open_f:
+        assert json.load(open_f) == {"url": URL, "attempt": 0}
+    _assert_partial_cleaned(out_dir)
+
+
+def test_scan_non_zero_exit(tmp_path: Path, stub_state: Path) -> None:
+    out_dir = tmp_path / "out"
+    result = _scan(out_dir, _collector(tmp_path, stub_state, ["fail"]))
+
+    assert result.status == "failed"
+    assert result.attempts == 1
+    assert result.error == "Exited with 3: collector failed"
+    # The collector wrote an inspection.json before failing, which is dropped
+    assert not (out_dir / SITE).exists()
+    _assert_partial_cleaned(out_dir)
+
+
+@needs_process_groups
+def test_scan_timeout_kills_process_group(
+    tmp_path: Path, stub_state: Path
+) -> None:
+    out_dir = tmp_path / "out"
+    start = time.perf_counter()
+    result = _scan(
+        out_dir, _collector(tmp_path, stub_state, ["hang"]), timeout=2
+    )
+
+    assert time.perf_counter() - start < 30
+    assert result.status == "timeout"
+    assert result.attempts == 1
+    assert result.error == "Timed out after 2s"
+    assert not (out_dir / SITE).exists()
+    _assert_partial_cleaned(out_dir)
+
+    # The collector's own children are killed with it
+    child = int((stub_state / "child.pid").read_text())
+    deadline = time.monotonic() + 5
+    while _is_running(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _is_running(child)
+
+
+def test_scan_retries_until_success(tmp_path: Path, stub_state: Path) -> None:
+    out_dir = tmp_path / "out"
+    result = _scan(
+        out_dir,
+        _collector(tmp_path, stub_state, ["fail", "fail", "ok"]),
+        retries=2,
+    )
+
+    assert result.status == "scanned"
+    assert result.attempts == 3
+    # Only the successful attempt's results are moved into place
+    with open(out_dir / SITE / SINGLE_PAGE_AXE_RESULTS_FILENAME) as open_f:
+        assert json.load(open_f) == {"url": URL, "attempt": 2}
+    _assert_partial_cleaned(out_dir)
+
+
+def test_scan_gives_up_after_retries(tmp_path: Path, stub_state: Path) -> None:
+    out_dir = tmp_path / "out"
+    result = _scan(
+        out_dir, _collector(tmp_path, stub_state, ["fail"]), retries=2
+    )
+
+    assert result.status == "failed"
+    assert result.attempts == 3
+    assert (stub_state / "attempts").read_text() == "xxx"
+    assert not (out_dir / SITE).exists()
+    _assert_partial_cleaned(out_dir)
+
+
+def test_scan_sites_removes_staging_dir(
+    tmp_path: Path, stub_state: Path
+) -> None:
+    out_dir = tmp_path / "out"
+    collector = _collector(tmp_path, stub_state, ["fail", "ok"])
+    results = asyncio.run(scan_sites([URL], out_dir, collector, backoff=0))
+
+    assert [result.status for result in results] == ["scanned"]
+    assert (out_dir / SITE / SINGLE_PAGE_AXE_RESULTS_FILENAME).exists()
+    assert not (out_dir / PARTIAL_SCANS_DIRNAME).exists()
+
+    # Sites with results are skipped unless rescanned
+    results = asyncio.run(scan_sites([URL], out_dir, collector, backoff=0))
+    assert [result.status for result in results] == ["skipped"]
+
+
+@needs_process_groups
+def test_scan_timeout_keeps_previous_results(
+    tmp_path: Path, stub_state: Path
+) -> None:
+    out_dir = tmp_path / "out"
+    collector = _collector(tmp_path, stub_state, ["ok", "hang"])
+    assert _scan(out_dir, collector).status == "scanned"
+
+    # A rescan that times out leaves the earlier results in place
+    async def rescan() -> ScanResult:
+        return await scan_site(
+            URL,
+            out_dir,
+            collector,
+            asyncio.Semaphore(1),
+            timeout=2,
+            retries=0,
+            backoff=0,
+            rescan=True,
+        )
+
+    assert asyncio.run(rescan()).status == "timeout"
+    with open(out_dir / SITE / SINGLE_PAGE_AXE_RESULTS_FILENAME) as open_f:
+        assert json.load(open_f) == {"url": URL, "attempt": 0}
+    _assert_partial_cleaned(out_dir)
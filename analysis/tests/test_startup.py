@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmark_2022 import STARTUP_SCRIPTS
+
+###############################################################################
+
+ANALYSIS_DIR = Path(__file__).parent.parent
+
+# Modules that are only imported once a CLI does real work
+HEAVY_MODULES = ["numpy", "pandas", "pyarrow", "scipy", "altair", "tqdm"]
+
+###############################################################################
+
+
+def _run_help(script: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, script, "--help"],
+        cwd=ANALYSIS_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+###############################################################################
+
+
+@pytest.mark.parametrize("script", STARTUP_SCRIPTS)
+def test_help_skips_heavy_imports(script: str) -> None:
+    # `-X importtime` lists every module imported, as "self | cumulative | name"
+    imported = {
+        line.split("|")[-1].strip()
+        for line in _run_help(script, "-X", "importtime").stderr.splitlines()
+    }
+    assert not imported & set(HEAVY_MODULES)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from stats_2022 import bootstrap_median_ci, holm_adjust
+
+###############################################################################
+
+
+def test_holm_adjust() -> None:
+    # Sorted: 4 * 0.005, 3 * 0.01, 2 * 0.03, then 1 * 0.04 raised to 0.06
+    np.testing.assert_allclose(
+        holm_adjust([0.01, 0.04, 0.03, 0.005]), [0.03, 0.06, 0.06, 0.02]
+    )
+    np.testing.assert_allclose(holm_adjust([0.5, 0.6]), [1.0, 1.0])
+    assert len(holm_adjust([])) == 0
+
+
+def test_bootstrap_median_ci_is_reproducible() -> None:
+    values = np.array([0, 1, 1, 2, 3, 3, 3, 5, 8, 13, np.nan])
+
+    ci = bootstrap_median_ci(values, resamples=2000, rng=np.random.default_rng(7))
+    assert ci == bootstrap_median_ci(
+        values, resamples=2000, rng=np.random.default_rng(7)
+    )
+    assert ci[0] <= np.nanmedian(values) <= ci[1]
+    assert 0 <= ci[0] <= ci[1] <= 13
+
+
+def test_bootstrap_median_ci_edge_cases() -> None:
+    rng = np.random.default_rng(0)
+
+    assert bootstrap_median_ci([4, 4, 4], resamples=100, rng=rng) == (4.0, 4.0)
+    assert np.isnan(bootstrap_median_ci([np.nan], rng=rng)).all()
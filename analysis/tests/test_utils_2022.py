@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pytest
+
+from utils_2022 import merge_site_metrics
+
+###############################################################################
+
+
+@pytest.fixture
+def library_data() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Library": ["a", "b", "c", "d"],
+            "Homepage": [
+                "https://a.org/",
+                "http://b.org/catalog",
+                "https://a.org/about",
+                None,
+            ],
+        },
+        index=[10, 11, 12, 13],
+    )
+
+
+###############################################################################
+
+
+def test_merge_keeps_nullable_counts(library_data: pd.DataFrame) -> None:
+    full_data = merge_site_metrics(
+        library_data,
+        "Homepage",
+        [{"cookies": 3, "trackers": 5}, None, {"cookies": 3, "trackers": 5}, None],
+        dtype="UInt32",
+    )
+
+    # Rows without metrics are missing rather than upcasting the counts to float
+    assert full_data["cookies"].dtype == "UInt32"
+    assert full_data["trackers"].dtype == "UInt32"
+    assert full_data["cookies"].tolist() == [3, pd.NA, 3, pd.NA]
+    assert full_data["Library"].tolist() == ["a", "b", "c", "d"]
+    assert list(full_data.index) == [0, 1, 2, 3]
+
+
+def test_merge_shares_metrics_by_site(library_data: pd.DataFrame) -> None:
+    # Every row of a site gets the metrics of its first row with metrics
+    full_data = merge_site_metrics(
+        library_data,
+        "Homepage",
+        [{"hosts": ["x.com"]}, {"hosts": []}, {"hosts": ["y.com"]}, None],
+    )
+
+    assert full_data["hosts"].tolist()[:3] == [["x.com"], [], ["x.com"]]
+    assert pd.isna(full_data["hosts"].iloc[3])
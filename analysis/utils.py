@@ -1,6 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def clean_url(url: str) -> str:
     url = url.replace("https://", "").replace("http://", "")
@@ -10,3 +15,38 @@ def clean_url(url: str) -> str:
 #     if url.endswith("/"):
 #         url = url[:-1]
     return url
+
+
+def clean_urls(urls: Iterable) -> "pd.Series":
+    """
+    Apply `clean_url` to a whole column of urls at once with pandas string ops.
+
+    Parameters
+    ----------
+    urls: Iterable
+        The urls to clean. Anything that is not a string becomes NaN.
+
+    Returns
+    -------
+    cleaned: pd.Series
+        The cleaned urls, with the same index as `urls` if it was a Series.
+    """
+    # Imported here so the scan CLI can start without pandas
+    import pandas as pd
+
+    urls = pd.Series(urls, dtype=object)
+    urls = urls.where(urls.map(lambda url: isinstance(url, str)))
+    return (
+        urls.str.replace("https://", "", regex=False)
+        .str.replace("http://", "", regex=False)
+        .str.split("/", n=1)
+        .str[0]
+    )
+
+
+def normalize_site_names(names: "pd.Series") -> "pd.Series":
+    """
+    Normalize cleaned urls or site directory names for loose matching by
+    lowercasing them and dropping a leading `www.`.
+    """
+    return names.str.lower().str.replace(r"^www\.", "", regex=True)
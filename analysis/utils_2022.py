@@ -1,11 +1,37 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import logging
+import os
 import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
-from typing import Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+from tqdm import tqdm
 
 import constants_2022
+import instrumentation
+from result_cache import SiteResultCache
+from results_archive import ArchivedSite, open_results_archive
+from utils import clean_urls, normalize_site_names
+
+###############################################################################
+
+log = logging.getLogger(__name__)
 
 ###############################################################################
 
@@ -54,7 +80,223 @@ def unpack_data(
     dest.mkdir(parents=True, exist_ok=True)
 
     # Extract
-    shutil.unpack_archive(zipfile, dest)
+    with instrumentation.stage("unpack"):
+        shutil.unpack_archive(zipfile, dest)
 
     # Return extracted data dir
     return dest.resolve(strict=True)
+
+
+@instrumentation.timed("find_sites")
+def find_site_results(
+    urls: Iterable[Any],
+    lib_scraping_results: Union[str, Path],
+    use_mmap: bool = False,
+) -> List[Optional[Union[Path, ArchivedSite]]]:
+    """
+    Find the blacklight results directory for each library website url.
+
+    The results are listed once and matched against all cleaned urls at once.
+    Urls without an exact match fall back to the one site directory with the
+    same name ignoring case and a leading `www.`, if there is one.
+
+    Parameters
+    ----------
+    urls: Iterable[Any]
+        The library website urls. Anything that is not a string has no results.
+    lib_scraping_results: Union[str, Path]
+        The directory that contains sub-directories for each library website's
+        blacklight results, or a zip archive with the same layout. Archives are
+        read in place without unpacking.
+    use_mmap: bool
+        Memory map the archive when `lib_scraping_results` is a zip file.
+        Default: False
+
+    Returns
+    -------
+    sites: List[Optional[Union[Path, ArchivedSite]]]
+        The results directory for each url, or None where it does not exist.
+    """
+    lib_scraping_results = Path(lib_scraping_results).resolve(strict=True)
+
+    # List every site once rather than checking each url on disk
+    if lib_scraping_results.is_file() and zipfile.is_zipfile(lib_scraping_results):
+        # Read straight out of a results archive
+        archive = open_results_archive(lib_scraping_results, use_mmap)
+        site_names = archive.site_names()
+        get_site: Callable[[str], Union[Path, ArchivedSite]] = archive.site
+    elif lib_scraping_results.is_dir():
+        with os.scandir(lib_scraping_results) as entries:
+            site_names = [entry.name for entry in entries]
+        get_site = lib_scraping_results.joinpath
+    else:
+        raise NotADirectoryError(lib_scraping_results)
+
+    # Exact site names first, then ignore case and a leading "www."
+    cleaned = clean_urls(urls)
+    site_names = pd.Series(site_names, dtype=object)
+    loose_names = pd.Series(
+        site_names.values, index=normalize_site_names(site_names)
+    )
+    loose_names = loose_names[~loose_names.index.duplicated(keep=False)]
+    resolved = cleaned.where(cleaned.isin(site_names)).fillna(
+        normalize_site_names(cleaned).map(loose_names)
+    )
+
+    return [get_site(name) if isinstance(name, str) else None for name in resolved]
+
+
+@instrumentation.timed("process_sites")
+def process_sites(
+    func: Callable[[Union[Path, ArchivedSite]], Any],
+    sites: Sequence[Optional[Union[Path, ArchivedSite]]],
+    workers: Optional[int] = 1,
+    initializer: Optional[Callable] = None,
+    initargs: Tuple = (),
+    cache: Optional[SiteResultCache] = None,
+) -> List[Any]:
+    """
+    Run a per-site function over many site result directories, optionally
+    fanned out to a process pool.
+
+    Parameters
+    ----------
+    func: Callable[[Union[Path, ArchivedSite]], Any]
+        A module level (picklable) function to run for each site directory.
+    sites: Sequence[Optional[Union[Path, ArchivedSite]]]
+        The site directories to process. `None` entries are skipped and their
+        result is `None`.
+    workers: Optional[int]
+        The number of worker processes to use. `1` processes every site in the
+        current process, `None` uses every available core.
+        Default: 1
+    initializer: Optional[Callable]
+        A function called once in each worker (or once in the current process
+        when running serially) with `initargs`. Use it to ship large shared
+        state, such as a compiled index, to workers once instead of per task.
+    initargs: Tuple
+        Arguments for `initializer`.
+    cache: Optional[SiteResultCache]
+        A result cache to reuse results from for unchanged sites. Newly computed
+        results are stored back to it.
+        Default: None (compute every site)
+
+    Returns
+    -------
+    results: List[Any]
+        The result for each site, in the same order as `sites`.
+    """
+    results: List[Any] = [None] * len(sites)
+
+    # Bring back the stages and counters of each task when instrumented
+    instrumented = instrumentation.enabled()
+    if instrumented:
+        func = partial(instrumentation.call_with_metrics, func)
+
+    # Reuse cached results and only compute the rest
+    pending = list(sites)
+    if cache is not None:
+        hits = 0
+        for i, site in enumerate(sites):
+            if site is not None:
+                cached = cache.get(site)
+                if cached is not None:
+                    results[i] = cached
+                    pending[i] = None
+                    hits += 1
+        log.info(
+            f"Reusing cached results for {hits} of "
+            f"{sum(site is not None for site in sites)} sites."
+        )
+        instrumentation.count("sites_cached", hits)
+
+    if workers == 1 or not any(site is not None for site in pending):
+        if initializer is not None:
+            initializer(*initargs)
+        for i, site in enumerate(tqdm(pending)):
+            if site is not None:
+                results[i] = func(site)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=initializer,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                executor.submit(func, site): i
+                for i, site in enumerate(pending)
+                if site is not None
+            }
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                results[futures[future]] = future.result()
+
+    if instrumented:
+        for i, site in enumerate(pending):
+            if site is not None:
+                results[i], task_metrics = results[i]
+                instrumentation.current().merge(task_metrics)
+                instrumentation.count("sites_processed")
+
+    # Store newly computed results
+    if cache is not None:
+        for i, site in enumerate(pending):
+            if site is not None:
+                cache.put(site, results[i])
+        cache.commit()
+
+    return results
+
+
+@instrumentation.timed("merge")
+def merge_site_metrics(
+    library_data: pd.DataFrame,
+    url_column: str,
+    site_metrics: Sequence[Optional[Dict[str, Any]]],
+    dtype: Optional[Any] = None,
+) -> pd.DataFrame:
+    """
+    Join per-site metrics onto the library data by cleaned website url.
+
+    The metrics are collected into a single table with one row per distinct
+    cleaned url, which is then joined onto every library row in one vectorized
+    lookup. Rows without metrics get missing values in the metric columns.
+
+    Parameters
+    ----------
+    library_data: pd.DataFrame
+        The library data the metrics were computed for.
+    url_column: str
+        The library data column holding the website url of each row.
+    site_metrics: Sequence[Optional[Dict[str, Any]]]
+        The metrics for each row of `library_data`, in the same order, or None
+        where the row has no results.
+    dtype: Optional[Any]
+        An optional dtype to store the metric columns as. Use a nullable dtype
+        such as "UInt32" when some rows may have no metrics.
+        Default: None (infer from the metric values)
+
+    Returns
+    -------
+    full_data: pd.DataFrame
+        The library data followed by one column per metric.
+    """
+    keys = [
+        url if metrics is not None else None
+        for url, metrics in zip(clean_urls(library_data[url_column]), site_metrics)
+    ]
+
+    # One row per distinct site
+    table: Dict[str, Dict[str, Any]] = {}
+    for key, metrics in zip(keys, site_metrics):
+        if key is not None and key not in table:
+            table[key] = metrics
+    metrics_table = pd.DataFrame(list(table.values()), index=list(table.keys()))
+
+    # Join, then store the metrics as the dtype once rows without metrics are
+    # missing values, which a nullable dtype keeps as <NA> instead of upcasting
+    library_data = library_data.reset_index(drop=True)
+    joined = metrics_table.reindex(keys)
+    if dtype is not None:
+        joined = joined.astype(dtype)
+    joined.index = library_data.index
+    return pd.concat([library_data, joined], axis=1)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import re
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Set, Union
+
+import pandas as pd
+
+from constants_2022 import ACCESS_EVAL_2022_VENDOR_NAMES, VENDOR_NAME_SUFFIX
+
+###############################################################################
+
+log = logging.getLogger(__name__)
+
+# The lowest similarity of two normalized names for them to be merged
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+
+# The number of names sharing the most trigrams that are scored per name
+DEFAULT_MAX_CANDIDATES = 10
+
+# Trigrams shared by more names than this are too common to find candidates
+MAX_TRIGRAM_POSTINGS = 500
+
+# Everything that is not a letter or digit is dropped when comparing names
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+_DIGITS = re.compile(r"[0-9]+")
+_TOKENS = re.compile(r"[0-9a-z]+")
+
+###############################################################################
+
+
+def normalize_vendor_name(name: str) -> str:
+    """
+    The comparison key of a vendor name: lowercased, with everything but
+    letters and digits removed, e.g. "Library World" and "LibraryWorld*" are
+    both "libraryworld".
+    """
+    return _NON_ALPHANUMERIC.sub("", name.lower())
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _model_tokens(name: str) -> List[str]:
+    # The numbers and one or two letter words of a name, which tell models of
+    # the same product apart (e.g. "R-Series" and "V-Series")
+    return [
+        token
+        for token in _TOKENS.findall(name.lower())
+        if len(token) <= 2 or token.isdigit()
+    ]
+
+
+def build_vendor_name_map(
+    counts: Mapping[str, int],
+    known: Optional[Mapping[str, str]] = None,
+    threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    max_candidates: int = DEFAULT_MAX_CANDIDATES,
+) -> Dict[str, str]:
+    """
+    Map every spelling variant of a vendor name to one canonical spelling.
+
+    Names with the same normalized key (see `normalize_vendor_name`) are the
+    same vendor. Remaining keys are matched against the keys of more common
+    vendors: candidates are found through an index of each key's character
+    trigrams (blocking), only the `max_candidates` sharing the most trigrams
+    are scored with `difflib.SequenceMatcher`, and the most common candidate
+    scoring at least `threshold` is taken. Names whose numbers differ (e.g.
+    "Mandarin M3" and "Mandarin M5"), or that both have a one or two letter
+    word and differ in it (e.g. "R-Series" and "V-Series"), are never merged.
+    Each name is compared to a bounded number of candidates and trigrams
+    shared by very many names are not used for blocking, so the cost grows
+    with the number of distinct names rather than with their pairs.
+
+    Every vendor is spelled as its most common variant.
+
+    Parameters
+    ----------
+    counts: Mapping[str, int]
+        The number of times each raw name is used.
+    known: Optional[Mapping[str, str]]
+        An existing (possibly hand edited) mapping. Its entries are kept as is
+        and only the other names are matched.
+        Default: None
+    threshold: float
+        The lowest similarity ratio of two keys to merge them.
+        Default: 0.9
+    max_candidates: int
+        The number of candidates to score per key.
+        Default: 10
+
+    Returns
+    -------
+    mapping: Dict[str, str]
+        The canonical spelling of every name in `counts` and `known`.
+    """
+    known = dict(known or {})
+
+    # Group the raw names by key, most common first
+    key_counts: Dict[str, int] = {}
+    key_names: Dict[str, List[str]] = {}
+    key_models: Dict[str, List[str]] = {}
+    by_count = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    for name, count in by_count:
+        key = normalize_vendor_name(name)
+        key_counts[key] = key_counts.get(key, 0) + count
+        key_names.setdefault(key, []).append(name)
+        key_models.setdefault(key, _model_tokens(name))
+
+    # Keys already mapped by the known table keep that canonical name
+    key_canonical: Dict[str, str] = {}
+    for name, canonical in known.items():
+        key_canonical.setdefault(normalize_vendor_name(name), canonical)
+
+    # Match each key against the canonical keys seen so far
+    postings: Dict[str, List[str]] = {}
+    canonical_keys: Dict[str, str] = {}
+    for key in sorted(key_counts, key=lambda key: (-key_counts[key], key)):
+        if not key:
+            continue
+        trigrams = _trigrams(key)
+
+        match = None
+        if key not in key_canonical:
+            shared: Dict[str, int] = {}
+            for trigram in trigrams:
+                others = postings.get(trigram, ())
+                if len(others) > MAX_TRIGRAM_POSTINGS:
+                    continue
+                for other in others:
+                    shared[other] = shared.get(other, 0) + 1
+            candidates = sorted(shared, key=lambda other: -shared[other])
+            digits = _DIGITS.findall(key)
+            models = key_models[key]
+            for other in candidates[:max_candidates]:
+                if _DIGITS.findall(other) != digits:
+                    continue
+                other_models = key_models[other]
+                if models and other_models and models != other_models:
+                    continue
+                # Cheap upper bounds first, the full ratio only if they pass
+                matcher = SequenceMatcher(None, key, other)
+                if (
+                    matcher.real_quick_ratio() >= threshold
+                    and matcher.quick_ratio() >= threshold
+                    and matcher.ratio() >= threshold
+                    and (match is None or key_counts[other] > key_counts[match])
+                ):
+                    match = other
+
+        if match is not None:
+            key_canonical[key] = canonical_keys[match]
+        else:
+            canonical_keys[key] = key_canonical.setdefault(key, key_names[key][0])
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(key)
+
+    mapping = dict(known)
+    for key, names in key_names.items():
+        for name in names:
+            if name not in mapping:
+                mapping[name] = key_canonical.get(key, name)
+
+    return mapping
+
+
+def load_vendor_name_map(
+    path: Union[str, Path] = ACCESS_EVAL_2022_VENDOR_NAMES,
+) -> Dict[str, str]:
+    """
+    Load a vendor name mapping table stored by `store_vendor_name_map`.
+
+    Parameters
+    ----------
+    path: Union[str, Path]
+        The CSV with a "name" and a "canonical" column.
+        Default: The table stored in the repository's `data_2022`.
+
+    Returns
+    -------
+    mapping: Dict[str, str]
+        The canonical spelling of each name, or an empty mapping if the table
+        does not exist yet.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    table = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return dict(zip(table["name"], table["canonical"]))
+
+
+def store_vendor_name_map(
+    mapping: Mapping[str, str],
+    path: Union[str, Path] = ACCESS_EVAL_2022_VENDOR_NAMES,
+) -> Path:
+    """
+    Store a vendor name mapping as a CSV table, sorted by canonical name so
+    each vendor's variants are listed together for review.
+
+    Parameters
+    ----------
+    mapping: Mapping[str, str]
+        The canonical spelling of each name.
+    path: Union[str, Path]
+        Where to store the table.
+        Default: The table stored in the repository's `data_2022`.
+
+    Returns
+    -------
+    path: Path
+        The path the table was stored to.
+    """
+    path = Path(path)
+    table = pd.DataFrame(
+        {"name": list(mapping), "canonical": list(mapping.values())}
+    ).sort_values(["canonical", "name"])
+    table.to_csv(path, index=False)
+    return path
+
+
+def _vendor_name_columns(data: pd.DataFrame) -> List[str]:
+    return [col for col in data.columns if col.endswith(VENDOR_NAME_SUFFIX)]
+
+
+def update_vendor_name_map(
+    data: pd.DataFrame,
+    path: Union[str, Path] = ACCESS_EVAL_2022_VENDOR_NAMES,
+) -> Dict[str, str]:
+    """
+    Add the vendor names of a dataset that the mapping table at `path` does
+    not cover yet (see `build_vendor_name_map`) and store the table.
+
+    This is run when generating the dataset. Loading a dataset only reads the
+    table, see `canonicalize_vendor_columns`.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        The dataset with the vendor name columns.
+    path: Union[str, Path]
+        The mapping table to extend.
+        Default: The table stored in the repository's `data_2022`.
+
+    Returns
+    -------
+    mapping: Dict[str, str]
+        The canonical spelling of every name in the table.
+    """
+    counts: Dict[str, int] = {}
+    for col in _vendor_name_columns(data):
+        for name, count in data[col].value_counts().items():
+            if isinstance(name, str):
+                counts[name] = counts.get(name, 0) + int(count)
+
+    known = load_vendor_name_map(path)
+    new_names = sum(name not in known for name in counts)
+    if not new_names:
+        return known
+
+    mapping = build_vendor_name_map(counts, known)
+    store_vendor_name_map(mapping, path)
+    log.info(f"Added {new_names} vendor names to {path}")
+    return mapping
+
+
+def canonicalize_vendor_columns(
+    data: pd.DataFrame,
+    mapping: Optional[Mapping[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Replace the vendor names in every vendor name column with their canonical
+    spelling. Names the mapping does not cover are kept as they are.
+
+    Parameters
+    ----------
+    data: pd.DataFrame
+        The dataset. Its vendor name columns are replaced in place.
+    mapping: Optional[Mapping[str, str]]
+        The canonical spelling of each name.
+        Default: None (read the table stored in the repository's `data_2022`)
+
+    Returns
+    -------
+    data: pd.DataFrame
+        The same dataset.
+    """
+    columns = _vendor_name_columns(data)
+    if not columns:
+        return data
+
+    if mapping is None:
+        mapping = load_vendor_name_map()
+    renames = {
+        name: canonical
+        for name, canonical in mapping.items()
+        if name != canonical
+    }
+    if not renames:
+        return data
+
+    for col in columns:
+        values = data[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            data[col] = values.astype(object).replace(renames).astype("category")
+        else:
+            data[col] = values.replace(renames)
+
+    return data